@@ -1,4 +1,8 @@
 from django.contrib import admin
+from apps.ai.archive import ArchivedBlob, ArchivedPage
+from apps.ai.corpus import PageText
+from apps.ai.dedup import PageFingerprint
+from apps.ai.insights import AIInsight
 from apps.ai.llm_service import AIAnalysisResult
 
 
@@ -20,3 +24,46 @@ class AIAnalysisResultAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(AIInsight)
+class AIInsightAdmin(admin.ModelAdmin):
+    list_display = ('competitor', 'product', 'criterion', 'value', 'confidence_score',
+                    'results_count', 'change_count', 'analysis_at')
+    list_filter = ('product', 'analysis_type')
+    search_fields = ('competitor', 'product', 'criterion', 'value')
+    readonly_fields = [field.name for field in AIInsight._meta.fields]
+
+
+@admin.register(PageFingerprint)
+class PageFingerprintAdmin(admin.ModelAdmin):
+    list_display = ('url', 'competitor', 'product', 'criterion', 'cluster', 'analyzed_at')
+    list_filter = ('product', 'criterion')
+    search_fields = ('url', 'competitor')
+    readonly_fields = [field.name for field in PageFingerprint._meta.fields]
+
+
+@admin.register(PageText)
+class PageTextAdmin(admin.ModelAdmin):
+    list_display = ('url', 'competitor', 'product', 'fetched_at', 'text_length')
+    list_filter = ('competitor', 'product')
+    search_fields = ('url',)
+    exclude = ('text_z',)
+    readonly_fields = ('url', 'competitor', 'product', 'criterion', 'fetched_at',
+                       'content_hash', 'text_length', 'text')
+
+
+@admin.register(ArchivedPage)
+class ArchivedPageAdmin(admin.ModelAdmin):
+    list_display = ('url', 'competitor', 'product', 'fetched_at', 'status_code', 'run_id')
+    list_filter = ('competitor', 'product')
+    search_fields = ('url', 'run_id')
+    raw_id_fields = ('blob',)
+    readonly_fields = [field.name for field in ArchivedPage._meta.fields]
+
+
+@admin.register(ArchivedBlob)
+class ArchivedBlobAdmin(admin.ModelAdmin):
+    list_display = ('digest', 'codec', 'segment', 'size', 'length', 'created_at')
+    search_fields = ('digest',)
+    readonly_fields = [field.name for field in ArchivedBlob._meta.fields]
@@ -0,0 +1,347 @@
+"""
+Архив исходного HTML страниц с адресацией по содержимому.
+
+HTML хранится блобами, ключ блоба - sha256 содержимого, поэтому одна и та же
+страница, скачанная в разных запусках или с разных URL, хранится один раз.
+Блобы сжимаются zstd (без пакета zstandard - zlib) и дописываются в
+файлы-сегменты в PAGE_ARCHIVE_DIR/segments; каждый процесс пишет в свой
+сегмент (один PageArchive на процесс воркера, apps/tasks/resources.py),
+новый сегмент начинается после PAGE_ARCHIVE_SEGMENT_SIZE байт.
+Чтение идёт через mmap сегмента, без открытия файла на каждую страницу.
+
+Индекс в БД:
+- ArchivedBlob: digest -> сегмент, смещение, длина
+- ArchivedPage: (url, fetched_at) -> блоб, плюс run_id запуска парсера
+
+ReplaySession подменяет requests.Session у парсеров (PageTextParser,
+BaseParser) и отдаёт страницы исторического запуска из архива - для
+повторного разбора улучшенным парсером и бенчмарков без сети
+(manage.py replay_archive).
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+try:
+    import zstandard
+except ImportError:  # zstandard необязателен, остаётся zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZSTD = 'zstd'
+CODEC_ZLIB = 'zlib'
+
+
+class ArchivedBlob(models.Model):
+    """Сжатое содержимое страницы в сегменте архива"""
+
+    digest = models.CharField(max_length=64, unique=True, help_text='sha256 несжатого содержимого')
+    codec = models.CharField(max_length=8)
+    segment = models.CharField(max_length=100)
+    offset = models.BigIntegerField()
+    length = models.PositiveIntegerField(help_text='Размер в сегменте (сжатый)')
+    size = models.PositiveIntegerField(help_text='Исходный размер')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} -> {self.length})"
+
+
+class ArchivedPage(models.Model):
+    """Скачанная версия страницы: (url, fetched_at) -> блоб"""
+
+    url = models.URLField(max_length=500)
+    fetched_at = models.DateTimeField()
+    blob = models.ForeignKey(ArchivedBlob, on_delete=models.PROTECT, related_name='pages')
+    run_id = models.CharField(max_length=64, blank=True, db_index=True, help_text='Запуск парсера (id задачи)')
+    competitor = models.CharField(max_length=200, blank=True)
+    product = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField(default=200)
+    encoding = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['url', '-fetched_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.url} ({self.fetched_at:%Y-%m-%d %H:%M})"
+
+
+class PageArchive:
+    """
+    Запись и чтение архива.
+
+    Один экземпляр можно использовать из нескольких потоков: дозапись в
+    сегмент идёт под блокировкой, БД - через соединение вызывающего потока.
+    """
+
+    def __init__(self, root: str = None, segment_size: int = None, level: int = None):
+        self.root = Path(root or settings.PAGE_ARCHIVE_DIR)
+        self.segment_size = segment_size or settings.PAGE_ARCHIVE_SEGMENT_SIZE
+        self.level = level or settings.PAGE_ARCHIVE_ZSTD_LEVEL
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+        self._segment = None
+        self._writer = None
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+
+    # Запись
+
+    def put(
+        self,
+        url: str,
+        content: bytes,
+        fetched_at: Optional[datetime] = None,
+        encoding: str = '',
+        status_code: int = 200,
+        run_id: str = '',
+        competitor: str = '',
+        product: str = ''
+    ) -> ArchivedPage:
+        """Сохранить версию страницы; одинаковое содержимое хранится один раз"""
+        digest = hashlib.sha256(content).hexdigest()
+        blob = ArchivedBlob.objects.filter(digest=digest).first()
+        if blob is None:
+            blob = self._write_blob(digest, content)
+
+        return ArchivedPage.objects.create(
+            url=url,
+            fetched_at=fetched_at or timezone.now(),
+            blob=blob,
+            run_id=run_id or '',
+            competitor=competitor or '',
+            product=product or '',
+            status_code=status_code,
+            encoding=encoding or '',
+        )
+
+    def _compress(self, content: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            return zstandard.ZstdCompressor(level=self.level).compress(content)
+        return zlib.compress(content, 6)
+
+    def _write_blob(self, digest: str, content: bytes) -> ArchivedBlob:
+        data = self._compress(content)
+        with self._write_lock:
+            writer = self._segment_writer(len(data))
+            segment = self._segment
+            offset = writer.tell()
+            writer.write(data)
+            writer.flush()
+
+        # Тот же блоб мог одновременно записать другой процесс - тогда
+        # байты в нашем сегменте просто не используются
+        blob, _ = ArchivedBlob.objects.get_or_create(
+            digest=digest,
+            defaults={
+                'codec': self.codec,
+                'segment': segment,
+                'offset': offset,
+                'length': len(data),
+                'size': len(content),
+            }
+        )
+        return blob
+
+    def _segment_writer(self, length: int):
+        if self._writer is not None and self._writer.tell() + length > self.segment_size:
+            self._writer.close()
+            self._writer = None
+        if self._writer is None:
+            directory = self.root / 'segments'
+            directory.mkdir(parents=True, exist_ok=True)
+            self._segment = f"{timezone.now():%Y%m%d%H%M%S}-{os.getpid()}-{uuid.uuid4().hex[:8]}.seg"
+            self._writer = open(directory / self._segment, 'ab')
+        return self._writer
+
+    # Чтение
+
+    def _map(self, segment: str, end: int) -> mmap.mmap:
+        with self._lock:
+            mapped = self._maps.get(segment)
+            # Сегмент, в который ещё пишут, перемапливается, когда блоб за его концом
+            if mapped is None or len(mapped) < end:
+                with open(self.root / 'segments' / segment, 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped
+            return mapped
+
+    def _decompressor(self):
+        decompressor = getattr(self._local, 'zstd', None)
+        if decompressor is None:
+            decompressor = self._local.zstd = zstandard.ZstdDecompressor()
+        return decompressor
+
+    def read(self, blob: ArchivedBlob) -> bytes:
+        """Исходное содержимое блоба"""
+        mapped = self._map(blob.segment, blob.offset + blob.length)
+        data = mapped[blob.offset:blob.offset + blob.length]
+        if blob.codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError('zstandard is required to read zstd blobs')
+            return self._decompressor().decompress(data, max_output_size=blob.size)
+        return zlib.decompress(data)
+
+    def text(self, page: ArchivedPage) -> str:
+        return self.read(page.blob).decode(page.encoding or 'utf-8', errors='replace')
+
+    # Индекс
+
+    def snapshot(self, url: str, at: Optional[datetime] = None) -> Optional[ArchivedPage]:
+        """Последняя версия страницы на момент at (по умолчанию - последняя)"""
+        queryset = ArchivedPage.objects.filter(url=url).select_related('blob')
+        if at is not None:
+            queryset = queryset.filter(fetched_at__lte=at)
+        return queryset.order_by('-fetched_at', '-id').first()
+
+    def run_index(
+        self,
+        run_id: Optional[str] = None,
+        at: Optional[datetime] = None,
+        competitor: Optional[str] = None,
+        product: Optional[str] = None
+    ) -> Dict[str, ArchivedPage]:
+        """
+        Страницы запуска: url -> версия.
+
+        С run_id - страницы этого запуска, иначе последняя версия каждого URL
+        на момент at.
+        """
+        queryset = ArchivedPage.objects.select_related('blob')
+        if run_id:
+            queryset = queryset.filter(run_id=run_id)
+        if at is not None:
+            queryset = queryset.filter(fetched_at__lte=at)
+        if competitor:
+            queryset = queryset.filter(competitor=competitor)
+        if product:
+            queryset = queryset.filter(product=product)
+
+        # Более поздняя версия перезаписывает раннюю
+        index = {}
+        for page in queryset.order_by('fetched_at', 'id').iterator(chunk_size=1000):
+            index[page.url] = page
+        return index
+
+    def iter_run(self, run_id: str) -> Iterator[Tuple[ArchivedPage, bytes]]:
+        """Страницы запуска в порядке загрузки"""
+        queryset = ArchivedPage.objects.filter(run_id=run_id).select_related('blob').order_by('id')
+        for page in queryset.iterator(chunk_size=1000):
+            yield page, self.read(page.blob)
+
+
+def archived_pages(pages: Iterable[Dict], archive: PageArchive, run_id: str = '') -> Iterator[Dict]:
+    """
+    Сохраняет HTML страниц PageTextParser(keep_html=True) в архив.
+
+    Ключ "html" убирается из страницы, дальше она идёт без исходника.
+    """
+    for page in pages:
+        html = page.pop("html", None)
+        if html is not None:
+            try:
+                archive.put(
+                    page["source_url"],
+                    html.encode('utf-8'),
+                    fetched_at=_parsed_at(page),
+                    encoding='utf-8',
+                    run_id=run_id,
+                    competitor=page.get("competitor"),
+                    product=page.get("product"),
+                )
+            except Exception as e:
+                logger.error(f"Error archiving {page.get('source_url')}: {e}")
+        yield page
+
+
+def _parsed_at(page: Dict) -> Optional[datetime]:
+    value = page.get("parsed_at")
+    if not isinstance(value, str):
+        return value
+    parsed = datetime.fromisoformat(value)
+    return timezone.make_aware(parsed, dt_timezone.utc) if timezone.is_naive(parsed) else parsed
+
+
+class ArchivedResponse:
+    """Ответ в объёме, который используют парсеры: text, content, raise_for_status"""
+
+    def __init__(self, url: str, content: bytes, encoding: str = '', status_code: int = 200):
+        self.url = url
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.status_code = status_code
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f'{self.status_code} for url: {self.url} (archive)', response=self)
+
+
+class ReplaySession:
+    """
+    Замена requests.Session: страницы отдаются из архива, без сети.
+
+    Индекс запуска читается из БД один раз при создании, дальше get()
+    только читает сегменты через mmap, поэтому сессию можно использовать
+    из потоков PageTextParser.iter_pages. URL, которого нет в запуске,
+    отдаётся как 404.
+    """
+
+    def __init__(self, archive: PageArchive, run_id: Optional[str] = None, at: Optional[datetime] = None, **filters):
+        self.archive = archive
+        self.index = archive.run_index(run_id=run_id, at=at, **filters)
+        self.headers = {}
+
+    @property
+    def urls(self):
+        return list(self.index)
+
+    def get(self, url: str, **kwargs) -> ArchivedResponse:
+        page = self.index.get(url)
+        if page is None:
+            return ArchivedResponse(url, b'', status_code=404)
+        return ArchivedResponse(url, self.archive.read(page.blob), page.encoding, page.status_code)
+
+    def close(self):
+        pass
@@ -0,0 +1,280 @@
+"""
+Корпус скачанных страниц с полнотекстовым поиском.
+
+Очищенный текст из PageTextParser сохраняется в PageText в сжатом виде
+(zlib), новая версия страницы пишется только если текст изменился.
+Поисковый индекс хранится рядом, отдельной таблицей:
+- SQLite: FTS5 без копии текста (content=''), строка индекса = PageText.id;
+  русская морфология приближается отсечением окончаний и префиксным
+  поиском (вклад* находит "вкладам", "вкладов")
+- PostgreSQL: tsvector с конфигурацией 'russian' и GIN индексом
+На других СУБД поиск идёт перебором последних страниц.
+
+Корпус также служит источником текста для повторного анализа LLM без
+сетевых запросов (iter_stored_pages).
+"""
+
+import hashlib
+import logging
+import re
+import zlib
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import connection, models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'ai_pagetext_fts'
+PG_SEARCH_TABLE = 'ai_pagetext_search'
+SNIPPET_CHARS = 120
+# Сколько последних страниц перебирать без полнотекстового индекса
+FALLBACK_SCAN_LIMIT = 2000
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Окончания для отсечения, от длинных к коротким
+_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'ией', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ных', 'ной',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ам', 'ям', 'ах', 'ях', 'ом',
+    'ем', 'ов', 'ев', 'ей', 'ью', 'ия', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь',
+], key=len, reverse=True)
+
+
+class PageText(models.Model):
+    """Версия очищенного текста страницы"""
+
+    url = models.URLField(max_length=500)
+    competitor = models.CharField(max_length=200, blank=True)
+    product = models.CharField(max_length=200, blank=True)
+    criterion = models.CharField(max_length=200, blank=True)
+    fetched_at = models.DateTimeField()
+    content_hash = models.CharField(max_length=64)
+    text_length = models.PositiveIntegerField()
+    text_z = models.BinaryField(help_text='Текст, сжатый zlib')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-fetched_at']
+        indexes = [
+            models.Index(fields=['competitor', 'product', '-fetched_at']),
+            models.Index(fields=['url', '-fetched_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.url} ({self.fetched_at:%Y-%m-%d %H:%M})"
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(bytes(self.text_z)).decode('utf-8')
+
+    def as_page(self, criterion: Optional[str] = None) -> Dict:
+        """Страница в формате PageTextParser"""
+        return {
+            "competitor": self.competitor,
+            "product": self.product,
+            "criterion": criterion or self.criterion,
+            "source_url": self.url,
+            "parsed_at": self.fetched_at.replace(tzinfo=None).isoformat(),
+            "cleaned_text": self.text,
+            "status": "success",
+        }
+
+
+def stem(word: str) -> str:
+    """Грубое отсечение русского окончания (основа не короче 4 букв)"""
+    word = word.lower()
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 4:
+            return word[:-len(ending)]
+    return word
+
+
+def _terms(query: str) -> List[str]:
+    return [stem(token) for token in _TOKEN_RE.findall(query)]
+
+
+def _fetched_at(page: Dict) -> datetime:
+    value = page.get("parsed_at")
+    fetched_at = datetime.fromisoformat(value) if isinstance(value, str) else (value or timezone.now())
+    if timezone.is_naive(fetched_at):
+        fetched_at = timezone.make_aware(fetched_at, dt_timezone.utc)
+    return fetched_at
+
+
+def store_page(page: Dict) -> Optional[PageText]:
+    """
+    Сохранить текст страницы и добавить его в индекс.
+
+    Returns:
+        Новая версия или None, если страница с ошибкой или текст не изменился
+    """
+    text = page.get("cleaned_text")
+    url = page.get("source_url")
+    if not text or not url or 'error' in page:
+        return None
+
+    content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    latest_hash = PageText.objects.filter(url=url).order_by('-fetched_at').values_list(
+        'content_hash', flat=True
+    ).first()
+    if latest_hash == content_hash:
+        return None
+
+    stored = PageText.objects.create(
+        url=url,
+        competitor=page.get("competitor") or '',
+        product=page.get("product") or '',
+        criterion=page.get("criterion") or '',
+        fetched_at=_fetched_at(page),
+        content_hash=content_hash,
+        text_length=len(text),
+        text_z=zlib.compress(text.encode('utf-8'), 6),
+    )
+    _index(stored.id, text)
+    return stored
+
+
+def stored_pages(pages: Iterable[Dict]) -> Iterator[Dict]:
+    """Сохраняет страницы в корпус по мере прохождения, страницы отдаются без изменений"""
+    for page in pages:
+        try:
+            store_page(page)
+        except Exception as e:
+            logger.error(f"Error storing page text {page.get('source_url')}: {e}")
+        yield page
+
+
+def _index(page_id: int, text: str):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)', [page_id, text])
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"INSERT INTO {PG_SEARCH_TABLE}(page_id, vector) VALUES (%s, to_tsvector('russian', %s))",
+                [page_id, text]
+            )
+
+
+def _filters(competitor, product, date_from, date_to) -> Tuple[str, str, list]:
+    table = PageText._meta.db_table
+    clauses, params = [], []
+    for column, value in (('competitor', competitor), ('product', product)):
+        if value:
+            clauses.append(f'p.{column} = %s')
+            params.append(value)
+    if date_from:
+        clauses.append('p.fetched_at >= %s')
+        params.append(connection.ops.adapt_datetimefield_value(date_from))
+    if date_to:
+        clauses.append('p.fetched_at <= %s')
+        params.append(connection.ops.adapt_datetimefield_value(date_to))
+    return table, ''.join(f' AND {clause}' for clause in clauses), params
+
+
+def search(
+    query: str,
+    competitor: Optional[str] = None,
+    product: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 20
+) -> List[Tuple[PageText, float]]:
+    """
+    Полнотекстовый поиск по корпусу.
+
+    Returns:
+        Список (страница, релевантность), самые релевантные первыми
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    table, where, params = _filters(competitor, product, date_from, date_to)
+    if connection.vendor == 'sqlite':
+        match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        sql = (
+            f'SELECT p.id, -f.rank FROM {FTS_TABLE} f JOIN {table} p ON p.id = f.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s{where} ORDER BY f.rank LIMIT %s'
+        )
+        params = [match, *params, limit]
+    elif connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT p.id, ts_rank(s.vector, q) AS rank FROM {PG_SEARCH_TABLE} s "
+            f"JOIN {table} p ON p.id = s.page_id, websearch_to_tsquery('russian', %s) q "
+            f"WHERE s.vector @@ q{where} ORDER BY rank DESC LIMIT %s"
+        )
+        params = [query, *params, limit]
+    else:
+        return _scan(terms, competitor, product, date_from, date_to, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ranked = cursor.fetchall()
+
+    pages = PageText.objects.in_bulk([page_id for page_id, _ in ranked])
+    return [(pages[page_id], rank) for page_id, rank in ranked if page_id in pages]
+
+
+def _scan(terms, competitor, product, date_from, date_to, limit) -> List[Tuple[PageText, float]]:
+    """Поиск перебором последних страниц (СУБД без полнотекстового индекса)"""
+    queryset = PageText.objects.all()
+    if competitor:
+        queryset = queryset.filter(competitor=competitor)
+    if product:
+        queryset = queryset.filter(product=product)
+    if date_from:
+        queryset = queryset.filter(fetched_at__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(fetched_at__lte=date_to)
+
+    found = []
+    for page in queryset[:FALLBACK_SCAN_LIMIT]:
+        words = [stem(token) for token in _TOKEN_RE.findall(page.text)]
+        hits = sum(sum(word.startswith(term) for word in words) for term in terms)
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            found.append((page, float(hits)))
+    found.sort(key=lambda item: item[1], reverse=True)
+    return found[:limit]
+
+
+def snippet(text: str, query: str) -> str:
+    """Фрагмент текста вокруг первого найденного слова запроса"""
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in _terms(query)]
+    positions = [position for position in positions if position >= 0]
+    if not positions:
+        return text[:SNIPPET_CHARS * 2]
+    start = max(min(positions) - SNIPPET_CHARS, 0)
+    end = min(start + SNIPPET_CHARS * 2, len(text))
+    return ('…' if start else '') + text[start:end] + ('…' if end < len(text) else '')
+
+
+def iter_stored_pages(
+    competitor: str,
+    product: str,
+    criterion: Optional[str] = None,
+    query: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Страницы из корпуса в формате PageTextParser - для анализа без сети.
+
+    Берётся последняя версия каждого URL; с query - только найденные
+    поиском страницы.
+    """
+    if query:
+        found = search(query, competitor=competitor, product=product, limit=limit or 100)
+        for page, _ in found:
+            yield page.as_page(criterion)
+        return
+
+    seen = set()
+    queryset = PageText.objects.filter(competitor=competitor, product=product).order_by('url', '-fetched_at')
+    for page in queryset.iterator(chunk_size=100):
+        if page.url in seen:
+            continue
+        seen.add(page.url)
+        yield page.as_page(criterion)
+        if limit and len(seen) >= limit:
+            return
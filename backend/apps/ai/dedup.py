@@ -0,0 +1,200 @@
+"""
+Поиск почти одинаковых страниц (SimHash) перед анализом LLM.
+
+Страницы банков часто отличаются только баннерами, датами или токенами
+сессии, поэтому точный хеш считает их изменившимися. Для cleaned_text
+строится 64-битный SimHash по шинглам из слов; страница с расстоянием
+Хэмминга не больше AI_DEDUP_MAX_DISTANCE до уже проанализированной версии
+считается неизменной, и LLM для неё не вызывается.
+
+Кроме SimHash сравнивается подпись числовых значений (проценты, суммы,
+сроки): изменение ставки - это изменение страницы, даже если SimHash
+почти не сдвинулся.
+
+Прошлая версия той же страницы сравнивается всегда. Похожие страницы
+с разных URL (официальный сайт и агрегатор) ищутся через LSH по четырём
+16-битным полосам SimHash и объединяются в кластер: при расстоянии
+не больше 3 хотя бы одна полоса совпадает гарантированно, при большем -
+с высокой вероятностью.
+"""
+
+import hashlib
+import re
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+SIMHASH_BITS = 64
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Шум, который не должен влиять на отпечаток: даты, время, длинные токены
+_NOISE_RE = re.compile(
+    r'\b\d{1,2}[./]\d{1,2}[./]\d{2,4}\b|\b\d{1,2}:\d{2}(?::\d{2})?\b|\b[\w-]{24,}\b'
+)
+# Числа с единицами - то, что важно для фактов
+_VALUE_RE = re.compile(
+    r'\d+(?:[.,]\d+)?\s*(?:%|₽|руб|тыс|млн|дн|мес|лет|год)', re.IGNORECASE
+)
+
+
+class PageFingerprint(models.Model):
+    """Отпечаток последней проанализированной версии страницы"""
+
+    url = models.URLField(max_length=500)
+    competitor = models.CharField(max_length=200)
+    product = models.CharField(max_length=200)
+    criterion = models.CharField(max_length=200)
+
+    simhash = models.BigIntegerField()
+    values_hash = models.CharField(max_length=16, help_text='Хеш чисел с единицами из текста')
+    band_0 = models.PositiveIntegerField()
+    band_1 = models.PositiveIntegerField()
+    band_2 = models.PositiveIntegerField()
+    band_3 = models.PositiveIntegerField()
+
+    # Первая страница кластера зеркал (None - страница сама первая)
+    cluster = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    result = models.ForeignKey(
+        'ai.AIAnalysisResult',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    analyzed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('url', 'competitor', 'product', 'criterion')
+        indexes = [
+            models.Index(fields=['band_0']),
+            models.Index(fields=['band_1']),
+            models.Index(fields=['band_2']),
+            models.Index(fields=['band_3']),
+        ]
+
+    def __str__(self):
+        return f"{self.url} ({self.criterion})"
+
+    @property
+    def cluster_id_or_self(self) -> int:
+        return self.cluster_id or self.id
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value & ((1 << SIMHASH_BITS) - 1)
+
+
+def simhash(text: str) -> int:
+    """64-битный SimHash текста (беззнаковый)"""
+    words = _WORD_RE.findall(_NOISE_RE.sub(' ', text.lower()))
+    if len(words) < SHINGLE_SIZE:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    # Биты хешей шинглов строками: столбец i - бит (63 - i) каждого шингла,
+    # подсчёт единиц по столбцу идёт в C, а не в цикле по битам
+    rows = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+        for shingle in set(shingles)
+    ]
+    half = len(rows) / 2
+    value = 0
+    for column in zip(*rows):
+        value = (value << 1) | (column.count('1') > half)
+    return value
+
+
+def values_hash(text: str) -> str:
+    """Хеш упорядоченного набора чисел с единицами"""
+    found = sorted({re.sub(r'\s+', '', match.lower()) for match in _VALUE_RE.findall(_NOISE_RE.sub(' ', text))})
+    return hashlib.blake2b('|'.join(found).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(_to_unsigned(a) ^ _to_unsigned(b)).count('1')
+
+
+def fingerprint(text: str) -> Dict:
+    """Отпечаток текста: simhash (со знаком, как в БД), values_hash, полосы LSH"""
+    value = simhash(text)
+    bands = {
+        f'band_{i}': value >> (i * BAND_BITS) & ((1 << BAND_BITS) - 1)
+        for i in range(BANDS)
+    }
+    return {'simhash': _to_signed(value), 'values_hash': values_hash(text), **bands}
+
+
+def find_duplicate(page: Dict, fp: Dict) -> Optional[PageFingerprint]:
+    """
+    Проанализированная страница, почти совпадающая с этой.
+
+    Сначала проверяется прошлая версия той же страницы, затем зеркала
+    с других URL для того же конкурента, продукта и критерия.
+    """
+    candidates = PageFingerprint.objects.filter(
+        competitor=page.get('competitor') or '',
+        product=page.get('product') or '',
+        criterion=page.get('criterion') or '',
+        values_hash=fp['values_hash'],
+    ).filter(
+        Q(url=page.get('source_url')) | Q(band_0=fp['band_0']) | Q(band_1=fp['band_1'])
+        | Q(band_2=fp['band_2']) | Q(band_3=fp['band_3'])
+    )
+
+    best = None
+    best_distance = None
+    for candidate in candidates:
+        distance = hamming(candidate.simhash, fp['simhash'])
+        if distance > settings.AI_DEDUP_MAX_DISTANCE:
+            continue
+        # При равном расстоянии предпочитаем ту же страницу
+        key = (distance, candidate.url != page.get('source_url'))
+        if best is None or key < best_distance:
+            best, best_distance = candidate, key
+    return best
+
+
+def remember_pages(records: Iterable[Dict], results: Iterable) -> None:
+    """
+    Сохранить отпечатки проанализированных страниц.
+
+    records - записи анализа с ключом 'fingerprint', results - сохранённые
+    для них AIAnalysisResult в том же порядке.
+    """
+    now = timezone.now()
+    for record, result in zip(records, results):
+        fp = record.get('fingerprint')
+        if not fp or not record.get('source_url'):
+            continue
+        key = {
+            'url': record['source_url'],
+            'competitor': record.get('competitor') or '',
+            'product': record.get('product') or '',
+            'criterion': record.get('criterion') or '',
+        }
+        # Зеркало с другого URL - в тот же кластер
+        cluster_id = None
+        mirrors = PageFingerprint.objects.filter(
+            Q(band_0=fp['band_0']) | Q(band_1=fp['band_1'])
+            | Q(band_2=fp['band_2']) | Q(band_3=fp['band_3'])
+        ).exclude(url=key['url']).only('id', 'cluster', 'simhash')
+        for mirror in mirrors:
+            if hamming(mirror.simhash, fp['simhash']) <= settings.AI_DEDUP_MAX_DISTANCE:
+                cluster_id = mirror.cluster_id_or_self
+                break
+
+        PageFingerprint.objects.update_or_create(
+            **key,
+            defaults={**fp, 'cluster_id': cluster_id, 'result': result, 'analyzed_at': now}
+        )
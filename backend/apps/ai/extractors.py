@@ -0,0 +1,177 @@
+"""
+Быстрое извлечение фактов из текста страницы без LLM.
+
+Для простых критериев (ставка, процент на остаток, СМС, обслуживание,
+снятие наличных, кэшбэк, льготный период) факт обычно находится шаблоном:
+процент рядом со словом "ставка", "бесплатно" рядом с "СМС" и т.п.
+LLMService.analyze_stream сначала пробует extract(); если уверенность
+не ниже AI_PREEXTRACT_MIN_CONFIDENCE, результат сохраняется сразу,
+а страница в LLM не отправляется.
+
+Значения формулируются так, чтобы их разбирал apps/ai/values.py.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional
+
+EXTRACTOR_MODEL_NAME = 'heuristic'
+
+# Уверенность: одно значение во всех подходящих предложениях / разные значения
+CONFIDENCE_SINGLE = 0.9
+CONFIDENCE_AMBIGUOUS = 0.6
+
+# Граница предложения; сокращения "руб.", "тыс.", "млн." предложение не завершают
+_SENTENCE_RE = re.compile(r'(?<=[.!?;])(?<!руб\.)(?<!тыс\.)(?<!млн\.)\s+|\n+', re.IGNORECASE)
+# Разряды "1 000,50" - после замены неразрывных пробелов обычными (_sentences)
+_NUMBER = r'\d{1,3}(?: \d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?'
+_SPACES_RE = re.compile(r'[\u00a0\u202f]')
+_PERCENT_RE = re.compile(r'(?:(от|до)\s*)?(' + _NUMBER + r')\s*%', re.IGNORECASE)
+_AMOUNT_RE = re.compile(
+    r'(' + _NUMBER + r')\s*(?:₽|руб(?:\.|лей|ля|ль)?|р\.)\s*'
+    r'(?:(?:/|в|за)\s*(год|мес(?:яц)?\.?|день))?',
+    re.IGNORECASE
+)
+# Нулевая сумма - отдельное число "0 ₽", а не последняя цифра "100 ₽" или "1 000 ₽"
+_ZERO_AMOUNT = r'(?<![\d.,])(?<!\d )0(?:[.,]0+)?\s*(?:₽|руб)'
+_FREE_RE = re.compile(r'бесплатн|без\s+(?:комисси|платы)|' + _ZERO_AMOUNT, re.IGNORECASE)
+_DAYS_RE = re.compile(r'(?:(до)\s*)?(\d+)\s*(?:дн(?:ей|я)|день)', re.IGNORECASE)
+
+_PERIOD_NAMES = {'год': 'в год', 'мес': 'в месяц', 'ден': 'в день', 'дне': 'в день'}
+
+EXTRACTORS: Dict[str, Callable[[str], Optional[Dict]]] = {}
+
+
+def register_extractor(*criteria: str):
+    """Декоратор регистрации извлекателя для критериев"""
+    def decorator(func):
+        for criterion in criteria:
+            EXTRACTORS[criterion] = func
+        return func
+    return decorator
+
+
+def _sentences(text: str, keyword: re.Pattern) -> List[str]:
+    text = _SPACES_RE.sub(' ', text)
+    return [s for s in _SENTENCE_RE.split(text) if keyword.search(s)]
+
+
+def _decide(name: str, candidates: List[str]) -> Optional[Dict]:
+    """Итог по кандидатам: одно значение - высокая уверенность"""
+    if not candidates:
+        return None
+    distinct = list(dict.fromkeys(candidates))
+    return {
+        'value': distinct[0],
+        'confidence': CONFIDENCE_SINGLE if len(distinct) == 1 else CONFIDENCE_AMBIGUOUS,
+        'extractor': name,
+    }
+
+
+def _format_percent(bound: Optional[str], number: str) -> str:
+    number = number.replace(',', '.')
+    return f'{bound.lower()} {number}%' if bound else f'{number}%'
+
+
+def _format_amount(number: str, period: Optional[str]) -> str:
+    if not period:
+        return f'{number} ₽'
+    return f'{number} ₽ {_PERIOD_NAMES[period.lower()[:3]]}'
+
+
+def _is_zero(number: str) -> bool:
+    return not re.sub(r'[0 .,]', '', number)
+
+
+def _percent_facts(name: str, keyword: re.Pattern, label: str, text: str, suffix: str = '') -> Optional[Dict]:
+    candidates = []
+    for sentence in _sentences(text, keyword):
+        for bound, number in _PERCENT_RE.findall(sentence):
+            candidates.append(f'{label} {_format_percent(bound, number)}{suffix}')
+    return _decide(name, candidates)
+
+
+def _fee_facts(name: str, keyword: re.Pattern, label: str, text: str) -> Optional[Dict]:
+    candidates = []
+    for sentence in _sentences(text, keyword):
+        # "бесплатно первые 2 месяца, далее 99 ₽" даёт два кандидата - неоднозначно
+        # Нулевая сумма - это "бесплатно", а не второй кандидат
+        candidates.extend(
+            f'{label} {_format_amount(n, p)}' for n, p in _AMOUNT_RE.findall(sentence) if not _is_zero(n)
+        )
+        if _FREE_RE.search(sentence):
+            candidates.append(f'{label} бесплатно')
+    return _decide(name, candidates)
+
+
+@register_extractor('rate')
+def _rate(text: str) -> Optional[Dict]:
+    """Ставка: "до 18,5% годовых" """
+    return _percent_facts('rate', re.compile(r'ставк|доходност', re.IGNORECASE), 'Ставка', text, ' годовых')
+
+
+@register_extractor('interest')
+def _interest(text: str) -> Optional[Dict]:
+    """Процент на остаток"""
+    keyword = re.compile(r'на\s+остат|процент\w*\s+на', re.IGNORECASE)
+    return _percent_facts('interest', keyword, 'Процент на остаток', text, ' годовых')
+
+
+@register_extractor('cashback')
+def _cashback(text: str) -> Optional[Dict]:
+    """Кэшбэк в процентах"""
+    return _percent_facts('cashback', re.compile(r'кэшбэк|кешбэк|кешбек|cashback', re.IGNORECASE), 'Кэшбэк', text)
+
+
+@register_extractor('sms')
+def _sms(text: str) -> Optional[Dict]:
+    """СМС-уведомления: "бесплатно" или плата в рублях"""
+    return _fee_facts('sms', re.compile(r'смс|sms|уведомлен', re.IGNORECASE), 'СМС-уведомления', text)
+
+
+@register_extractor('cost')
+def _cost(text: str) -> Optional[Dict]:
+    """Обслуживание: "бесплатно" или плата в рублях"""
+    return _fee_facts('cost', re.compile(r'обслуживан', re.IGNORECASE), 'Обслуживание', text)
+
+
+@register_extractor('withdrawal')
+def _withdrawal(text: str) -> Optional[Dict]:
+    """Снятие наличных: "без комиссии" или комиссия в процентах / рублях"""
+    candidates = []
+    for sentence in _sentences(text, re.compile(r'сняти\w*\s+наличн|наличны\w*\s+в\s+банкомат', re.IGNORECASE)):
+        # "без комиссии до 100 000 ₽" - сумма здесь лимит, а не комиссия
+        if _FREE_RE.search(sentence):
+            candidates.append('Снятие наличных без комиссии')
+            continue
+        percents = _PERCENT_RE.findall(sentence)
+        if percents:
+            candidates.extend(f'Комиссия за снятие {_format_percent(b, n)}' for b, n in percents)
+        else:
+            candidates.extend(
+                f'Комиссия за снятие {_format_amount(n, p)}' for n, p in _AMOUNT_RE.findall(sentence)
+            )
+    return _decide('withdrawal', candidates)
+
+
+@register_extractor('grace')
+def _grace(text: str) -> Optional[Dict]:
+    """Льготный период: "до 120 дней" """
+    candidates = []
+    for sentence in _sentences(text, re.compile(r'льготн|беспроцентн', re.IGNORECASE)):
+        for bound, days in _DAYS_RE.findall(sentence):
+            candidates.append(f'Льготный период {"до " if bound else ""}{days} дней')
+    return _decide('grace', candidates)
+
+
+def extract(criterion: Optional[str], text: str) -> Optional[Dict]:
+    """
+    Факт по критерию из текста.
+
+    Returns:
+        Словарь value, confidence, extractor или None, если для критерия
+        нет извлекателя или шаблоны ничего не нашли
+    """
+    extractor = EXTRACTORS.get(criterion)
+    if extractor is None or not text:
+        return None
+    return extractor(text)
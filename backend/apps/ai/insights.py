@@ -0,0 +1,189 @@
+"""
+Свёртка результатов AI анализа для /api/ai/insights/.
+
+AIInsight хранит по одной строке на (конкурент, продукт, критерий):
+последний факт и агрегаты по всей истории (число результатов, средняя
+уверенность, сколько раз менялось значение). Строки обновляются по мере
+сохранения результатов (update_insights вызывается из LLMService), поэтому
+запрос insights не зависит от размера истории AIAnalysisResult.
+
+Свёртка же определяет, для каких фактов нужна новая рекомендация
+(pending_recommendations): для новых и тех, чьё значение изменилось
+после последней рекомендации.
+
+Полная пересборка по истории: python manage.py rebuild_ai_insights
+"""
+
+import logging
+from typing import Iterable, Optional
+
+from django.db import models, transaction
+from django.db.models import F, Q
+
+from apps.ai.values import VALUE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+# Типы анализа, которые попадают в insights
+INSIGHT_ANALYSIS_TYPES = ('facts', 'comparison')
+# bulk_update строит CASE по всем строкам пачки на каждое поле: на больших
+# пачках запрос растёт квадратично, поэтому свёртка пишется частями
+ROLLUP_UPDATE_BATCH_SIZE = 100
+
+
+class AIInsight(models.Model):
+    """Последний факт и агрегаты по (конкурент, продукт, критерий)"""
+
+    competitor = models.CharField(max_length=200)
+    product = models.CharField(max_length=200)
+    criterion = models.CharField(max_length=200)
+
+    # Последний результат
+    latest_result = models.ForeignKey(
+        'ai.AIAnalysisResult',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    analysis_type = models.CharField(max_length=20, blank=True)
+    value = models.TextField(null=True, blank=True)
+    # Значение, разобранное (копия из AIAnalysisResult)
+    value_amount = models.FloatField(null=True, blank=True)
+    value_currency = models.CharField(max_length=3, blank=True)
+    value_percent = models.FloatField(null=True, blank=True)
+    value_period = models.CharField(max_length=10, blank=True)
+    value_min = models.FloatField(null=True, blank=True)
+    value_max = models.FloatField(null=True, blank=True)
+    source_url = models.URLField(null=True, blank=True)
+    confidence_score = models.FloatField(null=True, blank=True)
+    llm_model = models.CharField(max_length=100, blank=True)
+    llm_prompt_version = models.CharField(max_length=50, blank=True)
+    parsed_at = models.DateTimeField(null=True, blank=True)
+    analysis_at = models.DateTimeField(null=True, blank=True)
+
+    # Агрегаты по истории
+    results_count = models.PositiveIntegerField(default=0)
+    confidence_count = models.PositiveIntegerField(default=0)
+    confidence_sum = models.FloatField(default=0)
+    change_count = models.PositiveIntegerField(default=0, help_text='Сколько раз менялось значение')
+    first_analysis_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Последняя рекомендация и change_count факта, для которого она построена
+    recommendation = models.ForeignKey(
+        'ai.AIAnalysisResult',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    recommended_change_count = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-analysis_at']
+        unique_together = ('competitor', 'product', 'criterion')
+        indexes = [
+            models.Index(fields=['product', 'criterion', '-analysis_at']),
+            models.Index(fields=['product', '-analysis_at']),
+            # Диапазоны и сортировка по значению: ?percent_gte=4&ordering=-percent
+            models.Index(fields=['product', 'criterion', 'value_percent']),
+            models.Index(fields=['product', 'criterion', 'value_amount']),
+        ]
+
+    def __str__(self):
+        return f"{self.competitor} - {self.product} - {self.criterion}"
+
+    @property
+    def avg_confidence(self) -> Optional[float]:
+        if not self.confidence_count:
+            return None
+        return self.confidence_sum / self.confidence_count
+
+    def apply(self, result):
+        """Учесть новый результат анализа"""
+        self.results_count += 1
+        if result.confidence_score is not None:
+            self.confidence_count += 1
+            self.confidence_sum += result.confidence_score
+        if self.first_analysis_at is None or result.analysis_at < self.first_analysis_at:
+            self.first_analysis_at = result.analysis_at
+
+        # Результат может прийти не по порядку - последним считается самый свежий
+        if self.analysis_at is not None and result.analysis_at < self.analysis_at:
+            return
+
+        if self.analysis_at is not None and result.value != self.value:
+            self.change_count += 1
+
+        self.latest_result_id = result.id
+        self.analysis_type = result.analysis_type
+        self.value = result.value
+        for column in VALUE_COLUMNS:
+            setattr(self, column, getattr(result, column))
+        self.source_url = result.source_url
+        self.confidence_score = result.confidence_score
+        self.llm_model = result.llm_model
+        self.llm_prompt_version = result.llm_prompt_version
+        self.parsed_at = result.parsed_at
+        self.analysis_at = result.analysis_at
+
+
+ROLLUP_FIELDS = [
+    'latest_result', 'analysis_type', 'value', *VALUE_COLUMNS, 'source_url', 'confidence_score',
+    'llm_model', 'llm_prompt_version', 'parsed_at', 'analysis_at',
+    'results_count', 'confidence_count', 'confidence_sum', 'change_count',
+    'first_analysis_at', 'updated_at',
+]
+
+
+def update_insights(results: Iterable) -> int:
+    """
+    Обновить свёртку сохранёнными результатами AIAnalysisResult.
+
+    Строки свёртки блокируются на время обновления, поэтому параллельные
+    воркеры не теряют обновления друг друга.
+
+    Returns:
+        Число обновлённых строк AIInsight
+    """
+    from django.utils import timezone
+
+    results = [r for r in results if r.analysis_type in INSIGHT_ANALYSIS_TYPES]
+    if not results:
+        return 0
+
+    keys = {(r.competitor, r.product, r.criterion) for r in results}
+
+    with transaction.atomic():
+        AIInsight.objects.bulk_create(
+            [AIInsight(competitor=c, product=p, criterion=k) for c, p, k in keys],
+            ignore_conflicts=True
+        )
+        insights = {
+            (insight.competitor, insight.product, insight.criterion): insight
+            for insight in AIInsight.objects.select_for_update().filter(
+                competitor__in={key[0] for key in keys},
+                product__in={key[1] for key in keys},
+                criterion__in={key[2] for key in keys},
+            )
+            if (insight.competitor, insight.product, insight.criterion) in keys
+        }
+
+        for result in sorted(results, key=lambda r: (r.analysis_at, r.id or 0)):
+            insights[(result.competitor, result.product, result.criterion)].apply(result)
+
+        now = timezone.now()
+        for insight in insights.values():
+            insight.updated_at = now
+        AIInsight.objects.bulk_update(insights.values(), ROLLUP_FIELDS, batch_size=ROLLUP_UPDATE_BATCH_SIZE)
+
+    return len(insights)
+
+
+def pending_recommendations():
+    """Факты без рекомендации или изменившиеся после неё"""
+    return AIInsight.objects.filter(value__isnull=False).filter(
+        Q(recommendation__isnull=True) | ~Q(recommended_change_count=F('change_count'))
+    )
@@ -0,0 +1,267 @@
+"""
+Асинхронный клиент для OpenAI-совместимых LLM API.
+
+Клиент долгоживущий: HTTP-пул соединений и event loop создаются один раз
+и переиспользуются между вызовами. Поддерживает:
+- ограничение числа одновременных запросов (max_in_flight)
+- token bucket для ограничения частоты запросов
+- повтор запросов при 429/5xx с учётом заголовка Retry-After
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMClientError(Exception):
+    """Ошибка запроса к LLM API"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """
+    Token bucket для ограничения частоты запросов.
+
+    rate - сколько токенов добавляется в секунду (0 - без ограничения),
+    capacity - максимальный размер всплеска.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = None
+
+    def pause(self, seconds: float):
+        """Приостановить выдачу токенов (например, после ответа 429)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        """Дождаться свободного токена"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                if self.rate <= 0:
+                    return
+
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает Retry-After: число секунд или HTTP-дата"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class AsyncLLMClient:
+    """
+    Долгоживущий клиент chat completions API.
+
+    Асинхронные методы (chat, chat_many) можно вызывать из своего event loop.
+    Для синхронного кода (Celery задачи, LLMService) есть run_many(): клиент
+    держит собственный event loop в фоновом потоке, поэтому пул соединений
+    переживает отдельные вызовы.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = None,
+        model: str = "gpt-3.5-turbo",
+        max_in_flight: int = 8,
+        rate_limit: float = 0,
+        burst: int = 1,
+        max_retries: int = 5,
+        timeout: float = 60,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30,
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.model = model
+        self.max_in_flight = max(max_in_flight, 1)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate_limit, burst)
+
+        self._http = None
+        self._semaphore = None
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.stats = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'errors': 0}
+
+    # ---- async API ----
+
+    def _ensure_http(self):
+        if self._http is None:
+            headers = {}
+            if self.api_key:
+                headers['Authorization'] = f'Bearer {self.api_key}'
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_in_flight,
+                    max_keepalive_connections=self.max_in_flight,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._http
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.backoff_base * (2 ** attempt), self.backoff_max)
+
+    async def chat(self, messages: List[Dict], **params) -> str:
+        """
+        Отправить запрос chat completions и вернуть текст ответа.
+
+        Raises:
+            LLMClientError: если запрос не удался после всех повторов
+        """
+        http = self._ensure_http()
+        payload = {'model': self.model, 'messages': messages, **params}
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire()
+                self.stats['requests'] += 1
+
+                try:
+                    response = await http.post('/chat/completions', json=payload)
+                except httpx.TransportError as e:
+                    if attempt >= self.max_retries:
+                        self.stats['errors'] += 1
+                        raise LLMClientError(f'Transport error: {e}') from e
+                    self.stats['retries'] += 1
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+
+                if response.status_code in RETRYABLE_STATUSES and attempt < self.max_retries:
+                    delay = parse_retry_after(response.headers.get('Retry-After'))
+                    if delay is None:
+                        delay = self._backoff(attempt)
+                    if response.status_code == 429:
+                        # Притормаживаем все запросы клиента, а не только этот
+                        self.stats['rate_limited'] += 1
+                        self.bucket.pause(delay)
+                    self.stats['retries'] += 1
+                    logger.debug(f'LLM API returned {response.status_code}, retry in {delay:.2f}s')
+                    await asyncio.sleep(delay)
+                    continue
+
+                if response.status_code >= 400:
+                    self.stats['errors'] += 1
+                    raise LLMClientError(
+                        f'LLM API error {response.status_code}: {response.text[:200]}',
+                        status_code=response.status_code
+                    )
+
+                data = response.json()
+                return data['choices'][0]['message']['content']
+
+    async def chat_many(self, requests: Iterable[Dict]) -> List:
+        """
+        Выполнить несколько запросов параллельно (в пределах max_in_flight).
+
+        Args:
+            requests: Словари с ключом 'messages' и доп. параметрами запроса
+
+        Returns:
+            Список ответов в порядке запросов; на месте неудачного запроса
+            находится объект исключения
+        """
+        return await asyncio.gather(
+            *(self.chat(**request) for request in requests),
+            return_exceptions=True
+        )
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # ---- sync API ----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='llm-client-loop',
+                    daemon=True
+                )
+                self._thread.start()
+        return self._loop
+
+    def run(self, coro):
+        """Выполнить корутину в event loop клиента и дождаться результата"""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def run_many(self, requests: Iterable[Dict]) -> List:
+        """Синхронная обёртка над chat_many()"""
+        return self.run(self.chat_many(list(requests)))
+
+    def healthy(self) -> bool:
+        """Event loop клиента жив (или ещё не запускался)"""
+        return self._thread is None or self._thread.is_alive()
+
+    def close(self):
+        """Закрыть пул соединений и остановить event loop"""
+        if self._loop is None:
+            return
+        self.run(self.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
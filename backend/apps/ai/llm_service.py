@@ -4,15 +4,29 @@ LLM Service для анализа данных банков с использо
 """
 
 from datetime import datetime
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional
 import logging
 import json
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from apps.ai.dedup import find_duplicate, fingerprint, remember_pages
+from apps.ai.extractors import EXTRACTOR_MODEL_NAME, extract
+from apps.ai.insights import AIInsight, pending_recommendations, update_insights
+from apps.ai.providers import BaseLLMProvider, get_provider
+from apps.ai.rules import RULES_MODEL_NAME, apply_rules
+from apps.ai.values import value_columns
 from apps.benchmark.models import Source, FeatureValue, Bank, Criterion, Snapshot, Product
 
 logger = logging.getLogger(__name__)
 
+# Поля записи анализа, которые хранятся в колонках AIAnalysisResult
+RECORD_COLUMNS = frozenset({
+    "competitor", "product", "criterion", "analysis_type", "value", "source_url",
+    "parsed_at", "llm_model", "llm_prompt_version", "confidence_score",
+})
+
 
 class AIAnalysisResult(models.Model):
     """Модель для хранения результатов AI анализа"""
@@ -28,6 +42,13 @@ class AIAnalysisResult(models.Model):
     criterion = models.CharField(max_length=200)
     analysis_type = models.CharField(max_length=20, choices=ANALYSIS_TYPES, default='facts')
     value = models.TextField(null=True, blank=True)
+    # Значение, разобранное при записи (apps/ai/values.py)
+    value_amount = models.FloatField(null=True, blank=True)
+    value_currency = models.CharField(max_length=3, blank=True)
+    value_percent = models.FloatField(null=True, blank=True)
+    value_period = models.CharField(max_length=10, blank=True)
+    value_min = models.FloatField(null=True, blank=True)
+    value_max = models.FloatField(null=True, blank=True)
     source_url = models.URLField(null=True, blank=True)
     parsed_at = models.DateTimeField()
     analysis_at = models.DateTimeField(auto_now_add=True)
@@ -38,8 +59,13 @@ class AIAnalysisResult(models.Model):
     
     class Meta:
         ordering = ['-analysis_at']
+        # Индексы под фильтры списка /api/ai/analysis/ и /api/ai/insights/
+        # с сортировкой (-analysis_at, -id) курсорной пагинации
         indexes = [
-            models.Index(fields=['competitor', 'product']),
+            models.Index(fields=['competitor', 'product', '-analysis_at', '-id']),
+            models.Index(fields=['product', 'criterion', '-analysis_at', '-id']),
+            models.Index(fields=['analysis_type', '-analysis_at', '-id']),
+            models.Index(fields=['-analysis_at', '-id']),
             models.Index(fields=['parsed_at']),
         ]
     
@@ -58,37 +84,208 @@ class LLMService:
     - Синхронизация с основной моделью данных
     """
     
-    def __init__(self, llm_model: str = "Qwen-14B", prompt_version: str = "v1"):
+    def __init__(
+        self,
+        llm_model: str = "Qwen-14B",
+        prompt_version: str = "v1",
+        provider: Optional[BaseLLMProvider] = None,
+        batch_size: Optional[int] = None
+    ):
         self.llm_model = llm_model
         self.prompt_version = prompt_version
-        self.llm_provider = self._init_llm_provider()
+        self.llm_provider = provider or self._init_llm_provider()
+        self.batch_size = max(batch_size or settings.AI_RESULTS_BATCH_SIZE, 1)
+        # pre_extracted - факты, извлечённые шаблонами без LLM
+        # pre_extracted_pages - страницы, по которым все критерии решены шаблонами
+        # unchanged - страницы, почти совпавшие с уже проанализированными (apps/ai/dedup.py)
+        self.stats = {
+            "pages": 0, "unchanged": 0, "pre_extracted": 0, "pre_extracted_pages": 0,
+            "llm_pages": 0, "llm_calls": 0,
+        }
     
-    def _init_llm_provider(self):
-        """Инициализация LLM провайдера (заглушка для демо)"""
-        # TODO: Подключить реальную LLM модель (Qwen, GPT, Claude и т.д.)
-        return None
+    def _init_llm_provider(self) -> BaseLLMProvider:
+        """Провайдер из реестра по настройке LLM_PROVIDER (общий для процесса)"""
+        return get_provider()
     
     def analyze_and_store(
         self,
-        pages: List[Dict],
+        pages: Iterable[Dict],
         bank_id: str = None,
         product_id: str = None,
-        time_override: Optional[datetime] = None
+        time_override: Optional[datetime] = None,
+        criteria: Optional[List[str]] = None
     ) -> List[Dict]:
         """
-        Анализируем список страниц и сохраняем результаты.
+        Анализируем страницы и сохраняем результаты.
         
         Args:
-            pages: Список объектов от PageTextParser
+            pages: Список или итератор объектов от PageTextParser
+                (например, PageTextParser.iter_pages())
             bank_id: ID банка (опционально)
             product_id: ID продукта (опционально)
             time_override: Переопределить время анализа
+            criteria: Критерии страницы для извлечения шаблонами
+                (по умолчанию - критерий страницы)
             
         Returns:
             Список результатов анализа
         """
-        results = []
+        return list(self.analyze_stream(
+            pages,
+            bank_id=bank_id,
+            product_id=product_id,
+            time_override=time_override,
+            criteria=criteria
+        ))
+    
+    def analyze_stream(
+        self,
+        pages: Iterable[Dict],
+        bank_id: str = None,
+        product_id: str = None,
+        time_override: Optional[datetime] = None,
+        criteria: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        """
+        Потоковый анализ: страницы забираются из итератора окнами,
+        результаты отдаются пачками сразу после сохранения в БД.
+        
+        Страница, почти совпадающая с уже проанализированной версией или
+        зеркалом (apps/ai/dedup.py), отдаётся с ключом 'unchanged' без
+        анализа. Остальные проходят быстрые шаблоны (apps/ai/extractors.py):
+        уверенный результат сохраняется как есть, в окно LLM попадают
+        только оставшиеся страницы (см. self.stats).
+        
+        С criteria шаблоны применяются к странице по каждому критерию,
+        у которого есть извлекатель; если решены не все критерии, страница
+        один раз уходит в LLM с критерием страницы (обычно 'general').
+        Без criteria - только по критерию из страницы.
+        
+        Размер окна определяется возможностями провайдера (батч или
+        число параллельных запросов). Текст страницы не попадает
+        в результат, поэтому после обработки окно может быть освобождено
+        сборщиком мусора.
+        
+        Yields:
+            Результат анализа страницы (или запись с ключом 'error')
+        """
+        # Результаты копятся и пишутся в БД пачками (AI_RESULTS_BATCH_SIZE)
+        buffer = []
+        window = []
+        window_size = self.llm_provider.window_size
+        
+        pages = self._valid_pages(pages)
         
+        for page in pages:
+            self.stats["pages"] += 1
+            # Почти не изменившиеся страницы и зеркала повторно не анализируются
+            if settings.AI_DEDUP_ENABLED:
+                fp = fingerprint(page["cleaned_text"])
+                duplicate = find_duplicate(page, fp)
+                if duplicate is not None:
+                    self.stats["unchanged"] += 1
+                    yield {
+                        "competitor": page.get("competitor"),
+                        "product": page.get("product"),
+                        "criterion": page.get("criterion"),
+                        "source_url": page.get("source_url"),
+                        "unchanged": True,
+                        "duplicate_of": duplicate.url,
+                        "result_id": duplicate.result_id,
+                    }
+                    continue
+                page = {**page, "fingerprint": fp}
+            
+            # Простые критерии извлекаются шаблонами, без вызова LLM
+            targets = criteria or [page.get("criterion")]
+            resolved = set()
+            for criterion in targets:
+                analysis = self._pre_extract(page, criterion)
+                if analysis is not None:
+                    self.stats["pre_extracted"] += 1
+                    resolved.add(criterion)
+                    yield from self._buffer_record(buffer, page, analysis, time_override)
+            
+            # Остальные критерии - один запрос к LLM по критерию страницы
+            if resolved.issuperset(targets):
+                self.stats["pre_extracted_pages"] += 1
+            else:
+                window.append(page)
+                if len(window) < window_size:
+                    continue
+                yield from self._analyze_into(buffer, window, time_override)
+                window = []
+            
+            if len(buffer) >= self.batch_size:
+                yield from self._flush(buffer)
+                buffer = []
+        
+        if window:
+            yield from self._analyze_into(buffer, window, time_override)
+        if buffer:
+            yield from self._flush(buffer)
+    
+    def _pre_extract(self, page: Dict, criterion: Optional[str]) -> Optional[Dict]:
+        """Факт по критерию из шаблонов apps/ai/extractors.py, если уверенность достаточна"""
+        if not settings.AI_PREEXTRACT_ENABLED:
+            return None
+        hit = extract(criterion, page["cleaned_text"])
+        if hit is None or hit["confidence"] < settings.AI_PREEXTRACT_MIN_CONFIDENCE:
+            return None
+        return {
+            "competitor": page.get("competitor"),
+            "product": page.get("product"),
+            "criterion": criterion,
+            "value": hit["value"],
+            "analysis_type": "facts",
+            "confidence_score": hit["confidence"],
+            "llm_model": EXTRACTOR_MODEL_NAME,
+            "extractor": hit["extractor"],
+        }
+    
+    def _analyze_into(
+        self,
+        buffer: List[Dict],
+        window: List[Dict],
+        time_override: Optional[datetime]
+    ) -> Iterator[Dict]:
+        """Анализ окна страниц через LLM, записи - в buffer, ошибки отдаются сразу"""
+        self.stats["llm_calls"] += 1
+        self.stats["llm_pages"] += len(window)
+        for page, analysis in zip(window, self._analyze_window(window)):
+            yield from self._buffer_record(buffer, page, analysis, time_override)
+    
+    def _buffer_record(
+        self,
+        buffer: List[Dict],
+        page: Dict,
+        analysis: Dict,
+        time_override: Optional[datetime]
+    ) -> Iterator[Dict]:
+        try:
+            buffer.append(self._build_record(page, analysis, time_override))
+        except Exception as e:
+            logger.error(f"Error analyzing page {page.get('source_url')}: {e}")
+            yield {
+                "source_url": page.get("source_url"),
+                "error": str(e)
+            }
+    
+    def _flush(self, records: List[Dict]) -> Iterator[Dict]:
+        """Сохраняем накопленные записи; при ошибке вся пачка отдаётся как ошибки"""
+        try:
+            self._store_records(records)
+        except Exception as e:
+            for record in records:
+                yield {
+                    "source_url": record.get("source_url"),
+                    "error": str(e)
+                }
+            return
+        yield from records
+    
+    def _valid_pages(self, pages: Iterable[Dict]) -> Iterator[Dict]:
+        """Отбрасываем страницы с ошибкой загрузки или без текста"""
         for page in pages:
             if 'error' in page:
                 logger.warning(f"Skipping page with error: {page['error']}")
@@ -98,42 +295,79 @@ class LLMService:
                 logger.warning(f"Skipping page without cleaned_text: {page.get('source_url')}")
                 continue
             
-            try:
-                # Проводим анализ текста
-                analysis = self._run_llm_analysis(
-                    text=page["cleaned_text"],
-                    competitor=page.get("competitor"),
-                    product=page.get("product"),
-                    criterion=page.get("criterion"),
-                )
-                
-                parsed_at = datetime.fromisoformat(
-                    page.get("parsed_at", datetime.utcnow().isoformat())
+            yield page
+    
+    def _analyze_window(self, pages: List[Dict]) -> List[Dict]:
+        """
+        Анализ окна страниц одним вызовом провайдера.
+        
+        Если провайдер не справился со страницей, для неё используется
+        mock анализ (с ключом 'fallback'; отпечаток страницы не сохраняется,
+        и в следующий раз она анализируется заново).
+        """
+        requests = [
+            self._build_request(
+                text=page["cleaned_text"],
+                competitor=page.get("competitor"),
+                product=page.get("product"),
+                criterion=page.get("criterion"),
+            )
+            for page in pages
+        ]
+        
+        try:
+            responses = self.llm_provider.complete_many(requests)
+        except Exception as e:
+            responses = [e] * len(requests)
+        
+        results = []
+        for page, response in zip(pages, responses):
+            competitor = page.get("competitor")
+            product = page.get("product")
+            criterion = page.get("criterion")
+            
+            if isinstance(response, Exception):
+                logger.warning(
+                    f"{self.llm_provider.name} analysis failed: {response}, falling back to mock"
                 )
-                time_value = time_override if time_override else parsed_at
-                
-                # Сохраняем результат в БД
-                record = {
-                    **analysis,
-                    "source_url": page.get("source_url"),
-                    "parsed_at": parsed_at,
-                    "time": time_value,
-                    "llm_model": self.llm_model,
-                    "llm_prompt_version": self.prompt_version
-                }
-                
-                self._insert_record(record)
-                results.append(record)
-                
-            except Exception as e:
-                logger.error(f"Error analyzing page {page.get('source_url')}: {e}")
                 results.append({
-                    "source_url": page.get("source_url"),
-                    "error": str(e)
+                    **self._analyze_with_mock(
+                        text=page["cleaned_text"],
+                        competitor=competitor,
+                        product=product,
+                        criterion=criterion
+                    ),
+                    "fallback": True,
                 })
-        
+            else:
+                results.append(self._parse_response(
+                    response, competitor, product, criterion, self.llm_provider.name
+                ))
         return results
     
+    def _build_record(
+        self,
+        page: Dict,
+        analysis: Dict,
+        time_override: Optional[datetime] = None
+    ) -> Dict:
+        """Собираем запись для сохранения в БД"""
+        parsed_at = datetime.fromisoformat(
+            page.get("parsed_at", datetime.utcnow().isoformat())
+        )
+        time_value = time_override if time_override else parsed_at
+        
+        return {
+            **analysis,
+            "source_url": page.get("source_url"),
+            "parsed_at": parsed_at,
+            "time": time_value,
+            "llm_model": analysis.get("llm_model", self.llm_model),
+            "llm_prompt_version": self.prompt_version,
+            # Отпечаток mock ответа вместо настоящего закрепил бы его как "unchanged"
+            "fingerprint": None if analysis.get("fallback") else page.get("fingerprint"),
+        }
+    
     def _run_llm_analysis(
         self,
         text: str,
@@ -142,58 +376,31 @@ class LLMService:
         criterion: str = None
     ) -> Dict:
         """
-        Запускаем LLM анализ текста.
-        
-        Поддерживает:
-        - OpenAI GPT (требует OPENAI_API_KEY в .env)
-        - Локальные mock данные (по умолчанию для демо)
+        Запускаем LLM анализ одного текста через настроенный провайдер.
         
-        Для использования OpenAI GPT:
-        1. pip install openai
-        2. Добавить в .env: OPENAI_API_KEY=sk-...
+        Провайдер выбирается настройкой LLM_PROVIDER (см. apps.ai.providers):
+        - openai: OpenAI-совместимый API (OpenAI, vLLM, llama.cpp)
+        - transformers: локальная модель
+        - mock: локальные mock данные
+        - auto (по умолчанию): openai при наличии OPENAI_API_KEY, иначе mock
         """
-        
-        # Попробуем использовать OpenAI если доступен
-        try:
-            import os
-            api_key = os.getenv('OPENAI_API_KEY')
-            
-            if api_key and api_key != 'your_key_here':
-                return self._analyze_with_openai(
-                    text=text,
-                    competitor=competitor,
-                    product=product,
-                    criterion=criterion,
-                    api_key=api_key
-                )
-        except ImportError:
-            logger.info("OpenAI not installed, using mock analysis")
-        except Exception as e:
-            logger.warning(f"OpenAI analysis failed: {e}, falling back to mock")
-        
-        # Fallback на mock анализ для демонстрации
-        return self._analyze_with_mock(
-            text=text,
-            competitor=competitor,
-            product=product,
-            criterion=criterion
-        )
+        page = {
+            "cleaned_text": text,
+            "competitor": competitor,
+            "product": product,
+            "criterion": criterion,
+        }
+        return self._analyze_window([page])[0]
     
-    def _analyze_with_openai(
+    def _build_request(
         self,
         text: str,
         competitor: str,
         product: str,
-        criterion: str,
-        api_key: str
+        criterion: str
     ) -> Dict:
-        """Анализ с использованием OpenAI GPT"""
-        try:
-            from openai import OpenAI
-            
-            client = OpenAI(api_key=api_key)
-            
-            prompt = f"""
+        """Запрос к провайдеру для извлечения фактов"""
+        prompt = f"""
             Проанализируй текст о банковском продукте и извлеки ключевую информацию.
             
             Конкурент: {competitor}
@@ -210,46 +417,51 @@ class LLMService:
                 "confidence": 0.0-1.0
             }}
             """
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ты эксперт по банковским продуктам"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=200
-            )
-            
-            # Парсим ответ
-            import json
-            response_text = response.choices[0].message.content
-            
-            try:
-                data = json.loads(response_text)
-                return {
-                    "competitor": competitor,
-                    "product": product,
-                    "criterion": criterion,
-                    "value": data.get("fact", response_text),
-                    "analysis_type": "facts",
-                    "confidence_score": data.get("confidence", 0.75),
-                    "llm_provider": "openai"
-                }
-            except json.JSONDecodeError:
-                return {
-                    "competitor": competitor,
-                    "product": product,
-                    "criterion": criterion,
-                    "value": response_text,
-                    "analysis_type": "facts",
-                    "confidence_score": 0.7,
-                    "llm_provider": "openai"
-                }
-                
-        except Exception as e:
-            logger.error(f"OpenAI analysis error: {e}")
-            raise
+        
+        return {
+            "messages": [
+                {"role": "system", "content": "Ты эксперт по банковским продуктам"},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 200,
+            "metadata": {
+                "competitor": competitor,
+                "product": product,
+                "criterion": criterion,
+            }
+        }
+    
+    def _parse_response(
+        self,
+        response_text: str,
+        competitor: str,
+        product: str,
+        criterion: str,
+        provider_name: str
+    ) -> Dict:
+        """Разбираем JSON ответ модели"""
+        try:
+            data = json.loads(response_text)
+            return {
+                "competitor": competitor,
+                "product": product,
+                "criterion": criterion,
+                "value": data.get("fact", response_text),
+                "analysis_type": "facts",
+                "confidence_score": data.get("confidence", 0.75),
+                "llm_provider": provider_name
+            }
+        except (json.JSONDecodeError, AttributeError):
+            return {
+                "competitor": competitor,
+                "product": product,
+                "criterion": criterion,
+                "value": response_text,
+                "analysis_type": "facts",
+                "confidence_score": 0.7,
+                "llm_provider": provider_name
+            }
     
     def _analyze_with_mock(
         self,
@@ -259,64 +471,212 @@ class LLMService:
         criterion: str
     ) -> Dict:
         """Mock анализ для демонстрации без API ключа"""
-        import random
-        
-        # Генерируем реалистичный mock-анализ
-        mock_facts = {
-            ("sber", "deposits"): [
-                "Процент на остаток составляет 3.5% годовых",
-                "Минимальная сумма вклада - 10 тысяч рублей",
-                "Возможность снятия без комиссии",
-            ],
-            ("vtb", "deposits"): [
-                "Ставка до 4.2% годовых",
-                "Минимум - 5 тысяч рублей",
-                "Автопродление вклада",
-            ],
-            ("alfa", "credits"): [
-                "Кредитная ставка от 7.9% годовых",
-                "Максимальный лимит - 5 млн рублей",
-                "Срок одобрения - до 5 минут",
-            ],
-        }
-        
-        key = (competitor, product)
-        facts = mock_facts.get(key, [
-            f"Анализ {competitor} по {product}: стандартные условия",
-            f"Предложение конкурентно по рынку",
-        ])
-        
-        return {
-            "competitor": competitor,
-            "product": product,
-            "criterion": criterion,
-            "value": random.choice(facts),
-            "analysis_type": "facts",
-            "confidence_score": random.uniform(0.6, 0.95),
-            "llm_provider": "mock"
-        }
+        request = self._build_request(text, competitor, product, criterion)
+        response_text = get_provider('mock').complete(request)
+        return self._parse_response(response_text, competitor, product, criterion, 'mock')
     
-    def _insert_record(self, record: Dict):
-        """Сохраняем результат анализа в БД"""
-        try:
-            analysis = AIAnalysisResult.objects.create(
+    def _store_records(self, records: List[Dict]) -> List[AIAnalysisResult]:
+        """
+        Сохраняем результаты анализа в БД одной транзакцией.
+        
+        Вставка идёт через bulk_create пачками по batch_size; в raw_response
+        попадает только то, чего нет в колонках модели. Числовые колонки
+        value_* заполняются разбором value.
+        """
+        objects = [
+            AIAnalysisResult(
                 competitor=record.get("competitor"),
                 product=record.get("product"),
                 criterion=record.get("criterion"),
                 analysis_type=record.get("analysis_type", "facts"),
                 value=record.get("value"),
+                **value_columns(record.get("value")),
                 source_url=record.get("source_url"),
-                parsed_at=record.get("parsed_at", datetime.utcnow()),
+                parsed_at=record.get("parsed_at") or datetime.utcnow(),
                 llm_model=record.get("llm_model", self.llm_model),
                 llm_prompt_version=record.get("llm_prompt_version", self.prompt_version),
                 confidence_score=record.get("confidence_score"),
-                raw_response=record
+                raw_response=self._raw_response(record)
             )
-            logger.info(f"Stored analysis result: {analysis.id}")
-            return analysis
+            for record in records
+        ]
+        try:
+            with transaction.atomic():
+                created = AIAnalysisResult.objects.bulk_create(objects, batch_size=self.batch_size)
+                update_insights(created)
+                remember_pages(records, created)
         except Exception as e:
-            logger.error(f"Error storing analysis result: {e}")
+            logger.error(f"Error storing {len(objects)} analysis results: {e}")
             raise
+        for record in records:
+            record.pop("fingerprint", None)
+        logger.info(f"Stored {len(created)} analysis results")
+        return created
+    
+    def _insert_record(self, record: Dict) -> AIAnalysisResult:
+        """Сохраняем один результат анализа в БД"""
+        return self._store_records([record])[0]
+    
+    @staticmethod
+    def _raw_response(record: Dict) -> Optional[Dict]:
+        """Поля записи, которые не хранятся в отдельных колонках"""
+        extra = {}
+        for key, value in record.items():
+            if key in RECORD_COLUMNS or key == "fingerprint":
+                continue
+            # time совпадает с parsed_at, если не было time_override
+            if key == "time" and value == record.get("parsed_at"):
+                continue
+            extra[key] = value.isoformat() if isinstance(value, datetime) else value
+        return extra or None
+    
+    def refresh_recommendations(self, limit: Optional[int] = None) -> Dict:
+        """
+        Сгенерировать рекомендации для новых и изменившихся фактов.
+        
+        Факты берутся из свёртки AIInsight (pending_recommendations), поэтому
+        стоимость зависит от числа изменений, а не от длины истории.
+        Факты, которые решаются правилами (apps/ai/rules.py), в LLM
+        не отправляются. Остальные запросы отдаются провайдеру окнами
+        window_size, результаты сохраняются пачками по batch_size.
+        
+        Args:
+            limit: Максимум фактов за вызов (None - все ожидающие)
+            
+        Returns:
+            Счётчики created / failed и rules / llm - чем построены рекомендации
+        """
+        created = failed = 0
+        by_rules = by_llm = 0
+        last_id = 0
+        
+        while limit is None or created + failed < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - created - failed)
+            insights = list(
+                pending_recommendations().filter(id__gt=last_id).order_by('id')[:size]
+            )
+            if not insights:
+                break
+            last_id = insights[-1].id
+            
+            done = []
+            objects = []
+            
+            # Сначала детерминированные правила, в LLM - только то, что они не решили
+            to_llm = []
+            for insight in insights:
+                decision = apply_rules(insight.value) if settings.AI_RECOMMENDATION_RULES else None
+                if decision is None:
+                    to_llm.append(insight)
+                    continue
+                done.append(insight)
+                objects.append(self._recommendation_result(
+                    insight, decision["recommendation"], decision["confidence"],
+                    llm_model=RULES_MODEL_NAME, extra={"rule": decision["rule"]}
+                ))
+            by_rules += len(done)
+            
+            requests = [self._build_recommendation_request(insight) for insight in to_llm]
+            responses = []
+            window = self.llm_provider.window_size
+            for start in range(0, len(requests), window):
+                try:
+                    responses.extend(self.llm_provider.complete_many(requests[start:start + window]))
+                except Exception as e:
+                    responses.extend([e] * len(requests[start:start + window]))
+            
+            for insight, response in zip(to_llm, responses):
+                if isinstance(response, Exception):
+                    logger.warning(f"Recommendation for {insight} failed: {response}")
+                    failed += 1
+                    continue
+                value, confidence = self._parse_recommendation(response)
+                done.append(insight)
+                objects.append(self._recommendation_result(
+                    insight, value, confidence,
+                    llm_model=self.llm_model, extra={"llm_provider": self.llm_provider.name}
+                ))
+                by_llm += 1
+            
+            with transaction.atomic():
+                stored = AIAnalysisResult.objects.bulk_create(objects, batch_size=self.batch_size)
+                for insight, recommendation in zip(done, stored):
+                    insight.recommendation = recommendation
+                    insight.recommended_change_count = insight.change_count
+                AIInsight.objects.bulk_update(
+                    done, ['recommendation', 'recommended_change_count'], batch_size=self.batch_size
+                )
+            created += len(stored)
+        
+        logger.info(
+            f"Recommendations refreshed: {created} created "
+            f"({by_rules} by rules, {by_llm} by LLM), {failed} failed"
+        )
+        return {"created": created, "failed": failed, "rules": by_rules, "llm": by_llm}
+    
+    def _recommendation_result(
+        self,
+        insight: AIInsight,
+        value: str,
+        confidence: Optional[float],
+        llm_model: str,
+        extra: Dict
+    ) -> AIAnalysisResult:
+        """Несохранённая запись рекомендации по факту"""
+        return AIAnalysisResult(
+            competitor=insight.competitor,
+            product=insight.product,
+            criterion=insight.criterion,
+            analysis_type="recommendation",
+            value=value,
+            source_url=insight.source_url,
+            parsed_at=insight.parsed_at or datetime.utcnow(),
+            llm_model=llm_model,
+            llm_prompt_version=self.prompt_version,
+            confidence_score=confidence,
+            raw_response={"fact_result_id": insight.latest_result_id, **extra}
+        )
+    
+    def _build_recommendation_request(self, insight: AIInsight) -> Dict:
+        """Запрос к провайдеру для рекомендации по факту"""
+        prompt = f"""
+            На основе факта о продукте конкурента дай короткую рекомендацию Сберу.
+            
+            Конкурент: {insight.competitor}
+            Продукт: {insight.product}
+            Критерий: {insight.criterion}
+            Факт: {insight.value}
+            
+            Ответь в формате JSON:
+            {{
+                "recommendation": "что стоит сделать",
+                "confidence": 0.0-1.0
+            }}
+            """
+        
+        return {
+            "messages": [
+                {"role": "system", "content": "Ты продуктовый аналитик банка"},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 200,
+            "metadata": {
+                "competitor": insight.competitor,
+                "product": insight.product,
+                "criterion": insight.criterion,
+                "task": "recommendation",
+            }
+        }
+    
+    @staticmethod
+    def _parse_recommendation(response_text: str):
+        """Текст рекомендации и уверенность из ответа модели"""
+        try:
+            data = json.loads(response_text)
+            return data.get("recommendation", response_text), data.get("confidence", 0.75)
+        except (json.JSONDecodeError, AttributeError):
+            return response_text, 0.7
     
     def get_recommendations(
         self,
@@ -325,7 +685,7 @@ class LLMService:
         limit: int = 5
     ) -> List[Dict]:
         """
-        Получить рекомендации на основе сохраненных анализов.
+        Получить актуальные рекомендации (по последним фактам).
         
         Args:
             bank_id: Фильтр по банку
@@ -335,17 +695,22 @@ class LLMService:
         Returns:
             Список рекомендаций
         """
-        queryset = AIAnalysisResult.objects.filter(
-            analysis_type='recommendation'
-        ).order_by('-analysis_at')[:limit]
+        queryset = AIInsight.objects.filter(recommendation__isnull=False)
+        if bank_id:
+            queryset = queryset.filter(competitor=bank_id)
+        if product_id:
+            queryset = queryset.filter(product=product_id)
+        queryset = queryset.select_related('recommendation').order_by(
+            '-recommendation__analysis_at'
+        )[:limit]
         
         return [
             {
-                "competitor": r.competitor,
-                "product": r.product,
-                "criterion": r.criterion,
-                "recommendation": r.value,
-                "confidence": r.confidence_score,
+                "competitor": insight.competitor,
+                "product": insight.product,
+                "criterion": insight.criterion,
+                "recommendation": insight.recommendation.value,
+                "confidence": insight.recommendation.confidence_score,
             }
-            for r in queryset
+            for insight in queryset
         ]
@@ -0,0 +1,105 @@
+"""
+Management command для замера пропускной способности LLM клиента
+против локального mock OpenAI-совместимого сервера.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.ai.llm_client import AsyncLLMClient
+from apps.ai.mock_llm_server import MockLLMServer
+from apps.ai.providers import get_provider
+
+
+class Command(BaseCommand):
+    help = 'Benchmark AsyncLLMClient or a registered LLM provider throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на каждый прогон')
+        parser.add_argument('--latency', type=float, default=0.05, help='Задержка mock сервера, сек')
+        parser.add_argument(
+            '--concurrency',
+            default='1,4,16,32',
+            help='Значения max_in_flight через запятую'
+        )
+        parser.add_argument('--rate-limit', type=float, default=0, help='Лимит клиента, запросов/сек')
+        parser.add_argument('--rate-limited', type=float, default=0.0, help='Доля ответов 429 от сервера')
+        parser.add_argument('--base-url', default='', help='Использовать внешний сервер вместо mock')
+        parser.add_argument(
+            '--provider',
+            default='',
+            help='Замерить провайдер из реестра (openai, transformers, mock) с текущими настройками'
+        )
+
+    def handle(self, *args, **options):
+        if options['provider']:
+            self._bench_provider(options['provider'], options['requests'])
+            return
+
+        server = None
+        base_url = options['base_url']
+        if not base_url:
+            server = MockLLMServer(
+                latency=options['latency'],
+                rate_limit_rate=options['rate_limited'],
+            ).start()
+            base_url = server.base_url
+
+        self.stdout.write(f'Target: {base_url}, requests per run: {options["requests"]}')
+        self.stdout.write(f'{"in_flight":>10} {"seconds":>10} {"req/s":>10} {"retries":>8} {"errors":>7}')
+
+        request = {
+            'messages': [{'role': 'user', 'content': 'Ставка по вкладу?'}],
+            'max_tokens': 50,
+        }
+
+        try:
+            for concurrency in [int(c) for c in options['concurrency'].split(',') if c.strip()]:
+                client = AsyncLLMClient(
+                    base_url=base_url,
+                    api_key='mock',
+                    max_in_flight=concurrency,
+                    rate_limit=options['rate_limit'],
+                    burst=concurrency,
+                )
+                try:
+                    started = time.perf_counter()
+                    responses = client.run_many([request] * options['requests'])
+                    elapsed = time.perf_counter() - started
+                finally:
+                    client.close()
+
+                errors = sum(1 for r in responses if isinstance(r, Exception))
+                self.stdout.write(
+                    f'{concurrency:>10} {elapsed:>10.2f} {options["requests"] / elapsed:>10.1f} '
+                    f'{client.stats["retries"]:>8} {errors:>7}'
+                )
+        finally:
+            if server:
+                server.stop()
+
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark completed'))
+
+    def _bench_provider(self, name: str, total: int):
+        """Пропускная способность провайдера окнами его размера"""
+        provider = get_provider(name)
+        request = {
+            'messages': [{'role': 'user', 'content': 'Ставка по вкладу?'}],
+            'max_tokens': 50,
+        }
+
+        self.stdout.write(
+            f'Provider: {provider.name}, window: {provider.window_size}, '
+            f'batching: {provider.supports_batching}, concurrency: {provider.max_concurrency}'
+        )
+
+        errors = 0
+        started = time.perf_counter()
+        for start in range(0, total, provider.window_size):
+            batch = [request] * min(provider.window_size, total - start)
+            errors += sum(1 for r in provider.complete_many(batch) if isinstance(r, Exception))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'{total} requests in {elapsed:.2f}s: {total / elapsed:.1f} req/s, errors: {errors}')
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark completed'))
@@ -0,0 +1,46 @@
+"""
+Management command для полной пересборки свёртки AI insights
+по истории AIAnalysisResult (например, после первой миграции).
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.ai.insights import AIInsight, INSIGHT_ANALYSIS_TYPES, update_insights
+from apps.ai.llm_service import AIAnalysisResult
+
+
+class Command(BaseCommand):
+    help = 'Rebuild AIInsight rollups from the AIAnalysisResult history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Результатов за один проход')
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        queryset = AIAnalysisResult.objects.filter(
+            analysis_type__in=INSIGHT_ANALYSIS_TYPES
+        ).defer('raw_response').order_by('analysis_at', 'id')
+
+        with transaction.atomic():
+            AIInsight.objects.all().delete()
+
+            processed = 0
+            last = None
+            while True:
+                chunk = queryset
+                if last is not None:
+                    # Keyset по (analysis_at, id) - без OFFSET на длинной истории
+                    chunk = chunk.filter(analysis_at__gte=last[0]).exclude(
+                        analysis_at=last[0], id__lte=last[1]
+                    )
+                results = list(chunk[:chunk_size])
+                if not results:
+                    break
+                update_insights(results)
+                processed += len(results)
+                last = (results[-1].analysis_at, results[-1].id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} results, {AIInsight.objects.count()} insights'
+        ))
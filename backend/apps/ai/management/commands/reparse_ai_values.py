@@ -0,0 +1,51 @@
+"""
+Management command для повторного разбора value в колонки value_*
+(после изменения правил разбора в apps/ai/values.py).
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.ai.insights import AIInsight
+from apps.ai.llm_service import AIAnalysisResult
+from apps.ai.values import VALUE_COLUMNS, value_columns
+
+
+class Command(BaseCommand):
+    help = 'Re-parse AIAnalysisResult values into the typed value_* columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Записей за один bulk_update')
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        results = AIAnalysisResult.objects.exclude(
+            analysis_type='recommendation'
+        ).only('id', 'value', *VALUE_COLUMNS)
+
+        updated = 0
+        batch = []
+        for result in results.iterator(chunk_size=chunk_size):
+            columns = value_columns(result.value)
+            if all(getattr(result, column) == value for column, value in columns.items()):
+                continue
+            for column, value in columns.items():
+                setattr(result, column, value)
+            batch.append(result)
+            if len(batch) >= chunk_size:
+                AIAnalysisResult.objects.bulk_update(batch, VALUE_COLUMNS)
+                updated += len(batch)
+                batch = []
+        if batch:
+            AIAnalysisResult.objects.bulk_update(batch, VALUE_COLUMNS)
+            updated += len(batch)
+
+        insights = []
+        for insight in AIInsight.objects.filter(latest_result__isnull=False).select_related('latest_result'):
+            for column in VALUE_COLUMNS:
+                setattr(insight, column, getattr(insight.latest_result, column))
+            insights.append(insight)
+        AIInsight.objects.bulk_update(insights, VALUE_COLUMNS, batch_size=chunk_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-parsed {updated} results, refreshed {len(insights)} insights'
+        ))
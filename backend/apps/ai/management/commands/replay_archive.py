@@ -0,0 +1,119 @@
+"""
+Management command для повторного разбора страниц из архива HTML
+(apps/ai/archive.py) без сети: переиграть запуск парсера улучшенным
+PageTextParser и замерить скорость.
+
+С --export страницы выгружаются в каталог корпуса офлайн-режима
+(apps/parsers/replay.py): index.jsonl и файлы страниц по sha256.
+"""
+
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from apps.ai.archive import ArchivedPage, PageArchive, ReplaySession
+from apps.ai.corpus import stored_pages
+from apps.ai.text_parser import PageTextParser
+from apps.parsers.replay import MANIFEST_NAME
+
+
+class Command(BaseCommand):
+    help = 'Replay an archived parser run through PageTextParser without network access'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run', default='', help='run_id запуска (id задачи analyze_with_llm)')
+        parser.add_argument('--at', default='', help='Последние версии страниц на момент (ISO дата-время)')
+        parser.add_argument('--competitor', default='', help='Только страницы конкурента')
+        parser.add_argument('--product', default='', help='Только страницы продукта')
+        parser.add_argument('--window', type=int, default=1, help='Окно параллельного разбора')
+        parser.add_argument('--repeat', type=int, default=1, help='Повторить прогон N раз (бенчмарк)')
+        parser.add_argument(
+            '--store-corpus',
+            action='store_true',
+            help='Сохранить переразобранный текст в корпус (apps/ai/corpus.py)'
+        )
+        parser.add_argument('--export', default='', help='Выгрузить страницы в каталог корпуса офлайн-режима')
+
+    def handle(self, *args, **options):
+        at = None
+        if options['at']:
+            at = parse_datetime(options['at'])
+            if at is None:
+                raise CommandError(f'Invalid --at: {options["at"]}')
+        if not options['run'] and at is None and not ArchivedPage.objects.exists():
+            raise CommandError('Archive is empty')
+
+        with PageArchive() as archive:
+            session = ReplaySession(
+                archive,
+                run_id=options['run'] or None,
+                at=at,
+                competitor=options['competitor'] or None,
+                product=options['product'] or None,
+            )
+            if not session.index:
+                raise CommandError('No archived pages match the filters')
+            if options['export']:
+                self._export(archive, session.index, Path(options['export']))
+                return
+
+            # Страницы одного запуска могут относиться к разным банкам/продуктам
+            groups = {}
+            for url, page in session.index.items():
+                groups.setdefault((page.competitor, page.product), []).append(url)
+
+            self.stdout.write(f'Pages: {len(session.index)}, groups: {len(groups)}, window: {options["window"]}')
+            self.stdout.write(f'{"run":>4} {"seconds":>9} {"pages/s":>9} {"MB/s":>8} {"errors":>7}')
+
+            for run in range(1, max(options['repeat'], 1) + 1):
+                pages = errors = raw_bytes = 0
+                started = time.perf_counter()
+                for (competitor, product), urls in groups.items():
+                    parser = PageTextParser(
+                        competitor=competitor,
+                        product=product,
+                        criterion='general',
+                        urls=urls,
+                        session=session,
+                    )
+                    parsed = parser.iter_pages(window=options['window'])
+                    if options['store_corpus']:
+                        parsed = stored_pages(parsed)
+                    for page in parsed:
+                        pages += 1
+                        if 'error' in page:
+                            errors += 1
+                        else:
+                            raw_bytes += session.index[page['source_url']].blob.size
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{run:>4} {elapsed:>9.3f} {pages / elapsed:>9.1f} '
+                    f'{raw_bytes / elapsed / 1e6:>8.1f} {errors:>7}'
+                )
+
+        self.stdout.write(self.style.SUCCESS('Replay finished'))
+
+    def _export(self, archive, index, root: Path):
+        """Каталог корпуса: одинаковое содержимое - один файл"""
+        pages_dir = root / 'pages'
+        pages_dir.mkdir(parents=True, exist_ok=True)
+        files = 0
+        with open(root / MANIFEST_NAME, 'w', encoding='utf-8') as manifest:
+            for url, page in index.items():
+                path = pages_dir / f'{page.blob.digest}.html'
+                if not path.exists():
+                    path.write_bytes(archive.read(page.blob))
+                    files += 1
+                manifest.write(json.dumps({
+                    'url': url,
+                    'file': f'pages/{path.name}',
+                    'competitor': page.competitor,
+                    'product': page.product,
+                    'status_code': page.status_code,
+                    'encoding': page.encoding,
+                    'fetched_at': page.fetched_at.isoformat(),
+                }, ensure_ascii=False) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Exported {len(index)} pages ({files} files) to {root}'))
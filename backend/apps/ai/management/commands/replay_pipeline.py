@@ -0,0 +1,143 @@
+"""
+Management command для нагрузочного прогона конвейера в офлайн-режиме
+(apps/parsers/replay.py): parse_product_data и analyze_with_llm по
+записанным страницам с задержкой и ошибками загрузки и mock LLM.
+
+Задачи выполняются в процессе (task.apply) потоками --workers, что
+примерно соответствует воркеру Celery с пулом threads той же ширины.
+"""
+
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from apps.parsers import replay
+from apps.tasks import resources
+from apps.tasks.celery_tasks import analyze_with_llm, parse_product_data
+
+
+class Command(BaseCommand):
+    help = 'Run parse_product_data and analyze_with_llm against recorded pages without network access'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', required=True, help="Каталог корпуса (index.jsonl) или 'archive'")
+        parser.add_argument('--run', default='', help='run_id в архиве (с --source archive)')
+        parser.add_argument('--workers', type=int, default=4, help='Параллельных задач')
+        parser.add_argument('--repeat', type=int, default=1, help='Сколько раз прогнать набор задач')
+        parser.add_argument('--latency', type=float, default=0.0, help='Задержка загрузки страницы, сек')
+        parser.add_argument(
+            '--distribution',
+            default='lognormal',
+            choices=['fixed', 'uniform', 'exponential', 'lognormal'],
+            help='Распределение задержки загрузки'
+        )
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Доля загрузок с ошибкой')
+        parser.add_argument('--errors', default='timeout:0.4,503:0.4,429:0.2', help='Виды ошибок с весами')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--llm-latency', type=float, default=0.0, help='Задержка вызова mock LLM, сек')
+        parser.add_argument('--llm-latency-per-request', type=float, default=0.0, help='Задержка на запрос батча, сек')
+        parser.add_argument('--batch-size', type=int, default=None, help='AI_RESULTS_BATCH_SIZE')
+        parser.add_argument('--skip-parse', action='store_true', help='Только analyze_with_llm')
+        parser.add_argument('--skip-analyze', action='store_true', help='Только parse_product_data')
+
+    def handle(self, *args, **options):
+        overrides = {
+            'PARSER_REPLAY_SOURCE': options['source'],
+            'PARSER_REPLAY_RUN': options['run'],
+            'PARSER_REPLAY_LATENCY': options['latency'],
+            'PARSER_REPLAY_LATENCY_DISTRIBUTION': options['distribution'],
+            'PARSER_REPLAY_ERROR_RATE': options['error_rate'],
+            'PARSER_REPLAY_ERRORS': options['errors'],
+            'PARSER_REPLAY_SEED': options['seed'],
+            'LLM_PROVIDER': 'mock',
+            'LLM_MOCK_LATENCY': options['llm_latency'],
+            'LLM_MOCK_LATENCY_PER_REQUEST': options['llm_latency_per_request'],
+            'PARSER_RUN_RETRY_DELAY': 0,
+        }
+        if options['batch_size']:
+            overrides['AI_RESULTS_BATCH_SIZE'] = options['batch_size']
+
+        with override_settings(**overrides):
+            # Пулы ресурсов создаются заново уже с настройками офлайн-режима
+            resources.shutdown_worker_resources()
+            try:
+                self._run(options)
+            finally:
+                resources.shutdown_worker_resources()
+
+    def _run(self, options):
+        try:
+            source = replay.open_source()
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+        groups = sorted({
+            (entry.get('competitor') or '', entry.get('product') or '')
+            for entry in source.pages.values()
+        })
+        source.close()
+        if not groups:
+            raise CommandError('Replay source is empty')
+
+        jobs = []
+        for _ in range(max(options['repeat'], 1)):
+            if not options['skip_parse']:
+                jobs.extend(('parse', product) for product in sorted({product for _, product in groups}))
+            if not options['skip_analyze']:
+                jobs.extend(('analyze', group) for group in groups)
+
+        self.stdout.write(
+            f'Pages: {len(source.pages)}, bank/product groups: {len(groups)}, '
+            f'tasks: {len(jobs)}, workers: {options["workers"]}'
+        )
+
+        if connection.vendor == 'sqlite' and options['workers'] > 1:
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes writes: parallel tasks may fail with "database is locked", '
+                'use PostgreSQL to measure worker scaling'
+            ))
+
+        replay.reset_stats()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            results = list(executor.map(self._execute, jobs))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'{"task":<10} {"count":>6} {"errors":>7} {"p50, s":>8} {"p95, s":>8} {"max, s":>8}')
+        for kind in ('parse', 'analyze'):
+            timings = [seconds for job_kind, seconds, _ in results if job_kind == kind]
+            if not timings:
+                continue
+            failed = sum(1 for job_kind, _, ok in results if job_kind == kind and not ok)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'{kind:<10} {len(timings):>6} {failed:>7} {statistics.median(timings):>8.3f} '
+                f'{p95:>8.3f} {timings[-1]:>8.3f}'
+            )
+
+        stats = replay.stats
+        self.stdout.write(
+            f'Wall time: {elapsed:.2f}s, {len(jobs) / elapsed:.1f} tasks/s; '
+            f'fetches: {stats["requests"]}, injected errors: {stats["errors"]}, '
+            f'missing: {stats["missing"]}'
+        )
+
+    def _execute(self, job):
+        kind, target = job
+        started = time.perf_counter()
+        try:
+            if kind == 'parse':
+                result = parse_product_data.apply(kwargs={'product_id': target, 'parser_type': 'replay'}).result
+            else:
+                result = analyze_with_llm.apply(args=target).result
+            ok = isinstance(result, dict) and result.get('status') in ('success', 'warning')
+        except Exception as e:
+            self.stderr.write(f'{kind} {target}: {e}')
+            ok = False
+        finally:
+            connection.close()
+        return kind, time.perf_counter() - started, ok
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_rename_ai_analysis_result_competitor_product_idx_ai_aianalys_competi_68d43d_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='aianalysisresult',
+            name='ai_aianalys_competi_68d43d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='aianalysisresult',
+            index=models.Index(fields=['competitor', 'product', '-analysis_at', '-id'], name='ai_aianalys_competi_9c8c03_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aianalysisresult',
+            index=models.Index(fields=['product', 'criterion', '-analysis_at', '-id'], name='ai_aianalys_product_e01073_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aianalysisresult',
+            index=models.Index(fields=['analysis_type', '-analysis_at', '-id'], name='ai_aianalys_analysi_548b1a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aianalysisresult',
+            index=models.Index(fields=['-analysis_at', '-id'], name='ai_aianalys_analysi_5866d6_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_insights(apps, schema_editor):
+    """Начальное заполнение свёртки по существующей истории"""
+    AIAnalysisResult = apps.get_model('ai', 'AIAnalysisResult')
+    AIInsight = apps.get_model('ai', 'AIInsight')
+
+    insights = {}
+    results = AIAnalysisResult.objects.filter(
+        analysis_type__in=('facts', 'comparison')
+    ).defer('raw_response').order_by('analysis_at', 'id')
+    for result in results.iterator(chunk_size=2000):
+        key = (result.competitor, result.product, result.criterion)
+        insight = insights.get(key)
+        if insight is None:
+            insight = insights[key] = AIInsight(
+                competitor=result.competitor,
+                product=result.product,
+                criterion=result.criterion,
+                first_analysis_at=result.analysis_at,
+            )
+        elif result.value != insight.value:
+            insight.change_count += 1
+
+        insight.results_count += 1
+        if result.confidence_score is not None:
+            insight.confidence_count += 1
+            insight.confidence_sum += result.confidence_score
+        insight.latest_result_id = result.id
+        insight.analysis_type = result.analysis_type
+        insight.value = result.value
+        insight.source_url = result.source_url
+        insight.confidence_score = result.confidence_score
+        insight.llm_model = result.llm_model
+        insight.llm_prompt_version = result.llm_prompt_version
+        insight.parsed_at = result.parsed_at
+        insight.analysis_at = result.analysis_at
+
+    AIInsight.objects.bulk_create(insights.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0003_analysis_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('competitor', models.CharField(max_length=200)),
+                ('product', models.CharField(max_length=200)),
+                ('criterion', models.CharField(max_length=200)),
+                ('analysis_type', models.CharField(blank=True, max_length=20)),
+                ('value', models.TextField(blank=True, null=True)),
+                ('source_url', models.URLField(blank=True, null=True)),
+                ('confidence_score', models.FloatField(blank=True, null=True)),
+                ('llm_model', models.CharField(blank=True, max_length=100)),
+                ('llm_prompt_version', models.CharField(blank=True, max_length=50)),
+                ('parsed_at', models.DateTimeField(blank=True, null=True)),
+                ('analysis_at', models.DateTimeField(blank=True, null=True)),
+                ('results_count', models.PositiveIntegerField(default=0)),
+                ('confidence_count', models.PositiveIntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0)),
+                ('change_count', models.PositiveIntegerField(default=0, help_text='Сколько раз менялось значение')),
+                ('first_analysis_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('latest_result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ai.aianalysisresult')),
+            ],
+            options={
+                'ordering': ['-analysis_at'],
+                'indexes': [models.Index(fields=['product', 'criterion', '-analysis_at'], name='ai_aiinsigh_product_e4f3a4_idx'), models.Index(fields=['product', '-analysis_at'], name='ai_aiinsigh_product_29fbe4_idx')],
+                'unique_together': {('competitor', 'product', 'criterion')},
+            },
+        ),
+        migrations.RunPython(build_insights, migrations.RunPython.noop),
+    ]
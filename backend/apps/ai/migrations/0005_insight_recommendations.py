@@ -0,0 +1,24 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_ai_insights'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiinsight',
+            name='recommendation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ai.aianalysisresult'),
+        ),
+        migrations.AddField(
+            model_name='aiinsight',
+            name='recommended_change_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,223 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:37
+
+import re
+
+from django.db import migrations, models
+
+# Копия разбора apps/ai/values.py на момент миграции: дальнейшие правки
+# парсера не должны менять результат этой миграции
+VALUE_COLUMNS = (
+    'value_amount', 'value_currency', 'value_percent', 'value_period', 'value_min', 'value_max',
+)
+
+_NUMBER = r'(\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+)(?:[.,](\d+))?'
+_MULTIPLIER = r'(?:\s*(тыс\.?|тысяч[аи]?|млн\.?|миллион(?:а|ов)?|млрд\.?))?'
+_CURRENCY = r'(₽|руб(?:\.|лей|ля|ль)?|р\.|\$|usd|долл\w*|€|eur|евро)'
+_RANGE_SEP = r'\s*(?:до|-|–|—)\s*'
+
+_PERCENT_RE = re.compile(_NUMBER + r'\s*%')
+_AMOUNT_RE = re.compile(_NUMBER + _MULTIPLIER + r'\s*' + _CURRENCY, re.IGNORECASE)
+_PERCENT_RANGE_RE = re.compile(_NUMBER + r'\s*%?' + _RANGE_SEP + _NUMBER + r'\s*%', re.IGNORECASE)
+_AMOUNT_RANGE_RE = re.compile(
+    _NUMBER + _MULTIPLIER + r'\s*(?:' + _CURRENCY + r')?' + _RANGE_SEP + _NUMBER + _MULTIPLIER + r'\s*' + _CURRENCY,
+    re.IGNORECASE
+)
+_FREE_RE = re.compile(r'бесплатн|без\s+(?:комисси|платы|абонентской)', re.IGNORECASE)
+
+_MULTIPLIERS = {'тыс': 1_000, 'млн': 1_000_000, 'мил': 1_000_000, 'млрд': 1_000_000_000}
+_CURRENCIES = {'₽': 'RUB', 'руб': 'RUB', 'р.': 'RUB', '$': 'USD', 'usd': 'USD', 'дол': 'USD',
+               '€': 'EUR', 'eur': 'EUR', 'евр': 'EUR'}
+
+_PERIODS = [
+    ('year', re.compile(r'/\s*год|в\s+год|годов(?:ых|ая|ое)|ежегодн|за\s+год', re.IGNORECASE)),
+    ('month', re.compile(r'/\s*мес|в\s+месяц|ежемесячн|за\s+месяц', re.IGNORECASE)),
+    ('day', re.compile(r'/\s*день|в\s+день|ежедневн|за\s+день', re.IGNORECASE)),
+]
+
+_MIN_RE = re.compile(r'\bот\s*$', re.IGNORECASE)
+_MAX_RE = re.compile(r'\bдо\s*$', re.IGNORECASE)
+
+
+def _to_number(integer, fraction):
+    number = float(re.sub(r'[ \u00a0\u202f]', '', integer))
+    if fraction:
+        number += float('0.' + fraction)
+    return number
+
+
+def _amount(integer, fraction, multiplier):
+    amount = _to_number(integer, fraction)
+    if multiplier:
+        amount *= _MULTIPLIERS[multiplier.lower()[:3]]
+    return amount
+
+
+def _currency(token):
+    if not token:
+        return None
+    token = token.lower()
+    return _CURRENCIES.get(token[:3]) or _CURRENCIES.get(token)
+
+
+def _bounds(value, match, number):
+    prefix = value[:match.start()]
+    if _MIN_RE.search(prefix):
+        return number, None
+    if _MAX_RE.search(prefix):
+        return None, number
+    return number, number
+
+
+def value_columns(value):
+    """Колонки value_* по тексту факта (см. apps.ai.values.value_columns)"""
+    amount = currency = percent = period = None
+    amount_bounds = percent_bounds = None
+
+    if value:
+        match = _AMOUNT_RANGE_RE.search(value)
+        if match:
+            low_int, low_frac, low_mult, low_cur, high_int, high_frac, high_mult, high_cur = match.groups()
+            low = _amount(low_int, low_frac, low_mult or high_mult)
+            high = _amount(high_int, high_frac, high_mult)
+            amount, currency = low, _currency(high_cur or low_cur)
+            amount_bounds = (low, high)
+        else:
+            match = _AMOUNT_RE.search(value)
+            if match:
+                integer, fraction, multiplier, token = match.groups()
+                amount, currency = _amount(integer, fraction, multiplier), _currency(token)
+                amount_bounds = _bounds(value, match, amount)
+            elif _FREE_RE.search(value):
+                amount, currency = 0.0, 'RUB'
+                amount_bounds = (0.0, 0.0)
+
+        match = _PERCENT_RANGE_RE.search(value)
+        if match:
+            low = _to_number(*match.groups()[:2])
+            high = _to_number(*match.groups()[2:])
+            percent = low
+            percent_bounds = (low, high)
+        else:
+            match = _PERCENT_RE.search(value)
+            if match:
+                percent = _to_number(*match.groups())
+                percent_bounds = _bounds(value, match, percent)
+
+        for name, pattern in _PERIODS:
+            if pattern.search(value):
+                period = name
+                break
+
+    low, high = percent_bounds or amount_bounds or (None, None)
+    return {
+        'value_amount': amount,
+        'value_currency': currency or '',
+        'value_percent': percent,
+        'value_period': period or '',
+        'value_min': low,
+        'value_max': high,
+    }
+
+
+def parse_existing_values(apps, schema_editor):
+    """Разбор value уже сохранённых фактов и копия в свёртку"""
+    AIAnalysisResult = apps.get_model('ai', 'AIAnalysisResult')
+    AIInsight = apps.get_model('ai', 'AIInsight')
+
+    results = AIAnalysisResult.objects.exclude(analysis_type='recommendation').only('id', 'value')
+    batch = []
+    for result in results.iterator(chunk_size=2000):
+        for column, value in value_columns(result.value).items():
+            setattr(result, column, value)
+        batch.append(result)
+        if len(batch) >= 2000:
+            AIAnalysisResult.objects.bulk_update(batch, VALUE_COLUMNS)
+            batch = []
+    if batch:
+        AIAnalysisResult.objects.bulk_update(batch, VALUE_COLUMNS)
+
+    insights = []
+    for insight in AIInsight.objects.filter(latest_result__isnull=False).select_related('latest_result'):
+        for column in VALUE_COLUMNS:
+            setattr(insight, column, getattr(insight.latest_result, column))
+        insights.append(insight)
+    AIInsight.objects.bulk_update(insights, VALUE_COLUMNS, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0005_insight_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aianalysisresult',
+            name='value_amount',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aianalysisresult',
+            name='value_currency',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='aianalysisresult',
+            name='value_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aianalysisresult',
+            name='value_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aianalysisresult',
+            name='value_percent',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aianalysisresult',
+            name='value_period',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='aiinsight',
+            name='value_amount',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aiinsight',
+            name='value_currency',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='aiinsight',
+            name='value_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aiinsight',
+            name='value_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aiinsight',
+            name='value_percent',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aiinsight',
+            name='value_period',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='aiinsight',
+            index=models.Index(fields=['product', 'criterion', 'value_percent'], name='ai_aiinsigh_product_e06f50_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiinsight',
+            index=models.Index(fields=['product', 'criterion', 'value_amount'], name='ai_aiinsigh_product_750f99_idx'),
+        ),
+        migrations.RunPython(parse_existing_values, migrations.RunPython.noop),
+    ]
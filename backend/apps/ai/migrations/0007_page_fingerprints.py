@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0006_typed_values'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('competitor', models.CharField(max_length=200)),
+                ('product', models.CharField(max_length=200)),
+                ('criterion', models.CharField(max_length=200)),
+                ('simhash', models.BigIntegerField()),
+                ('values_hash', models.CharField(help_text='Хеш чисел с единицами из текста', max_length=16)),
+                ('band_0', models.PositiveIntegerField()),
+                ('band_1', models.PositiveIntegerField()),
+                ('band_2', models.PositiveIntegerField()),
+                ('band_3', models.PositiveIntegerField()),
+                ('analyzed_at', models.DateTimeField()),
+                ('cluster', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ai.pagefingerprint')),
+                ('result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ai.aianalysisresult')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band_0'], name='ai_pagefing_band_0_528867_idx'), models.Index(fields=['band_1'], name='ai_pagefing_band_1_e0b766_idx'), models.Index(fields=['band_2'], name='ai_pagefing_band_2_2b104b_idx'), models.Index(fields=['band_3'], name='ai_pagefing_band_3_02897c_idx')],
+                'unique_together': {('url', 'competitor', 'product', 'criterion')},
+            },
+        ),
+    ]
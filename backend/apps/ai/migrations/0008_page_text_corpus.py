@@ -0,0 +1,58 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:43
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    """Полнотекстовый индекс корпуса (см. apps/ai/corpus.py)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE ai_pagetext_fts USING fts5("
+            "text, content='', tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE ai_pagetext_search ('
+            'page_id bigint PRIMARY KEY REFERENCES ai_pagetext(id) ON DELETE CASCADE, '
+            'vector tsvector NOT NULL)'
+        )
+        schema_editor.execute('CREATE INDEX ai_pagetext_search_vector ON ai_pagetext_search USING GIN (vector)')
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS ai_pagetext_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP TABLE IF EXISTS ai_pagetext_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0007_page_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('competitor', models.CharField(blank=True, max_length=200)),
+                ('product', models.CharField(blank=True, max_length=200)),
+                ('criterion', models.CharField(blank=True, max_length=200)),
+                ('fetched_at', models.DateTimeField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('text_length', models.PositiveIntegerField()),
+                ('text_z', models.BinaryField(help_text='Текст, сжатый zlib')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['competitor', 'product', '-fetched_at'], name='ai_pagetext_competi_4d7a85_idx'), models.Index(fields=['url', '-fetched_at'], name='ai_pagetext_url_a06820_idx')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
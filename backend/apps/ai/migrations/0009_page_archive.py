@@ -0,0 +1,44 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0008_page_text_corpus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='sha256 несжатого содержимого', max_length=64, unique=True)),
+                ('codec', models.CharField(max_length=8)),
+                ('segment', models.CharField(max_length=100)),
+                ('offset', models.BigIntegerField()),
+                ('length', models.PositiveIntegerField(help_text='Размер в сегменте (сжатый)')),
+                ('size', models.PositiveIntegerField(help_text='Исходный размер')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('fetched_at', models.DateTimeField()),
+                ('run_id', models.CharField(blank=True, db_index=True, help_text='Запуск парсера (id задачи)', max_length=64)),
+                ('competitor', models.CharField(blank=True, max_length=200)),
+                ('product', models.CharField(blank=True, max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField(default=200)),
+                ('encoding', models.CharField(blank=True, max_length=40)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pages', to='ai.archivedblob')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['url', '-fetched_at'], name='ai_archived_url_354564_idx')],
+            },
+        ),
+    ]
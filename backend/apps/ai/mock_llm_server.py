@@ -0,0 +1,125 @@
+"""
+Локальный mock OpenAI-совместимого API для тестов и бенчмарков.
+
+Реализует POST /v1/chat/completions с настраиваемой задержкой ответа
+и эмуляцией ограничения частоты (ответ 429 с заголовком Retry-After).
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов chat completions"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Не засоряем вывод бенчмарка логами каждого запроса
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        with server.lock:
+            server.request_count += 1
+            if server.rate_limit_rate and random.random() < server.rate_limit_rate:
+                server.rate_limited_count += 1
+                limited = True
+            else:
+                limited = False
+
+        if limited:
+            self._send_json(
+                429,
+                {'error': {'message': 'Rate limit exceeded', 'type': 'rate_limit'}},
+                headers={'Retry-After': str(server.retry_after)}
+            )
+            return
+
+        time.sleep(server.latency)
+
+        content = json.dumps({
+            'fact': 'Ставка до 4.2% годовых',
+            'value': '4.2%',
+            'confidence': 0.9,
+        }, ensure_ascii=False)
+
+        self._send_json(200, {
+            'id': f'chatcmpl-mock-{server.request_count}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    HTTP сервер mock LLM.
+
+    Args:
+        latency: задержка ответа в секундах
+        rate_limit_rate: доля запросов, на которые отвечаем 429
+        retry_after: значение заголовка Retry-After для 429
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.05,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.1,
+    ):
+        super().__init__((host, port), MockLLMHandler)
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self) -> 'MockLLMServer':
+        """Запустить сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,336 @@
+"""
+Реестр LLM провайдеров.
+
+Провайдер выбирается настройкой LLM_PROVIDER:
+- openai       - любой OpenAI-совместимый HTTP API (OpenAI, vLLM, llama.cpp server)
+- transformers - локальная модель через transformers (например, Qwen)
+- mock         - детерминированная заглушка без сети
+- auto         - openai, если задан LLM_API_KEY, иначе mock; в офлайн-режиме
+                 (PARSER_REPLAY_SOURCE, apps/parsers/replay.py) - всегда mock
+
+Экземпляр провайдера создаётся один раз на процесс и держит свой клиент
+(пул соединений, загруженную модель), поэтому переиспользуется между вызовами.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Type
+
+from django.conf import settings
+
+from apps.ai.llm_client import AsyncLLMClient
+
+logger = logging.getLogger(__name__)
+
+
+PROVIDERS: Dict[str, Type['BaseLLMProvider']] = {}
+
+_instances: Dict[str, 'BaseLLMProvider'] = {}
+_instances_lock = threading.Lock()
+
+
+def register_provider(cls):
+    """Декоратор регистрации провайдера по его имени"""
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+class BaseLLMProvider(ABC):
+    """
+    Базовый класс LLM провайдера.
+
+    Запрос - словарь с ключами:
+        messages: список сообщений chat completions
+        temperature, max_tokens: параметры генерации (опционально)
+        metadata: competitor/product/criterion, task (провайдеру не отправляется)
+
+    Возможности провайдера описываются атрибутами класса:
+        supports_batching: может обработать несколько запросов одним вызовом модели
+        max_batch_size: максимальный размер такого батча
+        max_concurrency: сколько запросов имеет смысл держать в работе одновременно
+    """
+
+    name = 'base'
+    supports_batching = False
+    max_batch_size = 1
+    max_concurrency = 1
+
+    @property
+    def window_size(self) -> int:
+        """Сколько запросов отдавать провайдеру за один complete_many()"""
+        if self.supports_batching:
+            return self.max_batch_size
+        return self.max_concurrency * 2
+
+    @abstractmethod
+    def complete_many(self, requests: List[Dict]) -> List:
+        """
+        Выполнить запросы.
+
+        Returns:
+            Список текстов ответов в порядке запросов; на месте
+            неудачного запроса - объект исключения
+        """
+        pass
+
+    def complete(self, request: Dict) -> str:
+        """Выполнить один запрос"""
+        response = self.complete_many([request])[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def healthy(self) -> bool:
+        """Можно ли продолжать использовать экземпляр провайдера"""
+        return True
+
+    def close(self):
+        """Освободить ресурсы провайдера"""
+        pass
+
+
+@register_provider
+class OpenAICompatibleProvider(BaseLLMProvider):
+    """
+    OpenAI-совместимый HTTP API.
+
+    Для локального vLLM/llama.cpp достаточно указать LLM_API_BASE
+    (например, http://localhost:8001/v1); ключ API в этом случае не нужен.
+    """
+
+    name = 'openai'
+
+    def __init__(self):
+        self.max_concurrency = settings.LLM_MAX_IN_FLIGHT
+        self.client = AsyncLLMClient(
+            base_url=settings.LLM_API_BASE,
+            api_key=settings.LLM_API_KEY or None,
+            model=settings.LLM_MODEL_NAME,
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+            rate_limit=settings.LLM_RATE_LIMIT,
+            burst=settings.LLM_RATE_BURST,
+            max_retries=settings.LLM_MAX_RETRIES,
+            timeout=settings.LLM_TIMEOUT,
+        )
+
+    def complete_many(self, requests: List[Dict]) -> List:
+        return self.client.run_many(
+            {key: value for key, value in request.items() if key != 'metadata'}
+            for request in requests
+        )
+
+    def healthy(self) -> bool:
+        return self.client.healthy()
+
+    def close(self):
+        self.client.close()
+
+
+@register_provider
+class TransformersProvider(BaseLLMProvider):
+    """
+    Локальная модель через transformers.
+
+    Модель загружается при первом запросе и остаётся в памяти процесса.
+    Запросы генерируются батчами по LLM_LOCAL_BATCH_SIZE.
+    """
+
+    name = 'transformers'
+    supports_batching = True
+
+    def __init__(self):
+        self.model_name = settings.LLM_LOCAL_MODEL
+        self.max_batch_size = settings.LLM_LOCAL_BATCH_SIZE
+        self._model = None
+        self._tokenizer = None
+        self._device = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is not None:
+            return
+
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        import torch
+
+        logger.info(f'Loading local model {self.model_name}')
+        self._device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, trust_remote_code=True)
+        self._tokenizer.padding_side = 'left'
+        if self._tokenizer.pad_token is None:
+            self._tokenizer.pad_token = self._tokenizer.eos_token
+        self._model = AutoModelForCausalLM.from_pretrained(
+            self.model_name,
+            device_map='auto',
+            torch_dtype=torch.float16 if self._device == 'cuda' else torch.float32,
+            trust_remote_code=True,
+        )
+
+    def _render_prompt(self, request: Dict) -> str:
+        messages = request['messages']
+        if getattr(self._tokenizer, 'chat_template', None):
+            return self._tokenizer.apply_chat_template(
+                messages, tokenize=False, add_generation_prompt=True
+            )
+        return '\n'.join(message['content'] for message in messages)
+
+    def complete_many(self, requests: List[Dict]) -> List:
+        with self._lock:
+            try:
+                self._load()
+            except Exception as e:
+                logger.error(f'Failed to load local model {self.model_name}: {e}')
+                return [e] * len(requests)
+
+            results = []
+            for start in range(0, len(requests), self.max_batch_size):
+                batch = requests[start:start + self.max_batch_size]
+                try:
+                    results.extend(self._generate(batch))
+                except Exception as e:
+                    logger.error(f'Local generation failed: {e}')
+                    results.extend([e] * len(batch))
+            return results
+
+    def _generate(self, batch: List[Dict]) -> List[str]:
+        prompts = [self._render_prompt(request) for request in batch]
+        inputs = self._tokenizer(prompts, return_tensors='pt', padding=True).to(self._device)
+        output_ids = self._model.generate(
+            **inputs,
+            max_new_tokens=max(request.get('max_tokens', 256) for request in batch),
+            do_sample=False,
+        )
+        # Отрезаем промпт, оставляем только сгенерированные токены
+        generated = output_ids[:, inputs['input_ids'].shape[1]:]
+        return [
+            text.strip()
+            for text in self._tokenizer.batch_decode(generated, skip_special_tokens=True)
+        ]
+
+    def close(self):
+        self._model = None
+        self._tokenizer = None
+
+
+@register_provider
+class MockProvider(BaseLLMProvider):
+    """
+    Заглушка для демо и нагрузочных тестов.
+
+    Ответ детерминирован (зависит только от запроса), задержка
+    вызова - LLM_MOCK_LATENCY плюс LLM_MOCK_LATENCY_PER_REQUEST на
+    каждый запрос батча.
+    """
+
+    name = 'mock'
+    supports_batching = True
+    max_batch_size = 64
+    max_concurrency = 64
+
+    MOCK_FACTS = {
+        ("sber", "deposits"): [
+            "Процент на остаток составляет 3.5% годовых",
+            "Минимальная сумма вклада - 10 тысяч рублей",
+            "Возможность снятия без комиссии",
+        ],
+        ("vtb", "deposits"): [
+            "Ставка до 4.2% годовых",
+            "Минимум - 5 тысяч рублей",
+            "Автопродление вклада",
+        ],
+        ("alfa", "credits"): [
+            "Кредитная ставка от 7.9% годовых",
+            "Максимальный лимит - 5 млн рублей",
+            "Срок одобрения - до 5 минут",
+        ],
+    }
+
+    def __init__(self):
+        self.latency = settings.LLM_MOCK_LATENCY
+        self.latency_per_request = settings.LLM_MOCK_LATENCY_PER_REQUEST
+
+    def _respond(self, request: Dict) -> str:
+        metadata = request.get('metadata', {})
+        competitor = metadata.get('competitor')
+        product = metadata.get('product')
+
+        seed = zlib.crc32(json.dumps(request.get('messages', []), ensure_ascii=False).encode('utf-8'))
+        rng = random.Random(seed)
+
+        facts = self.MOCK_FACTS.get((competitor, product), [
+            f"Анализ {competitor} по {product}: стандартные условия",
+            "Предложение конкурентно по рынку",
+        ])
+
+        if metadata.get('task') == 'recommendation':
+            return json.dumps({
+                "recommendation": f"Сравнить условия {competitor} по {product} "
+                                  f"({metadata.get('criterion')}) с предложением Сбера",
+                "confidence": round(rng.uniform(0.6, 0.95), 3),
+            }, ensure_ascii=False)
+
+        return json.dumps({
+            "fact": rng.choice(facts),
+            "confidence": round(rng.uniform(0.6, 0.95), 3),
+        }, ensure_ascii=False)
+
+    def complete_many(self, requests: List[Dict]) -> List:
+        latency = self.latency + self.latency_per_request * len(requests)
+        if latency:
+            time.sleep(latency)
+        return [self._respond(request) for request in requests]
+
+
+def resolve_provider_name(name: str = None) -> str:
+    """Имя провайдера с учётом значения 'auto'"""
+    name = name or settings.LLM_PROVIDER
+    if name == 'auto':
+        if settings.PARSER_REPLAY_SOURCE:
+            return 'mock'
+        api_key = settings.LLM_API_KEY
+        return 'openai' if api_key and api_key != 'your_key_here' else 'mock'
+    return name
+
+
+def get_provider(name: str = None) -> BaseLLMProvider:
+    """
+    Общий для процесса экземпляр провайдера.
+
+    Raises:
+        ValueError: если провайдер с таким именем не зарегистрирован
+    """
+    name = resolve_provider_name(name)
+    if name not in PROVIDERS:
+        raise ValueError(f'Unknown LLM provider: {name}')
+
+    with _instances_lock:
+        provider = _instances.get(name)
+        if provider is None:
+            provider = PROVIDERS[name]()
+            _instances[name] = provider
+    return provider
+
+
+def discard_provider(provider: BaseLLMProvider):
+    """Закрыть провайдер; следующий get_provider() создаст новый экземпляр"""
+    with _instances_lock:
+        for name, instance in list(_instances.items()):
+            if instance is provider:
+                del _instances[name]
+    provider.close()
+
+
+def close_providers():
+    """Закрыть все созданные в процессе провайдеры"""
+    with _instances_lock:
+        for provider in _instances.values():
+            try:
+                provider.close()
+            except Exception as e:
+                logger.warning(f'Error closing LLM provider {provider.name}: {e}')
+        _instances.clear()
@@ -0,0 +1,61 @@
+"""
+Правила рекомендаций без LLM.
+
+Те же правила, что в промпте рекомендаций (sber-benchmark-main/llm/llm-qwen.py):
+- плата больше AI_RULES_FEE_THRESHOLD ₽ в год - рекомендовать снижение комиссии
+- "нет данных" - рекомендовать проверить информацию
+- ставка больше AI_RULES_RATE_THRESHOLD % - предложить улучшение условий
+- иначе - оставить без изменений
+
+Правило срабатывает, только если значение удалось разобрать однозначно;
+в остальных случаях apply_rules возвращает None и факт уходит в LLM.
+"""
+
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from apps.ai.values import is_no_data, parse_value
+
+RULES_MODEL_NAME = 'rules'
+
+
+def _decision(rule: str, recommendation: str) -> Dict:
+    return {'rule': rule, 'recommendation': recommendation, 'confidence': 1.0}
+
+
+def apply_rules(value: Optional[str]) -> Optional[Dict]:
+    """
+    Рекомендация по значению факта.
+
+    Returns:
+        Словарь rule, recommendation, confidence или None, если правила
+        не могут решить
+    """
+    if is_no_data(value):
+        return _decision('no_data', 'Проверить информацию: данных по критерию нет')
+
+    parsed = parse_value(value)
+    # Ставка и сумма в одном значении ("кэшбэк 1.5% до 3 000 ₽") - неясно,
+    # что из них плата, это решает LLM
+    if parsed['percent'] is not None and parsed['amount'] is not None:
+        return None
+
+    fee = parsed['annual_amount'] if parsed['currency'] == 'RUB' else None
+    # Бесплатно - ноль за любой период
+    if fee is None and parsed['amount'] == 0 and parsed['currency'] == 'RUB':
+        fee = 0.0
+    rate = parsed['percent']
+
+    if fee is not None and fee > settings.AI_RULES_FEE_THRESHOLD:
+        return _decision('fee', f'Рекомендовать снижение комиссии: {fee:g} ₽ в год')
+    if rate is not None and rate > settings.AI_RULES_RATE_THRESHOLD:
+        return _decision('rate', f'Предложить улучшение условий: ставка {rate:g}%')
+
+    # "Без изменений" - только если разобрано всё, что есть в значении:
+    # сумма без периода или в другой валюте правилами не сравнивается
+    if parsed['amount'] is not None and fee is None:
+        return None
+    if fee is not None or rate is not None:
+        return _decision('unchanged', 'Оставить без изменений')
+    return None
@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from apps.ai.dedup import BAND_BITS, BANDS, fingerprint, hamming
+
+
+class FingerprintTests(SimpleTestCase):
+    TEXT = (
+        'Вклад Сохраняй: ставка до 18% годовых, срок от 3 до 12 месяцев. '
+        'Минимальная сумма 10 000 ₽, пополнение и частичное снятие доступны. '
+        'Проценты выплачиваются ежемесячно на карту или капитализируются. '
+        'Досрочное закрытие возможно с сохранением процентов по ставке до востребования.'
+    )
+
+    def test_stable(self):
+        self.assertEqual(fingerprint(self.TEXT), fingerprint(self.TEXT))
+
+    def test_bands_split_simhash(self):
+        fp = fingerprint(self.TEXT)
+        value = fp['simhash'] & ((1 << 64) - 1)
+        for i in range(BANDS):
+            self.assertEqual(fp[f'band_{i}'], value >> (i * BAND_BITS) & ((1 << BAND_BITS) - 1))
+
+    def test_noise_is_ignored(self):
+        noisy = self.TEXT + ' Обновлено 12.05.2024 в 10:15. sessionid-0123456789abcdefghijklmn'
+        self.assertEqual(fingerprint(self.TEXT)['values_hash'], fingerprint(noisy)['values_hash'])
+        self.assertLessEqual(hamming(fingerprint(self.TEXT)['simhash'], fingerprint(noisy)['simhash']), 6)
+
+    def test_small_edit_is_near(self):
+        edited = self.TEXT.replace('на карту', 'на счёт')
+        self.assertLessEqual(hamming(fingerprint(self.TEXT)['simhash'], fingerprint(edited)['simhash']), 12)
+
+    def test_changed_number_changes_values_hash(self):
+        changed = self.TEXT.replace('18%', '19%')
+        self.assertNotEqual(fingerprint(self.TEXT)['values_hash'], fingerprint(changed)['values_hash'])
+
+    def test_different_text_is_far(self):
+        other = 'Кредитная карта с льготным периодом до 120 дней и кэшбэком 5% на покупки в ресторанах и кафе.'
+        self.assertGreater(hamming(fingerprint(self.TEXT)['simhash'], fingerprint(other)['simhash']), 12)
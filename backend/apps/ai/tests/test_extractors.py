@@ -0,0 +1,60 @@
+from django.test import SimpleTestCase
+
+from apps.ai.extractors import CONFIDENCE_AMBIGUOUS, CONFIDENCE_SINGLE, extract
+
+
+class ExtractTests(SimpleTestCase):
+    def test_fee_amounts(self):
+        cases = [
+            ('withdrawal', 'Снятие наличных: комиссия 100 ₽.', 'Комиссия за снятие 100 ₽'),
+            ('cost', 'Обслуживание карты 990 руб. в год', 'Обслуживание 990 ₽ в год'),
+            ('sms', 'СМС 60 ₽ в месяц', 'СМС-уведомления 60 ₽ в месяц'),
+            ('sms', 'СМС 59 ₽ в месяц', 'СМС-уведомления 59 ₽ в месяц'),
+            ('cost', 'Обслуживание 1 000 ₽ в год', 'Обслуживание 1 000 ₽ в год'),
+            ('cost', 'Обслуживание 1 000,50 ₽ в год', 'Обслуживание 1 000,50 ₽ в год'),
+            ('cost', 'Обслуживание 1\u00a0490 руб. в год', 'Обслуживание 1 490 ₽ в год'),
+        ]
+        for criterion, text, value in cases:
+            with self.subTest(text=text):
+                hit = extract(criterion, text)
+                self.assertEqual(hit['value'], value)
+                self.assertEqual(hit['confidence'], CONFIDENCE_SINGLE)
+
+    def test_zero_amount_is_free(self):
+        cases = [
+            ('sms', 'СМС-уведомления 0 ₽', 'СМС-уведомления бесплатно'),
+            ('cost', 'Обслуживание 0,00 руб.', 'Обслуживание бесплатно'),
+            ('withdrawal', 'Снятие наличных 0 ₽ в банкоматах', 'Снятие наличных без комиссии'),
+        ]
+        for criterion, text, value in cases:
+            with self.subTest(text=text):
+                hit = extract(criterion, text)
+                self.assertEqual(hit['value'], value)
+                self.assertEqual(hit['confidence'], CONFIDENCE_SINGLE)
+
+    def test_percent(self):
+        cases = [
+            ('rate', 'Ставка до 18,5% годовых', 'Ставка до 18.5% годовых'),
+            ('interest', 'Процент на остаток 7% годовых', 'Процент на остаток 7% годовых'),
+            ('cashback', 'Кэшбэк 5% в выбранных категориях', 'Кэшбэк 5%'),
+            ('withdrawal', 'Комиссия за снятие наличных 1,5%', 'Комиссия за снятие 1.5%'),
+        ]
+        for criterion, text, value in cases:
+            with self.subTest(text=text):
+                self.assertEqual(extract(criterion, text)['value'], value)
+
+    def test_grace(self):
+        self.assertEqual(extract('grace', 'Льготный период до 120 дней')['value'], 'Льготный период до 120 дней')
+
+    def test_conflicting_values_are_ambiguous(self):
+        hit = extract('sms', 'СМС бесплатно первые 2 месяца, далее 99 ₽ в месяц')
+        self.assertEqual(hit['confidence'], CONFIDENCE_AMBIGUOUS)
+
+    def test_sentence_split_keeps_abbreviations(self):
+        hit = extract('cost', 'Обслуживание 99 руб. в месяц. СМС 59 ₽.')
+        self.assertEqual(hit['value'], 'Обслуживание 99 ₽ в месяц')
+
+    def test_no_match(self):
+        self.assertIsNone(extract('general', 'Ставка 10%'))
+        self.assertIsNone(extract('rate', ''))
+        self.assertIsNone(extract('sms', 'Условия вклада'))
@@ -0,0 +1,55 @@
+import itertools
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.ai.llm_client import AsyncLLMClient
+from apps.ai.mock_llm_server import MockLLMServer
+
+MESSAGES = [{'role': 'user', 'content': 'Ставка по вкладу?'}]
+
+
+class AsyncLLMClientTests(SimpleTestCase):
+    def start_server(self, **kwargs) -> MockLLMServer:
+        server = MockLLMServer(latency=0, **kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def make_client(self, server: MockLLMServer, **kwargs) -> AsyncLLMClient:
+        client = AsyncLLMClient(base_url=server.base_url, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_token_bucket_paces_requests(self):
+        server = self.start_server()
+        client = self.make_client(server, max_in_flight=8, rate_limit=20, burst=1)
+
+        started = time.monotonic()
+        responses = client.run_many({'messages': MESSAGES} for _ in range(6))
+        elapsed = time.monotonic() - started
+
+        self.assertFalse([r for r in responses if isinstance(r, Exception)])
+        self.assertEqual(server.request_count, 6)
+        # Первый запрос - из запаса корзины, остальные пять - по 1/20 с
+        self.assertGreaterEqual(elapsed, 5 / 20 - 0.02)
+
+    def test_retry_after_on_429(self):
+        server = self.start_server(rate_limit_rate=0.5, retry_after=0.3)
+        # Backoff без Retry-After был бы 5 с - по времени видно, чей интервал взят
+        client = self.make_client(server, max_retries=2, backoff_base=5)
+
+        # 429 только на первый запрос
+        draws = itertools.chain([0.0], itertools.repeat(0.99))
+        with mock.patch('apps.ai.mock_llm_server.random.random', side_effect=lambda: next(draws)):
+            started = time.monotonic()
+            response = client.run(client.chat(MESSAGES))
+            elapsed = time.monotonic() - started
+
+        self.assertIn('4.2%', response)
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(server.rate_limited_count, 1)
+        self.assertEqual(client.stats['rate_limited'], 1)
+        self.assertEqual(client.stats['retries'], 1)
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertLess(elapsed, 2)
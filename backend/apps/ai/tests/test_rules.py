@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase, override_settings
+
+from apps.ai.rules import apply_rules
+
+
+@override_settings(AI_RULES_FEE_THRESHOLD=500, AI_RULES_RATE_THRESHOLD=15)
+class ApplyRulesTests(SimpleTestCase):
+    def test_rules(self):
+        cases = [
+            ('нет данных', 'no_data'),
+            ('Обслуживание 99 ₽ в месяц', 'fee'),
+            ('Обслуживание 490 ₽ в год', 'unchanged'),
+            ('Ставка до 18% годовых', 'rate'),
+            ('Ставка до 12% годовых', 'unchanged'),
+            ('СМС-уведомления бесплатно', 'unchanged'),
+        ]
+        for value, rule in cases:
+            with self.subTest(value=value):
+                self.assertEqual(apply_rules(value)['rule'], rule)
+
+    def test_undecided(self):
+        for value in (
+            'Кэшбэк 1.5% до 3 000 ₽',      # ставка и сумма - решает LLM
+            'Кредитный лимит до 700 тыс. рублей',  # сумма без периода
+            'Снятие 5 USD в месяц',         # не рубли
+            'Доступен онлайн',               # нечего сравнивать
+        ):
+            with self.subTest(value=value):
+                self.assertIsNone(apply_rules(value))
+
+    def test_fee_threshold_is_annual(self):
+        self.assertEqual(apply_rules('Обслуживание 2 ₽ в день')['rule'], 'fee')
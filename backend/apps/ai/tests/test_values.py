@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from apps.ai.values import is_no_data, parse_value
+
+
+class ParseValueTests(SimpleTestCase):
+    def test_parse(self):
+        cases = [
+            ('Обслуживание 99 ₽ в месяц', {
+                'amount': 99.0, 'currency': 'RUB', 'period': 'month', 'min': 99.0, 'max': 99.0,
+                'annual_amount': 1188.0,
+            }),
+            ('Обслуживание 1 490 руб. в год', {'amount': 1490.0, 'period': 'year', 'annual_amount': 1490.0}),
+            ('Кредитный лимит до 700 тыс. рублей', {'amount': 700_000.0, 'min': None, 'max': 700_000.0}),
+            ('Ставка до 18.5% годовых', {'percent': 18.5, 'min': None, 'max': 18.5, 'period': 'year'}),
+            ('Ставка от 7,9%', {'percent': 7.9, 'min': 7.9, 'max': None}),
+            ('Ставка 5% - 12%', {'percent': 5.0, 'min': 5.0, 'max': 12.0}),
+            ('Кэшбэк от 10 до 50 тыс. ₽', {'amount': 10_000.0, 'min': 10_000.0, 'max': 50_000.0}),
+            ('Снятие 100 USD', {'amount': 100.0, 'currency': 'USD'}),
+            ('СМС-уведомления бесплатно', {'amount': 0.0, 'currency': 'RUB', 'min': 0.0, 'max': 0.0}),
+            ('Кэшбэк 1.5% до 3 000 ₽', {'percent': 1.5, 'amount': 3000.0, 'min': 1.5, 'max': 1.5}),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                parsed = parse_value(value)
+                self.assertEqual({key: parsed[key] for key in expected}, expected)
+
+    def test_empty(self):
+        for value in (None, '', 'Минимальная сумма не установлена'):
+            with self.subTest(value=value):
+                self.assertTrue(all(v is None for v in parse_value(value).values()))
+
+    def test_no_data(self):
+        self.assertTrue(is_no_data(None))
+        self.assertTrue(is_no_data(' Нет данных '))
+        self.assertFalse(is_no_data('Ставка 5%'))
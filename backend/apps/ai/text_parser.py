@@ -5,7 +5,11 @@
 
 import requests
 from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, Optional
 import re
 import logging
 
@@ -26,16 +30,29 @@ class PageTextParser:
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
 
-    def __init__(self, competitor: str, product: str, criterion: str, urls: list):
+    def __init__(
+        self,
+        competitor: str,
+        product: str,
+        criterion: str,
+        urls: list,
+        session: Optional[requests.Session] = None,
+        keep_html: bool = False
+    ):
         self.competitor = competitor
         self.product = product
         self.criterion = criterion
         self.urls = urls
+        # Общая сессия (например, из пула воркера) переиспользует соединения;
+        # apps.ai.archive.ReplaySession отдаёт страницы из архива без сети
+        self.session = session
+        # Исходный HTML в странице (ключ "html") - для архива, см. archived_pages
+        self.keep_html = keep_html
 
     def fetch_html(self, url: str) -> str:
         """Скачиваем HTML"""
         try:
-            resp = requests.get(
+            resp = (self.session or requests).get(
                 url,
                 timeout=self.DEFAULT_TIMEOUT,
                 headers=self.DEFAULT_HEADERS,
@@ -66,10 +83,84 @@ class PageTextParser:
 
         return text.strip()
 
+    def parse_url(self, url: str) -> Dict:
+        """
+        Скачивает и чистит одну страницу.
+        
+        Returns:
+            dict: Объект страницы (см. run()); HTML сохраняется в ключе
+            "html" только с keep_html, иначе остаётся очищенный текст.
+        """
+        try:
+            logger.info(f"Parsing {url}")
+            html = self.fetch_html(url)
+            cleaned_text = self.clean_html(html)
+            
+            page = {
+                "competitor": self.competitor,
+                "product": self.product,
+                "criterion": self.criterion,
+                "source_url": url,
+                "parsed_at": datetime.utcnow().isoformat(),
+                "cleaned_text": cleaned_text,
+                "status": "success"
+            }
+            if self.keep_html:
+                page["html"] = html
+            return page
+        except Exception as e:
+            logger.error(f"Error parsing {url}: {str(e)}")
+            return {
+                "competitor": self.competitor,
+                "product": self.product,
+                "criterion": self.criterion,
+                "source_url": url,
+                "parsed_at": datetime.utcnow().isoformat(),
+                "error": str(e),
+                "status": "error"
+            }
+
+    def iter_pages(self, window: int = 1) -> Iterator[Dict]:
+        """
+        Потоковый вариант run(): отдаёт страницы по мере скачивания и очистки.
+        
+        Одновременно в работе находится не больше `window` страниц
+        (плюс одна, отданная потребителю), поэтому пиковое потребление
+        памяти не зависит от количества URL. Порядок страниц совпадает
+        с порядком self.urls.
+        
+        Args:
+            window: Размер окна параллельной загрузки (1 - последовательно)
+            
+        Yields:
+            dict: Объект страницы в формате run()
+        """
+        if window <= 1:
+            for url in self.urls:
+                yield self.parse_url(url)
+            return
+        
+        urls = iter(self.urls)
+        
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            in_flight = deque(
+                executor.submit(self.parse_url, url) for url in islice(urls, window)
+            )
+            
+            while in_flight:
+                page = in_flight.popleft().result()
+                # Освободившийся слот сразу занимаем следующим URL
+                for url in islice(urls, 1):
+                    in_flight.append(executor.submit(self.parse_url, url))
+                yield page
+
     def run(self) -> list:
         """
         Возвращает список объектов с очищенным текстом для каждой страницы.
         
+        Для больших списков URL используйте iter_pages(), чтобы не держать
+        весь текст в памяти.
+        
         Returns:
             list: Список словарей с полями:
                 - competitor: название конкурента
@@ -80,33 +171,4 @@ class PageTextParser:
                 - cleaned_text: очищенный текст
                 - error: (опционально) текст ошибки если произошла
         """
-        results = []
-        
-        for url in self.urls:
-            try:
-                logger.info(f"Parsing {url}")
-                html = self.fetch_html(url)
-                cleaned_text = self.clean_html(html)
-                
-                results.append({
-                    "competitor": self.competitor,
-                    "product": self.product,
-                    "criterion": self.criterion,
-                    "source_url": url,
-                    "parsed_at": datetime.utcnow().isoformat(),
-                    "cleaned_text": cleaned_text,
-                    "status": "success"
-                })
-            except Exception as e:
-                logger.error(f"Error parsing {url}: {str(e)}")
-                results.append({
-                    "competitor": self.competitor,
-                    "product": self.product,
-                    "criterion": self.criterion,
-                    "source_url": url,
-                    "parsed_at": datetime.utcnow().isoformat(),
-                    "error": str(e),
-                    "status": "error"
-                })
-        
-        return results
+        return list(self.iter_pages())
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AIAnalysisViewSet, AIInsightsAPIView
+from .views import AIAnalysisViewSet, AIInsightsAPIView, PageSearchAPIView, PageTextAPIView
 
 app_name = 'ai'
 
@@ -10,4 +10,6 @@ router.register(r'analysis', AIAnalysisViewSet, basename='analysis')
 urlpatterns = [
     path('', include(router.urls)),
     path('insights/', AIInsightsAPIView.as_view(), name='insights'),
+    path('pages/search/', PageSearchAPIView.as_view(), name='page-search'),
+    path('pages/<int:pk>/', PageTextAPIView.as_view(), name='page-text'),
 ]
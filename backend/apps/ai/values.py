@@ -0,0 +1,178 @@
+"""
+Разбор числовых значений из текстовых фактов.
+
+Факты от LLM - строки вида "Ставка до 4.2% годовых", "990 ₽ в год",
+"Минимум - 5 тысяч рублей", "нет данных". parse_value достаёт из них
+сумму, валюту, процент, период и границы диапазона без обращения к модели.
+Результат сохраняется в типизированные колонки AIAnalysisResult / AIInsight
+(value_amount, value_percent, ...) при записи, см. value_columns.
+"""
+
+import re
+from typing import Dict, Optional
+
+NO_DATA_VALUES = frozenset({'нет данных', 'нет информации', 'не указано', 'н/д', 'n/a'})
+
+# Число с разделителями разрядов ("1 000", "1 000,5") и множителем
+_NUMBER = r'(\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+)(?:[.,](\d+))?'
+_MULTIPLIER = r'(?:\s*(тыс\.?|тысяч[аи]?|млн\.?|миллион(?:а|ов)?|млрд\.?))?'
+
+_CURRENCY = r'(₽|руб(?:\.|лей|ля|ль)?|р\.|\$|usd|долл\w*|€|eur|евро)'
+_RANGE_SEP = r'\s*(?:до|-|–|—)\s*'
+
+_PERCENT_RE = re.compile(_NUMBER + r'\s*%')
+_AMOUNT_RE = re.compile(_NUMBER + _MULTIPLIER + r'\s*' + _CURRENCY, re.IGNORECASE)
+# "от 5 до 8%", "5-8%"
+_PERCENT_RANGE_RE = re.compile(_NUMBER + r'\s*%?' + _RANGE_SEP + _NUMBER + r'\s*%', re.IGNORECASE)
+# "от 10 до 50 тыс. рублей", "100 - 300 ₽"
+_AMOUNT_RANGE_RE = re.compile(
+    _NUMBER + _MULTIPLIER + r'\s*(?:' + _CURRENCY + r')?' + _RANGE_SEP + _NUMBER + _MULTIPLIER + r'\s*' + _CURRENCY,
+    re.IGNORECASE
+)
+# Словарь формулировок без чисел
+_FREE_RE = re.compile(r'бесплатн|без\s+(?:комисси|платы|абонентской)', re.IGNORECASE)
+
+_MULTIPLIERS = {'тыс': 1_000, 'млн': 1_000_000, 'мил': 1_000_000, 'млрд': 1_000_000_000}
+_CURRENCIES = {'₽': 'RUB', 'руб': 'RUB', 'р.': 'RUB', '$': 'USD', 'usd': 'USD', 'дол': 'USD',
+               '€': 'EUR', 'eur': 'EUR', 'евр': 'EUR'}
+
+_PERIODS = [
+    ('year', re.compile(r'/\s*год|в\s+год|годов(?:ых|ая|ое)|ежегодн|за\s+год', re.IGNORECASE)),
+    ('month', re.compile(r'/\s*мес|в\s+месяц|ежемесячн|за\s+месяц', re.IGNORECASE)),
+    ('day', re.compile(r'/\s*день|в\s+день|ежедневн|за\s+день', re.IGNORECASE)),
+]
+_PER_YEAR = {'year': 1, 'month': 12, 'day': 365}
+
+# Диапазоны: "от 5%", "до 4.2%"
+_MIN_RE = re.compile(r'\bот\s*$', re.IGNORECASE)
+_MAX_RE = re.compile(r'\bдо\s*$', re.IGNORECASE)
+
+
+def _to_number(integer: str, fraction: Optional[str]) -> float:
+    number = float(re.sub(r'[ \u00a0\u202f]', '', integer))
+    if fraction:
+        number += float('0.' + fraction)
+    return number
+
+
+def is_no_data(value: Optional[str]) -> bool:
+    """Факт означает отсутствие информации"""
+    if value is None:
+        return True
+    return value.strip().strip('."\'').lower() in NO_DATA_VALUES
+
+
+def _amount(integer: str, fraction: Optional[str], multiplier: Optional[str]) -> float:
+    amount = _to_number(integer, fraction)
+    if multiplier:
+        amount *= _MULTIPLIERS[multiplier.lower()[:3]]
+    return amount
+
+
+def _currency(token: Optional[str]) -> Optional[str]:
+    if not token:
+        return None
+    token = token.lower()
+    return _CURRENCIES.get(token[:3]) or _CURRENCIES.get(token)
+
+
+def parse_value(value: Optional[str]) -> Dict:
+    """
+    Разобрать значение факта.
+
+    Returns:
+        Словарь amount, currency, percent, period (None, если не найдено),
+        min / max - границы основной величины (ставки, если она есть,
+        иначе суммы): "до 4.2%" даёт только max, "от 7.9%" - только min,
+        точное значение - обе границы; annual_amount - сумма, приведённая
+        к году, если известен период
+    """
+    parsed = {
+        'amount': None,
+        'currency': None,
+        'percent': None,
+        'period': None,
+        'min': None,
+        'max': None,
+        'annual_amount': None,
+    }
+    if not value:
+        return parsed
+
+    amount_bounds = percent_bounds = None
+
+    match = _AMOUNT_RANGE_RE.search(value)
+    if match:
+        low_int, low_frac, low_mult, low_cur, high_int, high_frac, high_mult, high_cur = match.groups()
+        # "от 10 до 50 тыс." - множитель второго числа относится к обоим
+        low = _amount(low_int, low_frac, low_mult or high_mult)
+        high = _amount(high_int, high_frac, high_mult)
+        parsed['amount'] = low
+        parsed['currency'] = _currency(high_cur or low_cur)
+        amount_bounds = (low, high)
+    else:
+        match = _AMOUNT_RE.search(value)
+        if match:
+            integer, fraction, multiplier, currency = match.groups()
+            parsed['amount'] = _amount(integer, fraction, multiplier)
+            parsed['currency'] = _currency(currency)
+            amount_bounds = _bounds(value, match, parsed['amount'])
+        elif _FREE_RE.search(value):
+            parsed['amount'] = 0.0
+            parsed['currency'] = 'RUB'
+            amount_bounds = (0.0, 0.0)
+
+    match = _PERCENT_RANGE_RE.search(value)
+    if match:
+        low = _to_number(*match.groups()[:2])
+        high = _to_number(*match.groups()[2:])
+        parsed['percent'] = low
+        percent_bounds = (low, high)
+    else:
+        match = _PERCENT_RE.search(value)
+        if match:
+            parsed['percent'] = _to_number(*match.groups())
+            percent_bounds = _bounds(value, match, parsed['percent'])
+
+    # Основная величина - ставка, если она есть
+    bounds = percent_bounds or amount_bounds
+    if bounds:
+        parsed['min'], parsed['max'] = bounds
+
+    for period, pattern in _PERIODS:
+        if pattern.search(value):
+            parsed['period'] = period
+            break
+
+    if parsed['amount'] is not None and parsed['period'] is not None:
+        parsed['annual_amount'] = parsed['amount'] * _PER_YEAR[parsed['period']]
+
+    return parsed
+
+
+def _bounds(value: str, match, number: float):
+    """Границы по предлогу перед числом: "от" - min, "до" - max"""
+    prefix = value[:match.start()]
+    if _MIN_RE.search(prefix):
+        return number, None
+    if _MAX_RE.search(prefix):
+        return None, number
+    return number, number
+
+
+def value_columns(value: Optional[str]) -> Dict:
+    """Значения типизированных колонок value_* для модели"""
+    parsed = parse_value(value)
+    return {
+        'value_amount': parsed['amount'],
+        'value_currency': parsed['currency'] or '',
+        'value_percent': parsed['percent'],
+        'value_period': parsed['period'] or '',
+        'value_min': parsed['min'],
+        'value_max': parsed['max'],
+    }
+
+
+VALUE_COLUMNS = (
+    'value_amount', 'value_currency', 'value_percent', 'value_period', 'value_min', 'value_max',
+)
@@ -3,17 +3,78 @@ API Views для AI анализа
 """
 
 import logging
+from datetime import datetime, time
+from typing import List, Optional
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from django.db.models import F
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
+from apps.ai.corpus import PageText, search, snippet
+from apps.ai.insights import AIInsight
 from apps.ai.llm_service import AIAnalysisResult, LLMService
-from apps.benchmark.serializers import AIAnalysisResultSerializer
+from apps.benchmark.pagination import AIAnalysisCursorPagination
+from apps.benchmark.serializers import AIAnalysisResultSerializer, AIInsightSerializer
 
 logger = logging.getLogger(__name__)
 
+# Фильтры по разобранному значению (колонки value_*, apps/ai/values.py):
+# ?percent_gte=4 - ставка от 4%, ?amount_lte=500 - сумма до 500
+VALUE_FILTERS = {
+    'percent_gte': 'value_percent__gte',
+    'percent_lte': 'value_percent__lte',
+    'amount_gte': 'value_amount__gte',
+    'amount_lte': 'value_amount__lte',
+    'min_gte': 'value_min__gte',
+    'max_lte': 'value_max__lte',
+}
+VALUE_ORDERINGS = {
+    'percent': 'value_percent',
+    'amount': 'value_amount',
+    'min': 'value_min',
+    'max': 'value_max',
+}
+
+
+def filter_by_value(queryset, params):
+    """
+    Применить фильтры VALUE_FILTERS и ?currency= / ?period= к queryset.
+    
+    Raises:
+        ValidationError: если граница - не число
+    """
+    for param, lookup in VALUE_FILTERS.items():
+        raw = params.get(param)
+        if raw in (None, ''):
+            continue
+        try:
+            queryset = queryset.filter(**{lookup: float(raw.replace(',', '.'))})
+        except ValueError:
+            raise ValidationError({param: 'Ожидается число'})
+    
+    if params.get('currency'):
+        queryset = queryset.filter(value_currency=params['currency'].upper())
+    if params.get('period'):
+        queryset = queryset.filter(value_period=params['period'])
+    return queryset
+
+
+def order_by_value(queryset, ordering: str):
+    """Сортировка ?ordering=percent|-percent|amount|... ; строки без значения - в конце"""
+    descending = ordering.startswith('-')
+    field = VALUE_ORDERINGS.get(ordering.lstrip('-'))
+    if field is None:
+        raise ValidationError({'ordering': f'Допустимо: {", ".join(VALUE_ORDERINGS)}'})
+    expression = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+    return queryset.order_by(expression, '-id')
+
 
 class AIAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -22,13 +83,50 @@ class AIAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
     GET /api/ai/analysis/ - список анализов
     GET /api/ai/analysis/{id}/ - детали анализа
     GET /api/ai/analysis/recommendations/ - получить рекомендации
+    
+    Список:
+    - фильтры: ?competitor=&product=&criterion=&analysis_type=
+      и по разобранному значению: ?percent_gte=&percent_lte=&amount_gte=&amount_lte=
+      &min_gte=&max_lte=&currency=&period=
+    - курсорная пагинация: ?cursor=...&page_size=N (по умолчанию 100)
+    - sparse fieldset: ?fields=id,competitor,value (raw_response - только по запросу)
     """
     
     queryset = AIAnalysisResult.objects.all()
     serializer_class = AIAnalysisResultSerializer
     permission_classes = [AllowAny]
+    pagination_class = AIAnalysisCursorPagination
+    # Порядок задаёт курсорная пагинация, ?ordering= не поддерживается
+    filter_backends = []
     filterset_fields = ['competitor', 'product', 'criterion', 'analysis_type']
-    ordering = ['-analysis_at']
+    
+    def get_requested_fields(self) -> Optional[List[str]]:
+        """Поля из ?fields= (None - набор по умолчанию)"""
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        return [field.strip() for field in fields.split(',') if field.strip()]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        for field in self.filterset_fields:
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        queryset = filter_by_value(queryset, self.request.query_params)
+        
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset.defer('raw_response')
+        
+        model_fields = {field.name for field in AIAnalysisResult._meta.concrete_fields}
+        # id и analysis_at нужны курсору пагинации
+        return queryset.only('id', 'analysis_at', *(field for field in fields if field in model_fields))
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
     
     @action(detail=False, methods=['get'])
     def recommendations(self, request):
@@ -75,13 +173,19 @@ class AIAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
         {
             "competitor": "sber",
             "product": "deposits",
-            "urls": ["url1", "url2"]  // опционально
+            "urls": ["url1", "url2"],  // опционально
+            "from_corpus": true,       // опционально: текст из корпуса, без сети
+            "query": "вклад",          // опционально: отбор страниц корпуса
+            "criteria": ["sms", "rate"] // опционально: по умолчанию все критерии
         }
         """
         try:
             competitor = request.data.get('competitor')
             product = request.data.get('product')
             urls = request.data.get('urls', [])
+            from_corpus = bool(request.data.get('from_corpus', False))
+            query = request.data.get('query')
+            criteria = request.data.get('criteria') or None
             
             if not competitor or not product:
                 return Response(
@@ -91,7 +195,9 @@ class AIAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
             
             # Запускаем задачу в Celery
             from apps.tasks.celery_tasks import analyze_with_llm
-            task = analyze_with_llm.delay(competitor, product, urls)
+            task = analyze_with_llm.delay(
+                competitor, product, urls, from_corpus=from_corpus, query=query, criteria=criteria
+            )
             
             return Response({
                 'status': 'started',
@@ -112,6 +218,13 @@ class AIInsightsAPIView(APIView):
     Endpoint для получения AI insights по сравнению банков.
     
     GET /api/ai/insights/?banks=sber,vtb&product=deposits&criterion=cost
+    
+    Данные берутся из свёртки AIInsight: последний факт по каждой паре
+    банк/критерий, средняя уверенность и число изменений значения.
+    criterion можно передать списком через запятую.
+    
+    Фильтры и сортировка по разобранному значению выполняются в БД:
+    ?product=deposits&criterion=rate&percent_gte=4&ordering=-percent
     """
     
     permission_classes = [AllowAny]
@@ -123,10 +236,9 @@ class AIInsightsAPIView(APIView):
             product = request.query_params.get('product', 'deposits')
             criterion = request.query_params.get('criterion', '')
             
-            # Получаем анализы из БД
-            queryset = AIAnalysisResult.objects.filter(
-                analysis_type__in=['facts', 'comparison']
-            )
+            # Читаем свёртку: одна строка на (банк, продукт, критерий),
+            # объём не зависит от длины истории анализов
+            queryset = AIInsight.objects.all()
             
             if banks and banks[0]:
                 queryset = queryset.filter(competitor__in=banks)
@@ -135,9 +247,18 @@ class AIInsightsAPIView(APIView):
                 queryset = queryset.filter(product=product)
             
             if criterion:
-                queryset = queryset.filter(criterion=criterion)
+                criteria = [c for c in criterion.split(',') if c]
+                queryset = queryset.filter(criterion__in=criteria)
+            
+            queryset = filter_by_value(queryset, request.query_params)
+            
+            ordering = request.query_params.get('ordering')
+            if ordering:
+                queryset = order_by_value(queryset, ordering)
+            else:
+                queryset = queryset.order_by('-analysis_at', '-id')
             
-            insights = AIAnalysisResultSerializer(queryset[:20], many=True).data
+            insights = AIInsightSerializer(queryset[:20], many=True).data
             
             return Response({
                 'status': 'success',
@@ -147,9 +268,102 @@ class AIInsightsAPIView(APIView):
                 'criterion': criterion,
                 'insights': insights
             })
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error getting insights: {str(e)}")
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+def _parse_moment(value: Optional[str], param: str, end_of_day: bool = False):
+    """Дата или дата-время из query-параметра"""
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        moment = datetime.combine(day, time.max if end_of_day else time.min) if day else parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({param: 'Ожидается дата (YYYY-MM-DD) или дата-время'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class PageSearchAPIView(APIView):
+    """
+    Полнотекстовый поиск по сохранённому тексту страниц.
+    
+    GET /api/ai/pages/search/?q=кэшбэк&competitor=sber&product=cards&date_from=2024-01-01&limit=20
+    
+    Возвращает страницы с релевантностью и фрагментом текста вокруг
+    найденного слова; полный текст - GET /api/ai/pages/<id>/.
+    """
+    
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Обязательный параметр'})
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается число'})
+        
+        found = search(
+            query,
+            competitor=request.query_params.get('competitor'),
+            product=request.query_params.get('product'),
+            date_from=_parse_moment(request.query_params.get('date_from'), 'date_from'),
+            date_to=_parse_moment(request.query_params.get('date_to'), 'date_to', end_of_day=True),
+            limit=limit,
+        )
+        pages = [
+            {
+                'id': page.id,
+                'url': page.url,
+                'competitor': page.competitor,
+                'product': page.product,
+                'criterion': page.criterion,
+                'fetched_at': page.fetched_at,
+                'rank': round(rank, 6),
+                'snippet': snippet(page.text, query),
+            }
+            for page, rank in found
+        ]
+        return Response({
+            'status': 'success',
+            'query': query,
+            'count': len(pages),
+            'pages': pages
+        })
+
+
+class PageTextAPIView(APIView):
+    """
+    Сохранённый текст страницы.
+    
+    GET /api/ai/pages/<id>/
+    """
+    
+    permission_classes = [AllowAny]
+    
+    def get(self, request, pk):
+        try:
+            page = PageText.objects.get(pk=pk)
+        except PageText.DoesNotExist:
+            raise Http404
+        return Response({
+            'id': page.id,
+            'url': page.url,
+            'competitor': page.competitor,
+            'product': page.product,
+            'criterion': page.criterion,
+            'fetched_at': page.fetched_at,
+            'text': page.text,
+        })
@@ -1,5 +1,6 @@
-from django.contrib import admin
-from .models import Bank, Product, Criterion, Source, Snapshot, FeatureValue, ParseLog
+from django.contrib import admin, messages
+from .models import Bank, Product, Criterion, Source, Snapshot, FeatureValue, ParseLog, CrawlSchedule, CurrentComparison
+from .publishing import publish_snapshot
 
 
 @admin.register(Bank)
@@ -11,9 +12,9 @@ class BankAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'created_at')
+    list_display = ('id', 'name', 'current_snapshot', 'created_at')
     search_fields = ('id', 'name')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('current_snapshot', 'created_at', 'updated_at')
 
 
 @admin.register(Criterion)
@@ -32,11 +33,21 @@ class SourceAdmin(admin.ModelAdmin):
 
 @admin.register(Snapshot)
 class SnapshotAdmin(admin.ModelAdmin):
-    list_display = ('id', 'product', 'created_at', 'parsing_status', 'is_active')
+    list_display = ('id', 'product', 'created_at', 'parsing_status', 'is_active', 'published_at')
     list_filter = ('parsing_status', 'is_active', 'created_at')
     search_fields = ('product__name',)
-    readonly_fields = ('created_at',)
+    # is_active переключается только через публикацию
+    readonly_fields = ('created_at', 'is_active', 'published_at')
     date_hierarchy = 'created_at'
+    actions = ['publish']
+
+    @admin.action(description='Опубликовать снимок')
+    def publish(self, request, queryset):
+        for snapshot in queryset.order_by('created_at'):
+            try:
+                publish_snapshot(snapshot.id)
+            except ValueError as e:
+                self.message_user(request, str(e), level=messages.WARNING)
 
 
 @admin.register(FeatureValue)
@@ -48,6 +59,13 @@ class FeatureValueAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+@admin.register(CurrentComparison)
+class CurrentComparisonAdmin(admin.ModelAdmin):
+    list_display = ('product', 'bank', 'updated_at')
+    list_filter = ('product', 'bank')
+    readonly_fields = ('product', 'bank', 'values', 'confidence', 'sources', 'updated_at')
+
+
 @admin.register(ParseLog)
 class ParseLogAdmin(admin.ModelAdmin):
     list_display = ('id', 'source', 'status', 'created_at')
@@ -55,3 +73,11 @@ class ParseLogAdmin(admin.ModelAdmin):
     search_fields = ('source__name', 'message')
     readonly_fields = ('created_at',)
     date_hierarchy = 'created_at'
+
+
+@admin.register(CrawlSchedule)
+class CrawlScheduleAdmin(admin.ModelAdmin):
+    list_display = ('id', 'product', 'source', 'parser_type', 'is_enabled', 'interval', 'next_run_at', 'last_run_at')
+    list_filter = ('is_enabled', 'parser_type', 'source')
+    search_fields = ('product__name',)
+    readonly_fields = ('last_run_at', 'last_content_hash', 'run_count', 'change_count', 'created_at', 'updated_at')
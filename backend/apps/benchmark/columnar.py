@@ -0,0 +1,131 @@
+"""
+Компактный колоночный формат ответа /api/compare/.
+
+Вложенный {bank: {criterion: bool}} и confidence с ключами "bank.criterion"
+заменяются массивами:
+    banks, criteria - порядок строк и столбцов матрицы
+    values          - битовая маска значений, построчно (bank-major),
+                      старший бит первого байта - ячейка [0][0]
+    confidence      - уверенность по ячейкам в том же порядке
+                      (None / NaN - значения нет)
+
+В JSON маска передаётся строкой base64, confidence - списком; в MessagePack
+маска - байтами, confidence - упакованным массивом float32 (little-endian).
+"""
+
+import base64
+import math
+import struct
+from typing import Dict, List, Optional
+
+COLUMNAR_VERSION = 1
+# Поля ответа, которые переносятся без изменений
+HEADER_FIELDS = ('date', 'sources', 'note', 'product', 'is_mock')
+
+
+def is_comparison(data) -> bool:
+    """Похоже ли на ответ сравнения (а не на ошибку)"""
+    return isinstance(data, dict) and isinstance(data.get('data'), dict)
+
+
+def pack_bits(bits: List[bool]) -> bytes:
+    packed = bytearray((len(bits) + 7) // 8)
+    for start in range(0, len(bits), 8):
+        byte = 0
+        for bit in bits[start:start + 8]:
+            byte = (byte << 1) | bool(bit)
+        # Неполный последний байт добиваем нулями справа
+        packed[start >> 3] = byte << (8 - min(8, len(bits) - start))
+    return bytes(packed)
+
+
+def unpack_bits(packed: bytes, count: int) -> List[bool]:
+    return [bool(packed[i >> 3] & (0x80 >> (i & 7))) for i in range(count)]
+
+
+def to_columnar(payload: Dict) -> Dict:
+    """
+    Преобразовать ответ сравнения в колоночный вид.
+
+    Returns:
+        Словарь, где values - bytes, confidence - список float/None
+    """
+    nested = payload['data']
+    banks = list(nested)
+    criteria = []
+    seen = set()
+    for row in nested.values():
+        for criterion_id in row:
+            if criterion_id not in seen:
+                seen.add(criterion_id)
+                criteria.append(criterion_id)
+
+    bits = []
+    for bank_id in banks:
+        row = nested[bank_id]
+        bits.extend(bool(row.get(criterion_id)) for criterion_id in criteria)
+
+    # Ключи confidence - "bank.criterion"; разбираем их один раз,
+    # а не строим ключ для каждой ячейки матрицы
+    bank_index = {bank_id: i for i, bank_id in enumerate(banks)}
+    criterion_index = {criterion_id: i for i, criterion_id in enumerate(criteria)}
+    confidence = [None] * len(bits)
+    for key, value in (payload.get('confidence') or {}).items():
+        bank_id, _, criterion_id = key.partition('.')
+        if bank_id in bank_index and criterion_id in criterion_index:
+            confidence[bank_index[bank_id] * len(criteria) + criterion_index[criterion_id]] = value
+
+    columnar = {field: payload[field] for field in HEADER_FIELDS if field in payload}
+    columnar.update({
+        'format': 'columnar',
+        'version': COLUMNAR_VERSION,
+        'banks': banks,
+        'criteria': criteria,
+        'values': pack_bits(bits),
+        'confidence': confidence,
+    })
+    return columnar
+
+
+def encode_json(columnar: Dict) -> Dict:
+    """Вариант для JSON: маска в base64"""
+    return {**columnar, 'values': base64.b64encode(columnar['values']).decode('ascii')}
+
+
+def encode_msgpack(columnar: Dict) -> Dict:
+    """Вариант для MessagePack: confidence упаковывается во float32"""
+    confidence = [math.nan if c is None else c for c in columnar['confidence']]
+    return {**columnar, 'confidence': struct.pack(f'<{len(confidence)}f', *confidence)}
+
+
+def from_columnar(columnar: Dict) -> Dict:
+    """
+    Обратное преобразование в исходный вложенный формат
+    (принимает как JSON, так и MessagePack вариант).
+    """
+    banks = columnar['banks']
+    criteria = columnar['criteria']
+    cells = len(banks) * len(criteria)
+
+    values = columnar['values']
+    if isinstance(values, str):
+        values = base64.b64decode(values)
+    bits = unpack_bits(values, cells)
+
+    confidence: List[Optional[float]] = columnar['confidence']
+    if isinstance(confidence, (bytes, bytearray)):
+        confidence = [None if math.isnan(c) else c for c in struct.unpack(f'<{cells}f', confidence)]
+
+    data = {}
+    confidence_map = {}
+    for bank_index, bank_id in enumerate(banks):
+        data[bank_id] = {}
+        for criterion_index, criterion_id in enumerate(criteria):
+            cell = bank_index * len(criteria) + criterion_index
+            data[bank_id][criterion_id] = bits[cell]
+            if confidence[cell] is not None:
+                confidence_map[f'{bank_id}.{criterion_id}'] = confidence[cell]
+
+    payload = {field: columnar[field] for field in HEADER_FIELDS if field in columnar}
+    payload.update({'data': data, 'confidence': confidence_map})
+    return payload
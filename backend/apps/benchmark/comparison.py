@@ -0,0 +1,196 @@
+"""
+Материализованное сравнение банков (CurrentComparison).
+
+При публикации снимка rebuild_current_comparison() раскладывает его
+FeatureValue по строкам (продукт, банк). Перестройка инкрементальная:
+переписываются только строки, содержимое которых изменилось, и удаляются
+банки, которых нет в новом снимке. /api/compare/ читает готовые строки
+через get_comparison(), /api/compare/bulk/ - через get_comparisons().
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.utils import timezone
+
+from apps.benchmark.models import CurrentComparison, Product, Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def _collect_rows(snapshot: Snapshot) -> Dict[str, Dict]:
+    """Значения снимка, сгруппированные по банкам"""
+    rows = {}
+    features = snapshot.features.values_list(
+        'bank_id', 'criterion_id', 'value', 'confidence', 'source_id'
+    )
+    for bank_id, criterion_id, value, confidence, source_id in features:
+        row = rows.setdefault(bank_id, {'values': {}, 'confidence': {}, 'sources': {}})
+        row['values'][criterion_id] = value
+        if confidence is not None:
+            row['confidence'][criterion_id] = confidence
+        if source_id is not None:
+            row['sources'][criterion_id] = source_id
+    return rows
+
+
+def rebuild_current_comparison(snapshot: Snapshot) -> Dict[str, int]:
+    """
+    Привести CurrentComparison продукта к содержимому снимка.
+
+    Вызывается внутри транзакции публикации.
+
+    Returns:
+        Счётчики created/updated/deleted/unchanged
+    """
+    rows = _collect_rows(snapshot)
+    existing = {
+        row.bank_id: row
+        for row in CurrentComparison.objects.filter(product_id=snapshot.product_id)
+    }
+    now = timezone.now()
+
+    to_create = []
+    to_update = []
+    unchanged = 0
+    for bank_id, data in rows.items():
+        row = existing.get(bank_id)
+        if row is None:
+            to_create.append(CurrentComparison(
+                product_id=snapshot.product_id,
+                bank_id=bank_id,
+                **data
+            ))
+            continue
+
+        if any(getattr(row, field) != value for field, value in data.items()):
+            for field, value in data.items():
+                setattr(row, field, value)
+            row.updated_at = now
+            to_update.append(row)
+        else:
+            unchanged += 1
+
+    stale = [bank_id for bank_id in existing if bank_id not in rows]
+
+    CurrentComparison.objects.bulk_create(to_create)
+    CurrentComparison.objects.bulk_update(to_update, ['values', 'confidence', 'sources', 'updated_at'])
+    deleted, _ = CurrentComparison.objects.filter(
+        product_id=snapshot.product_id, bank_id__in=stale
+    ).delete()
+    # Неизменившиеся строки тоже переходят на новый снимок
+    CurrentComparison.objects.filter(product_id=snapshot.product_id).update(snapshot=snapshot)
+
+    stats = {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': deleted,
+        'unchanged': unchanged,
+    }
+    logger.info(f'Rebuilt current comparison for {snapshot.product_id} from snapshot {snapshot.id}: {stats}')
+    return stats
+
+
+def _build_comparison(rows: Dict[str, CurrentComparison], bank_ids: List[str], criteria: List[str]) -> Dict:
+    data = {}
+    confidence = {}
+    source_ids = set()
+    for bank_id in bank_ids:
+        row = rows.get(bank_id)
+        data[bank_id] = {}
+        for criterion_id in criteria:
+            if row is None or criterion_id not in row.values:
+                data[bank_id][criterion_id] = False
+                continue
+            data[bank_id][criterion_id] = row.values[criterion_id]
+            if row.confidence.get(criterion_id):
+                confidence[f'{bank_id}.{criterion_id}'] = row.confidence[criterion_id]
+            if row.sources.get(criterion_id):
+                source_ids.add(row.sources[criterion_id])
+
+    return {'data': data, 'confidence': confidence, 'source_ids': source_ids}
+
+
+def _snapshot_info(snapshot: Snapshot) -> Dict:
+    return {'id': snapshot.id, 'created_at': snapshot.created_at, 'note': snapshot.note}
+
+
+def get_comparison(product_id: str, bank_ids: Iterable[str], criteria: List[str]) -> Dict:
+    """
+    Сравнение банков по критериям из материализованной таблицы.
+
+    Отсутствующие значения считаются False, как и в FeatureValue-версии.
+    Снимок берётся из тех же строк, а не из кэша указателя: данные и
+    дата снимка в ответе не могут разойтись.
+
+    Returns:
+        {'data': {bank: {criterion: value}}, 'confidence': {'bank.criterion': c},
+         'source_ids': set(), 'snapshot': {id, created_at, note} или None,
+         если у продукта нет опубликованного снимка}
+    """
+    bank_ids = list(bank_ids)
+    rows = {
+        row.bank_id: row
+        for row in CurrentComparison.objects
+        .filter(product_id=product_id, bank_id__in=bank_ids)
+        .select_related('snapshot')
+        .only('bank_id', 'values', 'confidence', 'sources', 'snapshot__id', 'snapshot__created_at', 'snapshot__note')
+    }
+    comparison = _build_comparison(rows, bank_ids, criteria)
+
+    snapshot = next((row.snapshot for row in rows.values() if row.snapshot is not None), None)
+    if snapshot is None:
+        # Ни одного из запрошенных банков нет в снимке - снимок по указателю продукта
+        product = Product.objects.filter(id=product_id).select_related('current_snapshot').first()
+        snapshot = product.current_snapshot if product is not None else None
+    comparison['snapshot'] = _snapshot_info(snapshot) if snapshot is not None else None
+    return comparison
+
+
+def get_comparisons(requests: List[Dict]) -> List[Optional[Dict]]:
+    """
+    Сравнения для нескольких продуктов сразу.
+
+    Текущие снимки всех продуктов и строки CurrentComparison всех банков
+    читаются двумя запросами, независимо от числа запросов в пакете.
+
+    Args:
+        requests: [{'product': id, 'banks': [...], 'criteria': [...]}]
+
+    Returns:
+        Для каждого запроса - результат get_comparison() плюс 'snapshot'
+        (словарь id/created_at/note), либо None, если у продукта нет
+        опубликованного снимка
+    """
+    product_ids = {request['product'] for request in requests}
+    snapshots = {
+        product['id']: {
+            'id': product['current_snapshot_id'],
+            'created_at': product['current_snapshot__created_at'],
+            'note': product['current_snapshot__note'],
+        }
+        for product in Product.objects
+        .filter(id__in=product_ids, current_snapshot__isnull=False)
+        .values('id', 'current_snapshot_id', 'current_snapshot__created_at', 'current_snapshot__note')
+    }
+
+    wanted_banks = {bank_id for request in requests for bank_id in request['banks']}
+    rows = defaultdict(dict)
+    for row in (
+        CurrentComparison.objects
+        .filter(product_id__in=list(snapshots), bank_id__in=wanted_banks)
+        .only('product_id', 'bank_id', 'values', 'confidence', 'sources')
+    ):
+        rows[row.product_id][row.bank_id] = row
+
+    results = []
+    for request in requests:
+        snapshot = snapshots.get(request['product'])
+        if snapshot is None:
+            results.append(None)
+            continue
+        comparison = _build_comparison(rows[request['product']], list(request['banks']), request['criteria'])
+        comparison['snapshot'] = snapshot
+        results.append(comparison)
+    return results
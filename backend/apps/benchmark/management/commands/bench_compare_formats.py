@@ -0,0 +1,89 @@
+"""
+Management command для сравнения форматов ответа /api/compare/:
+размер ответа и время кодирования для матриц разного размера.
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from apps.benchmark import columnar
+from apps.benchmark.renderers import ColumnarJSONRenderer, MessagePackRenderer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark payload size and encode time of /api/compare/ response formats'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='5x10,50x50,200x200,1000x300',
+            help='Размеры матрицы банки x критерии через запятую'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов на замер (берётся медиана)')
+        parser.add_argument('--confidence', type=float, default=0.8, help='Доля ячеек с confidence')
+
+    def handle(self, *args, **options):
+        renderers = [
+            ('json', JSONRenderer()),
+            ('columnar', ColumnarJSONRenderer()),
+            ('msgpack', MessagePackRenderer()),
+        ]
+
+        self.stdout.write(f'{"size":>10} {"format":>9} {"bytes":>11} {"ratio":>6} {"encode ms":>10}')
+
+        for size in [s.strip() for s in options['sizes'].split(',') if s.strip()]:
+            banks, criteria = (int(part) for part in size.split('x'))
+            payload = self._payload(banks, criteria, options['confidence'])
+
+            baseline = None
+            for name, renderer in renderers:
+                timings = []
+                for _ in range(max(options['repeat'], 1)):
+                    started = time.perf_counter()
+                    content = renderer.render(payload)
+                    timings.append(time.perf_counter() - started)
+
+                if name == 'json':
+                    baseline = len(content)
+                else:
+                    self._check_roundtrip(name, content, payload)
+
+                self.stdout.write(
+                    f'{size:>10} {name:>9} {len(content):>11} {len(content) / baseline:>6.2f} '
+                    f'{statistics.median(timings) * 1000:>10.2f}'
+                )
+
+    def _payload(self, banks, criteria, confidence_share):
+        rng = random.Random(42)
+        data = {}
+        confidence = {}
+        for b in range(banks):
+            bank_id = f'bank{b}'
+            data[bank_id] = {}
+            for c in range(criteria):
+                criterion_id = f'criterion_{c}'
+                data[bank_id][criterion_id] = rng.random() > 0.5
+                if rng.random() < confidence_share:
+                    confidence[f'{bank_id}.{criterion_id}'] = round(rng.uniform(0.5, 1.0), 2)
+        return {
+            'date': '2024-01-01T00:00:00',
+            'sources': [{'id': 1, 'name': 'Banki.ru', 'url': 'https://banki.ru'}],
+            'data': data,
+            'confidence': confidence,
+            'note': 'benchmark',
+            'product': 'deposits',
+            'is_mock': False,
+        }
+
+    def _check_roundtrip(self, name, content, payload):
+        import json
+        import msgpack
+
+        decoded = msgpack.unpackb(content, raw=False) if name == 'msgpack' else json.loads(content)
+        restored = columnar.from_columnar(decoded)
+        if restored['data'] != payload['data'] or len(restored['confidence']) != len(payload['confidence']):
+            self.stderr.write(self.style.ERROR(f'{name}: roundtrip mismatch'))
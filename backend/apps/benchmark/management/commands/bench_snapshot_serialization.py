@@ -0,0 +1,115 @@
+"""
+Management command для замера сериализации списка снимков
+в зависимости от числа значений критериев в снимке.
+
+Данные создаются во временной транзакции и откатываются после замера.
+"""
+
+import math
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from apps.benchmark.models import Bank, Criterion, FeatureValue, Product, Snapshot, Source
+from apps.benchmark.serializers import SnapshotSerializer
+from apps.benchmark.views import SnapshotListView
+
+
+class Command(BaseCommand):
+    help = 'Benchmark SnapshotListView serialization time against feature counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--features',
+            default='10,100,1000',
+            help='Число значений критериев в одном снимке, через запятую'
+        )
+        parser.add_argument('--snapshots', type=int, default=10, help='Снимков на продукт')
+        parser.add_argument('--banks', type=int, default=20, help='Число банков')
+        parser.add_argument('--repeat', type=int, default=3, help='Повторов на замер (берётся медиана)')
+
+    def handle(self, *args, **options):
+        feature_counts = [int(c) for c in options['features'].split(',') if c.strip()]
+
+        self.stdout.write(
+            f'{"features":>9} {"mode":>16} {"ms":>9} {"queries":>8} {"bytes":>11}'
+        )
+
+        with transaction.atomic():
+            banks = Bank.objects.bulk_create([
+                Bank(id=f'bench-bank-{i}', name=f'Bench bank {i}') for i in range(options['banks'])
+            ])
+            source = Source.objects.create(name='bench-source', url='https://example.com')
+
+            for count in feature_counts:
+                product = self._create_product(count, banks, source, options['snapshots'])
+                url = f'/api/snapshots/{product.id}/'
+                modes = [
+                    ('legacy (nested)', lambda: self._legacy(product)),
+                    ('headers', lambda: self._view(url, product)),
+                    ('include=features', lambda: self._view(f'{url}?include=features', product)),
+                ]
+                for name, run in modes:
+                    elapsed, queries, size = self._measure(run, options['repeat'])
+                    self.stdout.write(
+                        f'{count:>9} {name:>16} {elapsed * 1000:>9.1f} {queries:>8} {size:>11}'
+                    )
+
+            transaction.set_rollback(True)
+
+    def _create_product(self, count, banks, source, snapshots) -> Product:
+        product = Product.objects.create(id=f'bench-{count}', name=f'Bench {count}')
+        criteria_count = math.ceil(count / len(banks))
+        criteria = Criterion.objects.bulk_create([
+            Criterion(id=f'bench-{count}-c{i}', name=f'Criterion {i}') for i in range(criteria_count)
+        ])
+
+        for _ in range(snapshots):
+            snapshot = Snapshot.objects.create(product=product, parsing_status='completed')
+            FeatureValue.objects.bulk_create([
+                FeatureValue(
+                    snapshot=snapshot,
+                    bank=banks[i % len(banks)],
+                    criterion=criteria[i // len(banks)],
+                    value=i % 2 == 0,
+                    confidence=0.9,
+                    source=source,
+                    source_url='https://example.com/page',
+                    raw_data={'value': i % 2 == 0},
+                )
+                for i in range(count)
+            ], batch_size=1000)
+        return product
+
+    def _legacy(self, product) -> bytes:
+        """Прежняя реализация: последние 10 снимков с вложенными значениями без prefetch"""
+        snapshots = Snapshot.objects.select_related('product').filter(product=product)[:10]
+        data = {'count': len(snapshots), 'results': SnapshotSerializer(snapshots, many=True).data}
+        return JSONRenderer().render(data)
+
+    def _view(self, url, product) -> bytes:
+        request = APIRequestFactory().get(url, HTTP_HOST='localhost')
+        response = SnapshotListView.as_view()(request, product_id=product.id)
+        response.render()
+        return response.content
+
+    def _measure(self, run, repeat):
+        timings = []
+        queries = 0
+        for _ in range(max(repeat, 1)):
+            counter = [0]
+
+            def count_queries(execute, sql, params, many, context):
+                counter[0] += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_queries):
+                started = time.perf_counter()
+                content = run()
+                timings.append(time.perf_counter() - started)
+            queries = counter[0]
+        return statistics.median(timings), queries, len(content)
@@ -0,0 +1,260 @@
+"""
+Management command для генерации синтетических данных в объёме,
+близком к рабочему: банки, продукты, критерии, история снимков со
+значениями и факты AI анализа.
+
+Все объекты получают id с префиксом (--prefix), поэтому их можно удалить
+(--clear), не трогая данные init_data. Значения критериев меняются от
+снимка к снимку с вероятностью --change-rate, raw_data повторяет вывод
+парсера (текст факта, уверенность, источник). Запись идёт bulk_create
+пачками --batch-size.
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.ai.insights import AIInsight, update_insights
+from apps.ai.llm_service import AIAnalysisResult
+from apps.ai.values import value_columns
+from apps.benchmark.models import Bank, Criterion, FeatureValue, Product, Snapshot, Source
+from apps.benchmark.publishing import invalidate_current_snapshot, publish_snapshot
+from apps.tasks.scheduler import compute_content_hash
+
+# Шаблоны текста факта по виду критерия: (наличие критерия, текст)
+FACT_TEMPLATES = {
+    'rate': lambda rng: (True, f'Ставка до {rng.uniform(3, 22):.1f}% годовых'),
+    'interest': lambda rng: rng.choice([
+        (True, f'Процент на остаток {rng.uniform(1, 16):.1f}% годовых'),
+        (False, 'нет данных'),
+    ]),
+    'cashback': lambda rng: (True, f'Кэшбэк {rng.choice([1, 1.5, 2, 3, 5, 10])}% на покупки'),
+    'cost': lambda rng: rng.choice([
+        (False, 'Обслуживание бесплатно'),
+        (True, f'Обслуживание {rng.choice([99, 149, 199, 299, 490])} ₽ в месяц'),
+        (True, f'Обслуживание {rng.choice([490, 990, 1490, 3000])} ₽ в год'),
+    ]),
+    'sms': lambda rng: rng.choice([
+        (False, 'СМС-уведомления бесплатно'),
+        (True, f'СМС-уведомления {rng.choice([49, 59, 79, 99])} ₽ в месяц'),
+    ]),
+    'withdrawal': lambda rng: rng.choice([
+        (True, 'Снятие наличных без комиссии'),
+        (False, f'Комиссия за снятие {rng.choice([1, 1.5, 2, 3])}%'),
+    ]),
+    'transfers': lambda rng: rng.choice([
+        (True, 'Переводы по реквизитам без комиссии до 100 000 ₽ в месяц'),
+        (False, f'Переводы по реквизитам {rng.choice([0.5, 1, 1.5])}%'),
+    ]),
+    'limit': lambda rng: (True, f'Кредитный лимит до {rng.choice([300, 500, 700, 1000])} тыс. рублей'),
+    'payment': lambda rng: (True, f'Первоначальный взнос от {rng.choice([0, 10, 15, 20, 30])}%'),
+    'loyalty': lambda rng: rng.choice([
+        (True, f'Бонусы {rng.choice([0.5, 1, 2])}% баллами'),
+        (False, 'нет данных'),
+    ]),
+    'grace': lambda rng: (True, f'Льготный период до {rng.choice([50, 55, 100, 120, 200])} дней'),
+}
+KINDS = list(FACT_TEMPLATES)
+SOURCE_NAMES = ['Banki.ru', 'Sravni.ru', 'Официальный сайт', 'RBC', 'Выписка тарифов']
+# Отдельная метка: синтетические факты не смешиваются с ответами LLM, шаблонов
+# (heuristic) и правил (rules) в метриках и выборках по llm_model
+SYNTHETIC_MODEL_NAME = 'synthetic'
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic banks, products, criteria, snapshots and AI facts at realistic scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--banks', type=int, default=100)
+        parser.add_argument('--products', type=int, default=10)
+        parser.add_argument('--criteria', type=int, default=40, help='Всего критериев')
+        parser.add_argument('--criteria-per-product', type=int, default=15)
+        parser.add_argument('--snapshots', type=int, default=12, help='Снимков на продукт')
+        parser.add_argument('--snapshot-interval', type=float, default=24, help='Часов между снимками')
+        parser.add_argument('--change-rate', type=float, default=0.03, help='Доля значений, меняющихся между снимками')
+        parser.add_argument('--ai-results', type=int, default=2, help='Фактов AI на банк/продукт/критерий')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='syn', help='Префикс id синтетических объектов')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help='Удалить ранее сгенерированные данные')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = max(options['batch_size'], 1)
+        started = time.perf_counter()
+
+        if options['clear']:
+            self._clear()
+
+        banks, criteria, products, sources = self._create_reference(options)
+        features = ai_results = 0
+        for product in products:
+            product_criteria = self.rng.sample(criteria, min(options['criteria_per_product'], len(criteria)))
+            states = {
+                (bank.id, criterion.id): self._fact(criterion.id)
+                for bank in banks for criterion in product_criteria
+            }
+            with transaction.atomic():
+                features += self._create_snapshots(product, banks, product_criteria, sources, states, options)
+                ai_results += self._create_ai_results(product, banks, product_criteria, states, options)
+            invalidate_current_snapshot(product.id)
+            self.stdout.write(f'  {product.id}: {len(product_criteria)} criteria')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(banks)} banks, {len(products)} products, {len(criteria)} criteria, '
+            f'{len(products) * options["snapshots"]} snapshots, {features} feature values, '
+            f'{ai_results} AI results in {elapsed:.1f}s'
+        ))
+
+    def _clear(self):
+        prefix = f'{self.prefix}-'
+        AIInsight.objects.filter(competitor__startswith=prefix).delete()
+        AIAnalysisResult.objects.filter(competitor__startswith=prefix).delete()
+        Product.objects.filter(id__startswith=prefix).update(current_snapshot=None)
+        FeatureValue.objects.filter(snapshot__product__id__startswith=prefix).delete()
+        Snapshot.objects.filter(product__id__startswith=prefix).delete()
+        for model in (Product, Bank, Criterion):
+            model.objects.filter(id__startswith=prefix).delete()
+        Source.objects.filter(name__startswith=prefix).delete()
+        self.stdout.write('Removed previously generated data')
+
+    def _create_reference(self, options):
+        prefix = self.prefix
+        banks = [
+            Bank(id=f'{prefix}-bank-{i}', name=f'Синтетический банк {i}', website=f'https://{prefix}-bank-{i}.ru')
+            for i in range(options['banks'])
+        ]
+        # Вид критерия определяет шаблон текста факта
+        self.kinds = {
+            f'{prefix}-{KINDS[i % len(KINDS)]}-{i}': KINDS[i % len(KINDS)]
+            for i in range(options['criteria'])
+        }
+        criteria = [
+            Criterion(id=criterion_id, name=f'{kind.title()} {criterion_id.rsplit("-", 1)[-1]}')
+            for criterion_id, kind in self.kinds.items()
+        ]
+        products = [
+            Product(id=f'{prefix}-product-{i}', name=f'Синтетический продукт {i}')
+            for i in range(options['products'])
+        ]
+        sources = [
+            Source(name=f'{prefix}-{name}', url=f'https://{prefix}-source-{i}.ru')
+            for i, name in enumerate(SOURCE_NAMES)
+        ]
+        for model, objects in ((Bank, banks), (Criterion, criteria), (Product, products), (Source, sources)):
+            model.objects.bulk_create(objects, batch_size=self.batch_size, ignore_conflicts=True)
+        sources = list(Source.objects.filter(name__in=[source.name for source in sources]))
+        return banks, criteria, products, sources
+
+    def _fact(self, criterion_id: str):
+        present, text = FACT_TEMPLATES[self.kinds[criterion_id]](self.rng)
+        return present, text, round(self.rng.uniform(0.6, 1.0), 2)
+
+    def _create_snapshots(self, product, banks, criteria, sources, states, options) -> int:
+        now = timezone.now()
+        interval = timedelta(hours=options['snapshot_interval'])
+        count = max(options['snapshots'], 1)
+        snapshot_ids = []
+        created = 0
+        batch = []
+
+        for index in range(count):
+            created_at = now - interval * (count - 1 - index)
+            if index:
+                # Небольшая доля значений меняется между соседними снимками
+                for key in states:
+                    if self.rng.random() < options['change_rate']:
+                        states[key] = self._fact(key[1])
+
+            values = {}
+            for (bank_id, criterion_id), (present, _, _) in states.items():
+                values.setdefault(bank_id, {})[criterion_id] = present
+
+            snapshot = Snapshot.objects.create(
+                product=product,
+                parsing_status='completed',
+                note=f'Synthetic snapshot {index + 1}/{count}',
+                content_hash=compute_content_hash(values),
+                completed_banks=[bank.id for bank in banks],
+            )
+            snapshot.created_at = created_at
+            snapshot_ids.append(snapshot.id)
+
+            for (bank_id, criterion_id), (present, text, confidence) in states.items():
+                source = sources[self.rng.randrange(len(sources))]
+                source_url = f'https://{bank_id}.ru/{product.id}/{criterion_id}'
+                batch.append(FeatureValue(
+                    snapshot=snapshot,
+                    bank_id=bank_id,
+                    criterion_id=criterion_id,
+                    value=present,
+                    confidence=confidence,
+                    source=source,
+                    source_url=source_url,
+                    raw_data={
+                        'value': present,
+                        'confidence': confidence,
+                        'source_name': source.name,
+                        'source_url': source_url,
+                        'text': text,
+                        'parsed_at': created_at.isoformat(),
+                    },
+                ))
+                if len(batch) >= self.batch_size:
+                    FeatureValue.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            Snapshot.objects.filter(id=snapshot.id).update(created_at=created_at)
+
+        if batch:
+            FeatureValue.objects.bulk_create(batch)
+            created += len(batch)
+
+        # Последний снимок - текущий (пересобирает CurrentComparison)
+        publish_snapshot(snapshot_ids[-1])
+        return created
+
+    def _create_ai_results(self, product, banks, criteria, states, options) -> int:
+        if options['ai_results'] <= 0:
+            return 0
+
+        now = timezone.now()
+        created = 0
+        batch = []
+        for bank in banks:
+            for criterion in criteria:
+                present, text, confidence = states[(bank.id, criterion.id)]
+                for index in range(options['ai_results']):
+                    # Ранние факты - прежние значения, последний - текущее
+                    value = text if index == options['ai_results'] - 1 else self._fact(criterion.id)[1]
+                    batch.append(AIAnalysisResult(
+                        competitor=bank.id,
+                        product=product.id,
+                        criterion=criterion.id,
+                        analysis_type='facts',
+                        value=value,
+                        **value_columns(value),
+                        source_url=f'https://{bank.id}.ru/{product.id}/{criterion.id}',
+                        parsed_at=now - timedelta(days=options['ai_results'] - index),
+                        llm_model=SYNTHETIC_MODEL_NAME,
+                        confidence_score=confidence,
+                        raw_response={'fact': value, 'confidence': confidence},
+                    ))
+                    if len(batch) >= self.batch_size:
+                        created += self._store_ai_results(batch)
+                        batch = []
+        if batch:
+            created += self._store_ai_results(batch)
+        return created
+
+    def _store_ai_results(self, batch) -> int:
+        results = AIAnalysisResult.objects.bulk_create(batch)
+        # Свёртка AIInsight - как при записи результатов LLMService
+        update_insights(results)
+        return len(results)
@@ -2,8 +2,13 @@
 Management command для инициализации начальных данных
 """
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from apps.benchmark.models import Bank, Product, Criterion, Source
+from django.utils import timezone
+
+from apps.benchmark.models import Bank, Product, Criterion, Source, CrawlSchedule
 
 
 class Command(BaseCommand):
@@ -90,4 +95,23 @@ class Command(BaseCommand):
             if created:
                 self.stdout.write(f'✓ Created source: {source_name}')
 
+        # Create crawl schedules (first runs are spread over the stagger window)
+        now = timezone.now()
+        for index, (product_id, product_name) in enumerate(products_data):
+            schedule, created = CrawlSchedule.objects.get_or_create(
+                product_id=product_id,
+                source=None,
+                parser_type='mock',
+                defaults={
+                    'interval': settings.CRAWL_DEFAULT_INTERVAL,
+                    'min_interval': settings.CRAWL_MIN_INTERVAL,
+                    'max_interval': settings.CRAWL_MAX_INTERVAL,
+                    'next_run_at': now + timedelta(
+                        seconds=index * settings.CRAWL_STAGGER_WINDOW // len(products_data)
+                    ),
+                }
+            )
+            if created:
+                self.stdout.write(f'✓ Created crawl schedule: {product_name}')
+
         self.stdout.write(self.style.SUCCESS('✓ Data initialization completed!'))
@@ -0,0 +1,220 @@
+"""
+Management command для нагрузочного теста API: /api/compare/,
+/api/snapshots/ и /api/ai/insights/ с заданной интенсивностью.
+
+Нагрузка открытая: запросы отправляются по расписанию --rps независимо от
+того, успели ли ответить предыдущие, а задержка считается от момента по
+расписанию. Если сервер не успевает, ожидание в очереди попадает в
+перцентили, а не прячется (coordinated omission). --concurrency
+ограничивает число одновременных запросов.
+
+Параметры запросов берутся из БД: опубликованные продукты, их банки и
+критерии, по умолчанию - синтетические (generate_synthetic_data). Без
+--base-url запросы идут на встроенный WSGI сервер в этом же процессе.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+
+from apps.benchmark.models import FeatureValue, Product
+
+ENDPOINTS = ('compare', 'snapshots', 'insights')
+PERCENTILES = (50, 90, 95, 99)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Без строки в лог на каждый запрос"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """Доли эндпоинтов: "compare:5,snapshots:2,insights:3" """
+    mix = []
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition(':')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(f'Unknown endpoint in --mix: {name}')
+        mix.append((name, float(weight or 1)))
+    if not mix:
+        raise CommandError('Empty --mix')
+    return mix
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Перцентиль по ближайшему рангу (values отсортированы)"""
+    if not values:
+        return 0.0
+    rank = max(int(round(p / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Load-test /api/compare/, /api/snapshots/ and /api/ai/insights/ at a target RPS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rps', type=float, default=50, help='Запросов в секунду')
+        parser.add_argument('--duration', type=float, default=30, help='Длительность, сек')
+        parser.add_argument('--concurrency', type=int, default=64, help='Одновременных запросов не больше')
+        parser.add_argument('--mix', default='compare:5,snapshots:2,insights:3', help='Доли эндпоинтов')
+        parser.add_argument('--base-url', default='', help='Адрес сервера (без него - встроенный сервер)')
+        parser.add_argument('--prefix', default='syn', help="Префикс синтетических продуктов ('' - все)")
+        parser.add_argument('--banks', type=int, default=10, help='Банков в запросе')
+        parser.add_argument('--criteria', type=int, default=10, help='Критериев в запросе compare')
+        parser.add_argument('--format', default='', help='format для compare (columnar, msgpack)')
+        parser.add_argument('--timeout', type=float, default=10, help='Таймаут запроса, сек')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['rps'] <= 0 or options['duration'] <= 0:
+            raise CommandError('--rps and --duration must be positive')
+        mix = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+        targets = self._targets(options)
+
+        server = None
+        base_url = options['base_url'].rstrip('/')
+        if not base_url:
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+            server.daemon_threads = True
+            server.set_app(get_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            host, port = server.server_address[:2]
+            base_url = f'http://{host}:{port}'
+
+        total = int(options['rps'] * options['duration'])
+        names = [name for name, _ in mix]
+        weights = [weight for _, weight in mix]
+        plan = []
+        for _ in range(total):
+            name = rng.choices(names, weights)[0]
+            plan.append((name, self._path(name, rng.choice(targets), rng, options)))
+
+        self.stdout.write(
+            f'{base_url}: {total} requests at {options["rps"]:g} rps, '
+            f'concurrency {options["concurrency"]}, {len(targets)} products'
+        )
+        # Логи запросов Django (warning на 4xx) мешают отчёту
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        try:
+            results, elapsed = asyncio.run(self._run(base_url, plan, options))
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        self._report(results, elapsed)
+
+    def _targets(self, options) -> List[Dict]:
+        """Продукты с опубликованным снимком, их банки и критерии"""
+        products = Product.objects.filter(current_snapshot__isnull=False)
+        if options['prefix']:
+            products = products.filter(id__startswith=f'{options["prefix"]}-')
+
+        targets = []
+        for product_id, snapshot_id in products.values_list('id', 'current_snapshot_id'):
+            features = FeatureValue.objects.filter(snapshot_id=snapshot_id)
+            banks = sorted(set(features.values_list('bank_id', flat=True)))
+            criteria = sorted(set(features.values_list('criterion_id', flat=True)))
+            if banks and criteria:
+                targets.append({'product': product_id, 'banks': banks, 'criteria': criteria})
+
+        if not targets:
+            raise CommandError(
+                'No published products to query, run generate_synthetic_data first '
+                'or pass --prefix "" to use all products'
+            )
+        return targets
+
+    def _path(self, name: str, target: Dict, rng: random.Random, options) -> str:
+        banks = rng.sample(target['banks'], min(options['banks'], len(target['banks'])))
+        if name == 'compare':
+            criteria = rng.sample(target['criteria'], min(options['criteria'], len(target['criteria'])))
+            params = {'product': target['product'], 'banks': ','.join(banks), 'criteria': ','.join(criteria)}
+            if options['format']:
+                params['format'] = options['format']
+            return f'/api/compare/?{urlencode(params)}'
+        if name == 'snapshots':
+            return f'/api/snapshots/{target["product"]}/'
+        params = {
+            'product': target['product'],
+            'banks': ','.join(banks),
+            'criterion': rng.choice(target['criteria']),
+        }
+        return f'/api/ai/insights/?{urlencode(params)}'
+
+    async def _run(self, base_url: str, plan: List[Tuple[str, str]], options):
+        semaphore = asyncio.Semaphore(max(options['concurrency'], 1))
+        results = []
+        limits = httpx.Limits(max_connections=options['concurrency'], max_keepalive_connections=options['concurrency'])
+
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            timeout=options['timeout'],
+            limits=limits,
+        ) as client:
+            async def send(name: str, path: str, scheduled: float):
+                async with semaphore:
+                    try:
+                        response = await client.get(path)
+                        await response.aread()
+                        ok = response.status_code < 400
+                        status = response.status_code
+                    except httpx.HTTPError as e:
+                        ok, status = False, type(e).__name__
+                results.append((name, time.perf_counter() - scheduled, ok, status))
+
+            interval = 1 / options['rps']
+            started = time.perf_counter()
+            tasks = []
+            for index, (name, path) in enumerate(plan):
+                scheduled = started + index * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(name, path, scheduled)))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+        return results, elapsed
+
+    def _report(self, results, elapsed: float):
+        groups = {}
+        for name, latency, ok, status in results:
+            groups.setdefault(name, []).append((latency, ok, status))
+        groups['total'] = [(latency, ok, status) for _, latency, ok, status in results]
+
+        header = f'{"endpoint":>10} {"count":>7} {"errors":>7} {"rps":>7}'
+        header += ''.join(f' {f"p{p} ms":>9}' for p in PERCENTILES) + f' {"max ms":>9}'
+        self.stdout.write(header)
+        for name in [*ENDPOINTS, 'total']:
+            rows = groups.get(name)
+            if not rows:
+                continue
+            latencies = sorted(latency * 1000 for latency, _, _ in rows)
+            errors = sum(1 for _, ok, _ in rows if not ok)
+            line = f'{name:>10} {len(rows):>7} {errors:>7} {len(rows) / elapsed:>7.1f}'
+            line += ''.join(f' {percentile(latencies, p):>9.1f}' for p in PERCENTILES)
+            line += f' {latencies[-1]:>9.1f}'
+            self.stdout.write(line)
+
+        statuses = {}
+        for _, _, ok, status in results:
+            if not ok:
+                statuses[status] = statuses.get(status, 0) + 1
+        if statuses:
+            self.stdout.write('Errors: ' + ', '.join(f'{status}: {count}' for status, count in statuses.items()))
+        self.stdout.write(self.style.SUCCESS(f'Finished in {elapsed:.1f}s'))
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benchmark', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snapshot',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='Хеш распарсенных значений (для определения изменений)', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='CrawlSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parser_type', models.CharField(default='mock', max_length=50)),
+                ('is_enabled', models.BooleanField(default=True)),
+                ('interval', models.PositiveIntegerField(help_text='Текущий интервал между запусками, сек')),
+                ('min_interval', models.PositiveIntegerField(help_text='Минимальный интервал, сек')),
+                ('max_interval', models.PositiveIntegerField(help_text='Максимальный интервал, сек')),
+                ('next_run_at', models.DateTimeField(db_index=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_content_hash', models.CharField(blank=True, max_length=64)),
+                ('run_count', models.PositiveIntegerField(default=0)),
+                ('change_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crawl_schedules', to='benchmark.product')),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='benchmark.source')),
+            ],
+            options={
+                'verbose_name': 'Расписание парсинга',
+                'verbose_name_plural': 'Расписания парсинга',
+                'ordering': ['next_run_at'],
+                'indexes': [models.Index(fields=['is_enabled', 'next_run_at'], name='benchmark_c_is_enab_58c3cf_idx')],
+                'unique_together': {('product', 'source', 'parser_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benchmark', '0002_crawl_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snapshot',
+            name='completed_banks',
+            field=models.JSONField(blank=True, default=list, help_text='Чекпоинт: банки, данные которых уже сохранены в снимке'),
+        ),
+        migrations.AddField(
+            model_name='snapshot',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Ключ запуска парсинга: повторная доставка задачи продолжает этот же снимок', max_length=255, null=True, unique=True),
+        ),
+    ]
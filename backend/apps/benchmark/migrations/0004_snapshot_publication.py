@@ -0,0 +1,54 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def set_current_snapshots(apps, schema_editor):
+    """
+    Текущим становится последний завершённый снимок продукта, предпочтительно
+    активный (его и отдавал CompareAPIView); остальные деактивируются.
+    Продукт без завершённых снимков остаётся без опубликованного.
+    """
+    Product = apps.get_model('benchmark', 'Product')
+    Snapshot = apps.get_model('benchmark', 'Snapshot')
+
+    for product in Product.objects.all():
+        completed = Snapshot.objects.filter(product=product, parsing_status='completed').order_by('-created_at')
+        current = completed.filter(is_active=True).first() or completed.first()
+        if current is None:
+            continue
+        Snapshot.objects.filter(product=product, is_active=True).exclude(id=current.id).update(is_active=False)
+        Snapshot.objects.filter(id=current.id).update(is_active=True, published_at=current.created_at)
+        product.current_snapshot = current
+        product.save(update_fields=['current_snapshot'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benchmark', '0003_snapshot_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='current_snapshot',
+            field=models.ForeignKey(blank=True, help_text='Опубликованный снимок, который отдаётся читателям (см. publishing.py)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='benchmark.snapshot'),
+        ),
+        migrations.AddField(
+            model_name='snapshot',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='snapshot',
+            name='is_active',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(set_current_snapshots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='snapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('product',), name='unique_active_snapshot_per_product'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_current_comparison(apps, schema_editor):
+    """Заполнить таблицу по текущим опубликованным снимкам"""
+    Product = apps.get_model('benchmark', 'Product')
+    FeatureValue = apps.get_model('benchmark', 'FeatureValue')
+    CurrentComparison = apps.get_model('benchmark', 'CurrentComparison')
+
+    for product in Product.objects.exclude(current_snapshot=None):
+        rows = {}
+        features = FeatureValue.objects.filter(snapshot_id=product.current_snapshot_id).values_list(
+            'bank_id', 'criterion_id', 'value', 'confidence', 'source_id'
+        )
+        for bank_id, criterion_id, value, confidence, source_id in features:
+            row = rows.setdefault(bank_id, CurrentComparison(
+                product=product, bank_id=bank_id, values={}, confidence={}, sources={}
+            ))
+            row.values[criterion_id] = value
+            if confidence is not None:
+                row.confidence[criterion_id] = confidence
+            if source_id is not None:
+                row.sources[criterion_id] = source_id
+        CurrentComparison.objects.bulk_create(rows.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benchmark', '0004_snapshot_publication'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentComparison',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('values', models.JSONField(default=dict, help_text='{criterion_id: value}')),
+                ('confidence', models.JSONField(default=dict, help_text='{criterion_id: confidence}')),
+                ('sources', models.JSONField(default=dict, help_text='{criterion_id: source_id}')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='benchmark.bank')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='current_comparison', to='benchmark.product')),
+            ],
+            options={
+                'verbose_name': 'Текущее сравнение',
+                'verbose_name_plural': 'Текущие сравнения',
+                'ordering': ['product', 'bank'],
+                'unique_together': {('product', 'bank')},
+            },
+        ),
+        migrations.RunPython(build_current_comparison, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.8 on 2026-10-19 20:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_snapshot(apps, schema_editor):
+    """Строки собраны по текущему снимку продукта"""
+    Product = apps.get_model('benchmark', 'Product')
+    CurrentComparison = apps.get_model('benchmark', 'CurrentComparison')
+
+    for product_id, snapshot_id in Product.objects.exclude(current_snapshot=None).values_list(
+        'id', 'current_snapshot_id'
+    ):
+        CurrentComparison.objects.filter(product_id=product_id).update(snapshot_id=snapshot_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benchmark', '0005_current_comparison'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currentcomparison',
+            name='snapshot',
+            field=models.ForeignKey(blank=True, help_text='Снимок, по которому собрана строка', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='benchmark.snapshot'),
+        ),
+        migrations.RunPython(fill_snapshot, migrations.RunPython.noop),
+    ]
@@ -23,6 +23,14 @@ class Product(models.Model):
     id = models.SlugField(primary_key=True, max_length=100)
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
+    current_snapshot = models.ForeignKey(
+        'Snapshot',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Опубликованный снимок, который отдаётся читателям (см. publishing.py)'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -74,7 +82,9 @@ class Snapshot(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='snapshots')
     created_at = models.DateTimeField(auto_now_add=True)
     note = models.TextField(blank=True)
-    is_active = models.BooleanField(default=True)
+    # Снимок невидим, пока пишется; активным его делает publish_snapshot()
+    is_active = models.BooleanField(default=False)
+    published_at = models.DateTimeField(null=True, blank=True)
     parsing_status = models.CharField(
         max_length=20,
         choices=[
@@ -85,6 +95,23 @@ class Snapshot(models.Model):
         ],
         default='pending'
     )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text='Хеш распарсенных значений (для определения изменений)'
+    )
+    idempotency_key = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text='Ключ запуска парсинга: повторная доставка задачи продолжает этот же снимок'
+    )
+    completed_banks = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Чекпоинт: банки, данные которых уже сохранены в снимке'
+    )
 
     class Meta:
         ordering = ['-created_at']
@@ -94,10 +121,23 @@ class Snapshot(models.Model):
             models.Index(fields=['product', '-created_at']),
             models.Index(fields=['created_at']),
         ]
+        constraints = [
+            # Не больше одного опубликованного снимка на продукт
+            models.UniqueConstraint(
+                fields=['product'],
+                condition=models.Q(is_active=True),
+                name='unique_active_snapshot_per_product',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.product.name} - {self.created_at.strftime("%Y-%m-%d %H:%M")}'
 
+    def missing_banks(self, bank_ids) -> list:
+        """Банки из bank_ids, которые ещё не сохранены в снимке"""
+        done = set(self.completed_banks or [])
+        return [bank_id for bank_id in bank_ids if bank_id not in done]
+
 
 class FeatureValue(models.Model):
     """Значение критерия для банка в конкретном снимке"""
@@ -126,6 +166,41 @@ class FeatureValue(models.Model):
         return f'{self.bank.name} - {self.criterion.name}: {self.value}'
 
 
+class CurrentComparison(models.Model):
+    """
+    Материализованное сравнение по опубликованному снимку: одна строка
+    на (продукт, банк) со всеми значениями критериев.
+
+    Строки соответствуют Product.current_snapshot и пересобираются при его
+    публикации (см. comparison.py), чтобы /api/compare/ не обращался
+    к растущей таблице FeatureValue. snapshot меняется в той же транзакции,
+    поэтому дата и примечание снимка в ответе всегда соответствуют данным.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='current_comparison')
+    bank = models.ForeignKey(Bank, on_delete=models.CASCADE)
+    snapshot = models.ForeignKey(
+        Snapshot,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Снимок, по которому собрана строка'
+    )
+    values = models.JSONField(default=dict, help_text='{criterion_id: value}')
+    confidence = models.JSONField(default=dict, help_text='{criterion_id: confidence}')
+    sources = models.JSONField(default=dict, help_text='{criterion_id: source_id}')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['product', 'bank']
+        verbose_name = 'Текущее сравнение'
+        verbose_name_plural = 'Текущие сравнения'
+        unique_together = ('product', 'bank')
+
+    def __str__(self):
+        return f'{self.product_id} / {self.bank_id}'
+
+
 class ParseLog(models.Model):
     """Лог парсинга для отладки и мониторинга"""
     source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name='logs')
@@ -154,3 +229,44 @@ class ParseLog(models.Model):
 
     def __str__(self):
         return f'{self.source.name} - {self.status}'
+
+
+class CrawlSchedule(models.Model):
+    """
+    Расписание парсинга продукта из источника.
+    
+    Интервал адаптируется: если содержимое изменилось с прошлого запуска,
+    интервал сокращается, если нет - увеличивается (в пределах min/max).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='crawl_schedules')
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, null=True, blank=True)
+    parser_type = models.CharField(max_length=50, default='mock')
+    is_enabled = models.BooleanField(default=True)
+    interval = models.PositiveIntegerField(help_text='Текущий интервал между запусками, сек')
+    min_interval = models.PositiveIntegerField(help_text='Минимальный интервал, сек')
+    max_interval = models.PositiveIntegerField(help_text='Максимальный интервал, сек')
+    next_run_at = models.DateTimeField(db_index=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_content_hash = models.CharField(max_length=64, blank=True)
+    run_count = models.PositiveIntegerField(default=0)
+    change_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_run_at']
+        verbose_name = 'Расписание парсинга'
+        verbose_name_plural = 'Расписания парсинга'
+        unique_together = ('product', 'source', 'parser_type')
+        indexes = [
+            models.Index(fields=['is_enabled', 'next_run_at']),
+        ]
+
+    def __str__(self):
+        source = self.source.name if self.source else self.parser_type
+        return f'{self.product.name} / {source}'
+
+    @property
+    def change_rate(self) -> float:
+        """Доля запусков, на которых содержимое изменилось"""
+        return self.change_count / self.run_count if self.run_count else 0.0
@@ -0,0 +1,120 @@
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсор по паре (поле сортировки, id).
+
+    CursorPagination в DRF фильтрует только по первому полю ordering, а
+    строки с одинаковым значением (например, записанные одним bulk_create)
+    пропускает через OFFSET. Здесь позиция - "значение|id", фильтр идёт по
+    паре, поэтому OFFSET не нужен и при совпадающих значениях.
+    ordering - (поле, id) с одним направлением.
+    """
+
+    def _get_position_from_instance(self, instance, ordering):
+        field_name = ordering[0].lstrip('-')
+        if isinstance(instance, dict):
+            return f'{instance[field_name]}|{instance["id"]}'
+        return f'{getattr(instance, field_name)}|{instance.id}'
+
+    def _filter_after(self, queryset, position: str, reverse: bool):
+        value, _, pk = position.rpartition('|')
+        order = self.ordering[0]
+        field_name = order.lstrip('-')
+        # (курсор назад) XOR (сортировка по убыванию)
+        lookup = 'lt' if reverse != order.startswith('-') else 'gt'
+        return queryset.filter(
+            Q(**{f'{field_name}__{lookup}': value}) | Q(**{field_name: value, f'id__{lookup}': pk})
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Повторяет CursorPagination.paginate_queryset, кроме фильтра по позиции
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = self._filter_after(queryset, current_position, reverse)
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class SnapshotCursorPagination(KeysetCursorPagination):
+    """
+    Курсорная пагинация снимков: от новых к старым.
+
+    Стоимость страницы не зависит от её номера (нет OFFSET), и страницы
+    не съезжают, когда появляются новые снимки.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': len(data),
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class AIAnalysisCursorPagination(KeysetCursorPagination):
+    """
+    Курсорная пагинация результатов AI анализа по (analysis_at, id).
+
+    Глубокие страницы стоят столько же, сколько первая: выборка идёт
+    по индексу от позиции курсора, без OFFSET, в том числе внутри пачки
+    с одним analysis_at.
+    """
+    ordering = ('-analysis_at', '-id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
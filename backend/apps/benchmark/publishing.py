@@ -0,0 +1,97 @@
+"""
+Публикация снимков.
+
+Снимок пишется невидимым (is_active=False). Когда парсинг завершён,
+publish_snapshot() в одной транзакции деактивирует прежний снимок продукта,
+активирует новый, переставляет указатель Product.current_snapshot
+и пересобирает материализованное сравнение (CurrentComparison).
+Читатели получают id текущего снимка через get_current_snapshot_id():
+из кэша, а при промахе - из указателя, без запроса latest(). С локальным
+кэшем (locmem) в других процессах указатель обновится только через
+CURRENT_SNAPSHOT_CACHE_TTL, поэтому /api/compare/ берёт снимок не отсюда,
+а из строк CurrentComparison (см. comparison.get_comparison).
+"""
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.benchmark.comparison import rebuild_current_comparison
+from apps.benchmark.models import Product, Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(product_id: str) -> str:
+    return f'benchmark:current_snapshot:{product_id}'
+
+
+def publish_snapshot(snapshot_id: int) -> Snapshot:
+    """
+    Сделать завершённый снимок текущим для его продукта.
+
+    Снимок старше уже опубликованного не публикуется (например, если
+    задача с устаревшими данными завершилась позже новой).
+
+    Raises:
+        ValueError: если снимок ещё не завершён
+    """
+    with transaction.atomic():
+        snapshot = Snapshot.objects.select_for_update().get(id=snapshot_id)
+        if snapshot.parsing_status != 'completed':
+            raise ValueError(f'Snapshot {snapshot_id} is not completed ({snapshot.parsing_status})')
+
+        product = Product.objects.select_for_update().select_related('current_snapshot').get(
+            id=snapshot.product_id
+        )
+        current = product.current_snapshot
+        if current is not None:
+            if current.id == snapshot.id:
+                return snapshot
+            if current.created_at > snapshot.created_at:
+                logger.info(f'Snapshot {snapshot.id} is older than current {current.id}, not publishing')
+                return snapshot
+
+        # Сначала снимаем старый снимок: активным может быть только один
+        Snapshot.objects.filter(product_id=product.id, is_active=True).update(is_active=False)
+
+        snapshot.is_active = True
+        snapshot.published_at = timezone.now()
+        snapshot.save(update_fields=['is_active', 'published_at'])
+
+        product.current_snapshot = snapshot
+        product.save(update_fields=['current_snapshot', 'updated_at'])
+
+        rebuild_current_comparison(snapshot)
+
+        transaction.on_commit(
+            lambda: cache.set(_cache_key(product.id), snapshot.id, settings.CURRENT_SNAPSHOT_CACHE_TTL)
+        )
+
+    logger.info(f'Published snapshot {snapshot.id} for product {product.id}')
+    return snapshot
+
+
+def get_current_snapshot_id(product_id: str) -> Optional[int]:
+    """ID опубликованного снимка продукта (None, если продукта или снимка нет)"""
+    key = _cache_key(product_id)
+    snapshot_id = cache.get(key)
+    if snapshot_id is None:
+        snapshot_id = (
+            Product.objects
+            .filter(id=product_id)
+            .values_list('current_snapshot_id', flat=True)
+            .first()
+        )
+        if snapshot_id is not None:
+            cache.set(key, snapshot_id, settings.CURRENT_SNAPSHOT_CACHE_TTL)
+    return snapshot_id
+
+
+def invalidate_current_snapshot(product_id: str):
+    """Сбросить закэшированный указатель"""
+    cache.delete(_cache_key(product_id))
@@ -0,0 +1,61 @@
+"""
+Рендереры ответов API.
+
+ORJSONRenderer - JSON по умолчанию (см. REST_FRAMEWORK в settings.py).
+Колоночные форматы выбираются по заголовку Accept или параметру ?format=
+(см. apps/benchmark/columnar.py).
+"""
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.benchmark import columnar
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson.
+
+    datetime, UUID и dataclass кодируются самим orjson; остальное (Decimal,
+    lazy-строки, QuerySet) - через стандартный DRF JSONEncoder.
+    """
+
+    _fallback = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        option = orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type or self.media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=self._fallback.default, option=option)
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    """Колоночный JSON: ?format=columnar"""
+    media_type = 'application/vnd.sberbench.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if columnar.is_comparison(data):
+            data = columnar.encode_json(columnar.to_columnar(data))
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Колоночный MessagePack: ?format=msgpack"""
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b''
+        if columnar.is_comparison(data):
+            data = columnar.encode_msgpack(columnar.to_columnar(data))
+        return msgpack.packb(data, use_bin_type=True, default=str)
@@ -47,12 +47,29 @@ class FeatureValueSerializer(serializers.ModelSerializer):
         ]
 
 
-class SnapshotSerializer(serializers.ModelSerializer):
-    features = FeatureValueSerializer(many=True, read_only=True)
+class SnapshotHeaderSerializer(serializers.ModelSerializer):
+    """Снимок без значений критериев (по умолчанию в списке снимков)"""
     product_name = serializers.CharField(source='product.name', read_only=True)
 
     class Meta:
         model = Snapshot
+        fields = [
+            'id',
+            'product',
+            'product_name',
+            'created_at',
+            'parsing_status',
+            'is_active',
+            'published_at',
+            'note',
+        ]
+
+
+class SnapshotSerializer(SnapshotHeaderSerializer):
+    """Снимок со значениями; features нужно загружать через prefetch_related"""
+    features = FeatureValueSerializer(many=True, read_only=True)
+
+    class Meta(SnapshotHeaderSerializer.Meta):
         fields = [
             'id',
             'product',
@@ -74,17 +91,71 @@ class ComparisonDataSerializer(serializers.Serializer):
 
 
 class AIAnalysisResultSerializer(serializers.Serializer):
-    """Сериализер для результатов AI анализа"""
+    """
+    Сериализер для результатов AI анализа.
+    
+    Аргумент fields сужает набор полей (sparse fieldset, ?fields=...).
+    Тяжёлое поле raw_response отдаётся только если запрошено явно.
+    """
+    OPTIONAL_FIELDS = ('raw_response',)
+
     id = serializers.IntegerField(read_only=True)
     competitor = serializers.CharField()
     product = serializers.CharField()
     criterion = serializers.CharField()
     analysis_type = serializers.CharField()
     value = serializers.CharField(required=False, allow_null=True)
+    value_amount = serializers.FloatField(required=False, allow_null=True)
+    value_currency = serializers.CharField(required=False, allow_blank=True)
+    value_percent = serializers.FloatField(required=False, allow_null=True)
+    value_period = serializers.CharField(required=False, allow_blank=True)
+    value_min = serializers.FloatField(required=False, allow_null=True)
+    value_max = serializers.FloatField(required=False, allow_null=True)
     source_url = serializers.URLField(required=False, allow_null=True)
     parsed_at = serializers.DateTimeField()
     analysis_at = serializers.DateTimeField(read_only=True)
     llm_model = serializers.CharField()
     llm_prompt_version = serializers.CharField()
     confidence_score = serializers.FloatField(required=False, allow_null=True)
-
+    raw_response = serializers.JSONField(read_only=True)
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            keep = set(self.fields) - set(self.OPTIONAL_FIELDS)
+        else:
+            keep = set(fields)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+class AIInsightSerializer(serializers.Serializer):
+    """
+    Сериализер свёртки AI insights (apps/ai/insights.py).
+    
+    id - последний результат AIAnalysisResult, поля совпадают
+    с AIAnalysisResultSerializer плюс агрегаты по истории.
+    """
+    id = serializers.IntegerField(source='latest_result_id', read_only=True)
+    competitor = serializers.CharField()
+    product = serializers.CharField()
+    criterion = serializers.CharField()
+    analysis_type = serializers.CharField()
+    value = serializers.CharField(allow_null=True)
+    value_amount = serializers.FloatField(allow_null=True)
+    value_currency = serializers.CharField(allow_blank=True)
+    value_percent = serializers.FloatField(allow_null=True)
+    value_period = serializers.CharField(allow_blank=True)
+    value_min = serializers.FloatField(allow_null=True)
+    value_max = serializers.FloatField(allow_null=True)
+    source_url = serializers.URLField(allow_null=True)
+    parsed_at = serializers.DateTimeField()
+    analysis_at = serializers.DateTimeField()
+    llm_model = serializers.CharField()
+    llm_prompt_version = serializers.CharField()
+    confidence_score = serializers.FloatField(allow_null=True)
+    avg_confidence = serializers.FloatField(allow_null=True)
+    results_count = serializers.IntegerField()
+    change_count = serializers.IntegerField()
+    first_analysis_at = serializers.DateTimeField()
@@ -5,6 +5,7 @@ from .views import (
     ProductViewSet,
     CriterionViewSet,
     CompareAPIView,
+    BulkCompareAPIView,
     SnapshotListView,
     StatusAPIView,
 )
@@ -19,6 +20,7 @@ router.register(r'criteria', CriterionViewSet, basename='criterion')
 urlpatterns = [
     path('', include(router.urls)),
     path('compare/', CompareAPIView.as_view(), name='compare'),
+    path('compare/bulk/', BulkCompareAPIView.as_view(), name='compare-bulk'),
     path('snapshots/', SnapshotListView.as_view(), name='snapshots-list'),
     path('snapshots/<str:product_id>/', SnapshotListView.as_view(), name='snapshots-product'),
     path('status/', StatusAPIView.as_view(), name='status'),
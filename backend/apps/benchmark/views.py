@@ -1,19 +1,25 @@
 import logging
 from datetime import datetime
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view
 from rest_framework.permissions import AllowAny
-from django.db.models import Q
+from rest_framework.settings import api_settings
+from django.db.models import Prefetch, Q
 from .models import Bank, Product, Criterion, Snapshot, FeatureValue, Source
+from .comparison import get_comparison, get_comparisons
 from .serializers import (
     BankSerializer,
     ProductSerializer,
     CriterionSerializer,
     SnapshotSerializer,
+    SnapshotHeaderSerializer,
     ComparisonDataSerializer,
 )
+from .pagination import SnapshotCursorPagination
+from .renderers import ColumnarJSONRenderer, MessagePackRenderer
 
 logger = logging.getLogger(__name__)
 
@@ -53,8 +59,12 @@ class CompareAPIView(APIView):
     
     Example:
     GET /api/compare?banks=sber,vtb&criteria=cost,sms&product=deposits
+    
+    Формат ответа (по умолчанию - обычный JSON) выбирается через Accept
+    или ?format=columnar / ?format=msgpack, см. columnar.py.
     """
     permission_classes = [AllowAny]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer, MessagePackRenderer]
 
     def get(self, request):
         try:
@@ -67,49 +77,27 @@ class CompareAPIView(APIView):
             banks_param = [b.strip() for b in banks_param if b.strip()]
             criteria_param = [c.strip() for c in criteria_param if c.strip()]
 
-            # Get latest snapshot for product
-            try:
-                product = Product.objects.get(id=product_id)
-                snapshot = product.snapshots.filter(is_active=True).latest('created_at')
-            except Product.DoesNotExist:
-                logger.warning(f'Product {product_id} not found')
-                # Return mock data if product doesn't exist (for development)
-                return Response(self._get_mock_data(banks_param, criteria_param))
-            except Snapshot.DoesNotExist:
-                logger.warning(f'No active snapshot for product {product_id}')
-                # Return mock data if snapshot doesn't exist
+            # Build comparison data from the materialized table (one row per bank);
+            # the snapshot comes from the same rows, so date/note always match the data
+            comparison = get_comparison(product_id, banks_param, criteria_param)
+            snapshot = comparison['snapshot']
+            if snapshot is None:
+                logger.warning(f'No published snapshot for product {product_id}')
+                # Return mock data if product or snapshot doesn't exist (for development)
                 return Response(self._get_mock_data(banks_param, criteria_param))
-
-            # Build comparison data
-            data = {}
-            sources_set = set()
-            confidence_data = {}
-
-            for bank_id in banks_param:
-                data[bank_id] = {}
-                for criterion_id in criteria_param:
-                    try:
-                        fv = snapshot.features.select_related('source').get(
-                            bank_id=bank_id,
-                            criterion_id=criterion_id
-                        )
-                        data[bank_id][criterion_id] = fv.value
-                        if fv.confidence:
-                            confidence_data[f'{bank_id}.{criterion_id}'] = fv.confidence
-                        if fv.source:
-                            sources_set.add(fv.source.id)
-                    except FeatureValue.DoesNotExist:
-                        data[bank_id][criterion_id] = False
+            data = comparison['data']
+            confidence_data = comparison['confidence']
+            sources_set = comparison['source_ids']
 
             # Get unique sources
             sources = list(Source.objects.filter(id__in=sources_set).values('id', 'name', 'url'))
 
             response_data = {
-                'date': snapshot.created_at.isoformat(),
+                'date': snapshot['created_at'].isoformat(),
                 'sources': sources,
                 'data': data,
                 'confidence': confidence_data,
-                'note': snapshot.note or f'Data from {snapshot.created_at.strftime("%Y-%m-%d %H:%M")}',
+                'note': snapshot['note'] or f'Data from {snapshot["created_at"].strftime("%Y-%m-%d %H:%M")}',
                 'product': product_id,
                 'is_mock': False,
             }
@@ -149,23 +137,133 @@ class CompareAPIView(APIView):
         }
 
 
+class BulkCompareAPIView(CompareAPIView):
+    """
+    Сравнение сразу по нескольким продуктам за один запрос.
+    
+    POST /api/compare/bulk/
+    {
+        "requests": [
+            {"product": "deposits", "banks": ["sber", "vtb"], "criteria": ["cost", "sms"]},
+            {"product": "cards", "banks": "sber,alfa", "criteria": "cashback"}
+        ]
+    }
+    
+    Ответ: {"results": [...]} - по элементу на запрос, в формате /api/compare/.
+    Снимки, значения и источники читаются одним запросом на таблицу.
+    Только JSON: колоночный и msgpack форматы рассчитаны на один ответ compare.
+    """
+    http_method_names = ['post', 'options']
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Body must contain a non-empty "requests" list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.BULK_COMPARE_MAX_REQUESTS:
+            return Response(
+                {'error': f'Too many requests in batch (max {settings.BULK_COMPARE_MAX_REQUESTS})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            parsed = [self._parse_item(item) for item in items]
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            comparisons = get_comparisons(parsed)
+
+            source_ids = set()
+            for comparison in comparisons:
+                if comparison is not None:
+                    source_ids |= comparison['source_ids']
+            sources = list(Source.objects.filter(id__in=source_ids).values('id', 'name', 'url'))
+
+            results = []
+            for item, comparison in zip(parsed, comparisons):
+                if comparison is None:
+                    logger.warning(f'No published snapshot for product {item["product"]}')
+                    mock = self._get_mock_data(item['banks'], item['criteria'])
+                    mock['product'] = item['product']
+                    results.append(mock)
+                    continue
+
+                snapshot = comparison['snapshot']
+                results.append({
+                    'date': snapshot['created_at'].isoformat(),
+                    'sources': [source for source in sources if source['id'] in comparison['source_ids']],
+                    'data': comparison['data'],
+                    'confidence': comparison['confidence'],
+                    'note': snapshot['note'] or f'Data from {snapshot["created_at"].strftime("%Y-%m-%d %H:%M")}',
+                    'product': item['product'],
+                    'is_mock': False,
+                })
+
+            return Response({'count': len(results), 'results': results})
+
+        except Exception as e:
+            logger.error(f'Error in BulkCompareAPIView: {str(e)}', exc_info=True)
+            return Response(
+                {'error': 'Internal server error', 'message': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @staticmethod
+    def _split(value) -> list:
+        if isinstance(value, str):
+            value = value.split(',')
+        if not isinstance(value, list):
+            raise ValueError('banks and criteria must be lists or comma-separated strings')
+        return [str(v).strip() for v in value if str(v).strip()]
+
+    def _parse_item(self, item) -> dict:
+        if not isinstance(item, dict) or not item.get('product'):
+            raise ValueError('Each request must be an object with a "product"')
+        return {
+            'product': str(item['product']),
+            'banks': self._split(item.get('banks', 'sber')),
+            'criteria': self._split(item.get('criteria', '')),
+        }
+
+
 class SnapshotListView(APIView):
-    """Получить список снимков для продукта"""
+    """
+    Получить список снимков для продукта.
+    
+    По умолчанию отдаются только заголовки снимков. Значения критериев
+    добавляются по ?include=features и загружаются одним prefetch запросом.
+    Пагинация курсорная: ?cursor=...&page_size=N (по умолчанию 10).
+    """
     permission_classes = [AllowAny]
+    pagination_class = SnapshotCursorPagination
 
     def get(self, request, product_id=None):
-        queryset = Snapshot.objects.select_related('product').all()
+        queryset = Snapshot.objects.select_related('product')
         
         if product_id:
             queryset = queryset.filter(product_id=product_id)
         
-        snapshots = queryset[:10]  # Last 10 snapshots
-        serializer = SnapshotSerializer(snapshots, many=True)
+        include = {part.strip() for part in request.query_params.get('include', '').split(',')}
+        if 'features' in include:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'features',
+                    queryset=FeatureValue.objects.select_related('bank', 'criterion', 'source')
+                )
+            )
+            serializer_class = SnapshotSerializer
+        else:
+            serializer_class = SnapshotHeaderSerializer
         
-        return Response({
-            'count': len(snapshots),
-            'results': serializer.data
-        })
+        paginator = self.pagination_class()
+        snapshots = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = serializer_class(snapshots, many=True)
+        
+        return paginator.get_paginated_response(serializer.data)
 
 
 class StatusAPIView(APIView):
@@ -4,8 +4,10 @@
 """
 
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from typing import Dict, List, Tuple, Optional
 import requests
 from requests.adapters import HTTPAdapter
@@ -21,10 +23,17 @@ class BaseParser(ABC):
     DEFAULT_RETRIES = 3
     USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
 
-    def __init__(self, timeout: int = None, max_retries: int = None):
+    def __init__(self, timeout: int = None, max_retries: int = None, session=None, archive=None):
         self.timeout = timeout or self.DEFAULT_TIMEOUT
         self.max_retries = max_retries or self.DEFAULT_RETRIES
-        self.session = self._create_session()
+        # session подменяет HTTP (например, apps.ai.archive.ReplaySession)
+        self.session = session or self._create_session()
+        # Архив исходного HTML (apps.ai.archive.PageArchive), опционально
+        self.archive = archive
+        # Метки архива (run_id, competitor, product) - свои у каждого потока,
+        # пулированный парсер может работать в нескольких задачах сразу
+        self._run = threading.local()
+        self._closed = False
 
     def _create_session(self) -> requests.Session:
         """Создаёт сессию с retry стратегией"""
@@ -49,11 +58,34 @@ class BaseParser(ABC):
         try:
             response = self.session.get(url, timeout=self.timeout)
             response.raise_for_status()
+            if self.archive is not None:
+                self._archive_page(url, response)
             return response.text
         except requests.RequestException as e:
             logger.error(f'Error fetching {url}: {str(e)}')
             return None
 
+    @contextmanager
+    def archive_run(self, run_id: str, competitor: str = '', product: str = ''):
+        """Страницы, загруженные в этом блоке, архивируются с метками запуска"""
+        self._run.labels = {'run_id': run_id, 'competitor': competitor, 'product': product}
+        try:
+            yield self
+        finally:
+            self._run.labels = None
+
+    def _archive_page(self, url: str, response):
+        try:
+            self.archive.put(
+                url,
+                response.content,
+                encoding=response.encoding or '',
+                status_code=response.status_code,
+                **(getattr(self._run, 'labels', None) or {}),
+            )
+        except Exception as e:
+            logger.error(f'Error archiving {url}: {str(e)}')
+
     @abstractmethod
     def parse(self, **kwargs) -> Dict[str, any]:
         """
@@ -71,9 +103,14 @@ class BaseParser(ABC):
         """
         pass
 
+    def healthy(self) -> bool:
+        """Можно ли переиспользовать парсер в следующей задаче"""
+        return not self._closed
+
     def close(self):
         """Закрывает сессию"""
         self.session.close()
+        self._closed = True
 
 
 class MockParser(BaseParser):
@@ -0,0 +1,288 @@
+"""
+Офлайн-режим загрузки страниц для нагрузочных прогонов.
+
+С PARSER_REPLAY_SOURCE парсеры не обращаются к сайтам банков, страницы
+отдаются из записи:
+- каталог корпуса: index.jsonl (url, file, competitor, product,
+  status_code, encoding) и файлы страниц рядом; каталог выгружается из
+  архива командой `manage.py replay_archive --export <dir>`
+- 'archive' - архив HTML (apps/ai/archive.py): страницы запуска
+  PARSER_REPLAY_RUN или последние версии всех страниц
+
+Чтобы прогон был похож на реальный, в загрузку добавляются задержка
+(PARSER_REPLAY_LATENCY, распределение PARSER_REPLAY_LATENCY_DISTRIBUTION)
+и ошибки (доля PARSER_REPLAY_ERROR_RATE, виды PARSER_REPLAY_ERRORS).
+Случайность детерминирована: зависит от PARSER_REPLAY_SEED, URL и номера
+обращения к нему, поэтому повторный прогон даёт те же задержки и ошибки,
+а retry одного URL может пройти.
+
+LLM в этом режиме - детерминированная заглушка: LLM_PROVIDER=auto
+разрешается в mock (задержка - LLM_MOCK_LATENCY, LLM_MOCK_LATENCY_PER_REQUEST).
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from django.conf import settings
+
+from apps.parsers.base import BaseParser
+
+logger = logging.getLogger(__name__)
+
+SOURCE_ARCHIVE = 'archive'
+MANIFEST_NAME = 'index.jsonl'
+# Разброс логнормального распределения задержки (медиана = PARSER_REPLAY_LATENCY)
+LOGNORMAL_SIGMA = 0.5
+
+
+# Счётчики всех сессий процесса: загрузки, внесённые ошибки, URL вне записи,
+# суммарная внесённая задержка
+stats = {'requests': 0, 'errors': 0, 'missing': 0, 'sleep': 0.0}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str, value=1):
+    with _stats_lock:
+        stats[key] += value
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in stats:
+            stats[key] = 0
+
+
+def replay_enabled() -> bool:
+    return bool(settings.PARSER_REPLAY_SOURCE)
+
+
+class DirectorySource:
+    """Записанный корпус в каталоге (index.jsonl + файлы страниц)"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        manifest = self.root / MANIFEST_NAME
+        if not manifest.exists():
+            raise FileNotFoundError(f'Replay corpus manifest not found: {manifest}')
+
+        self.pages: Dict[str, Dict] = {}
+        with open(manifest, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.pages[entry['url']] = entry
+
+    def read(self, url: str) -> Optional[bytes]:
+        entry = self.pages.get(url)
+        if entry is None:
+            return None
+        return (self.root / entry['file']).read_bytes()
+
+    def close(self):
+        pass
+
+
+class ArchiveSource:
+    """Страницы из архива HTML (apps/ai/archive.py)"""
+
+    def __init__(self, run_id: Optional[str] = None):
+        from apps.ai.archive import PageArchive
+
+        self.archive = PageArchive()
+        self._index = self.archive.run_index(run_id=run_id or None)
+        self.pages = {
+            url: {
+                'url': url,
+                'competitor': page.competitor,
+                'product': page.product,
+                'status_code': page.status_code,
+                'encoding': page.encoding,
+            }
+            for url, page in self._index.items()
+        }
+
+    def read(self, url: str) -> Optional[bytes]:
+        page = self._index.get(url)
+        return self.archive.read(page.blob) if page is not None else None
+
+    def close(self):
+        self.archive.close()
+
+
+def open_source(source: str = None):
+    """Источник страниц по значению PARSER_REPLAY_SOURCE"""
+    source = source or settings.PARSER_REPLAY_SOURCE
+    if source == SOURCE_ARCHIVE:
+        return ArchiveSource(run_id=settings.PARSER_REPLAY_RUN)
+    return DirectorySource(source)
+
+
+def parse_error_mix(spec: str) -> List:
+    """
+    Виды ошибок с весами: "timeout:0.5,503:0.3,429:0.2".
+
+    Вид - timeout, connection или HTTP статус.
+    """
+    mix = []
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition(':')
+        mix.append((kind.strip(), float(weight or 1)))
+    return mix
+
+
+class ReplayHTTPSession:
+    """
+    Замена requests.Session: страницы из записи, с задержкой и ошибками.
+
+    Потокобезопасна (PageTextParser.iter_pages загружает страницы в потоках).
+    """
+
+    def __init__(
+        self,
+        source,
+        latency: float = None,
+        distribution: str = None,
+        error_rate: float = None,
+        errors: str = None,
+        seed: int = None,
+        missing: str = None
+    ):
+        from apps.ai.archive import ArchivedResponse
+
+        self._response_class = ArchivedResponse
+        self.source = source
+        self.latency = settings.PARSER_REPLAY_LATENCY if latency is None else latency
+        self.distribution = distribution or settings.PARSER_REPLAY_LATENCY_DISTRIBUTION
+        self.error_rate = settings.PARSER_REPLAY_ERROR_RATE if error_rate is None else error_rate
+        self.error_mix = parse_error_mix(errors if errors is not None else settings.PARSER_REPLAY_ERRORS)
+        self.seed = settings.PARSER_REPLAY_SEED if seed is None else seed
+        # URL, которого нет в записи: '404' или 'any' - отдать записанную страницу по хешу URL
+        self.missing = missing or settings.PARSER_REPLAY_MISSING
+        self.headers = {}
+
+        self._urls = sorted(source.pages)
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def urls_for(self, competitor: str, product: str) -> List[str]:
+        """Записанные URL банка и продукта"""
+        return [
+            url for url in self._urls
+            if self.source.pages[url].get('competitor') == competitor
+            and self.source.pages[url].get('product') == product
+        ]
+
+    def _rng(self, url: str) -> random.Random:
+        with self._lock:
+            attempt = self._attempts.get(url, 0)
+            self._attempts[url] = attempt + 1
+        _count('requests')
+        return random.Random(f'{self.seed}:{url}:{attempt}')
+
+    def _delay(self, rng: random.Random) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.distribution == 'uniform':
+            return rng.uniform(0, 2 * self.latency)
+        if self.distribution == 'exponential':
+            return rng.expovariate(1 / self.latency)
+        if self.distribution == 'lognormal':
+            return self.latency * rng.lognormvariate(0, LOGNORMAL_SIGMA)
+        return self.latency
+
+    def get(self, url: str, **kwargs):
+        rng = self._rng(url)
+        delay = self._delay(rng)
+        if delay:
+            _count('sleep', delay)
+            time.sleep(delay)
+
+        if self.error_mix and rng.random() < self.error_rate:
+            _count('errors')
+            kind = rng.choices([kind for kind, _ in self.error_mix], [w for _, w in self.error_mix])[0]
+            if kind == 'timeout':
+                raise requests.Timeout(f'Injected timeout for {url}')
+            if kind == 'connection':
+                raise requests.ConnectionError(f'Injected connection error for {url}')
+            return self._response_class(url, b'', status_code=int(kind))
+
+        recorded = url
+        if url not in self.source.pages:
+            _count('missing')
+            if self.missing != 'any' or not self._urls:
+                return self._response_class(url, b'', status_code=404)
+            recorded = self._urls[zlib.crc32(url.encode('utf-8')) % len(self._urls)]
+
+        entry = self.source.pages[recorded]
+        return self._response_class(
+            url,
+            self.source.read(recorded),
+            entry.get('encoding') or '',
+            entry.get('status_code') or 200,
+        )
+
+    def close(self):
+        self.source.close()
+
+
+def create_session() -> ReplayHTTPSession:
+    """Сессия офлайн-режима по настройкам PARSER_REPLAY_*"""
+    return ReplayHTTPSession(open_source())
+
+
+def recorded_urls(session, competitor: str, product: str) -> List[str]:
+    """Записанные URL банка и продукта (для обычной сессии - пусто)"""
+    if isinstance(session, ReplayHTTPSession):
+        return session.urls_for(competitor, product)
+    return []
+
+
+class ReplayParser(BaseParser):
+    """
+    Парсер записанных страниц для parse_product_data в офлайн-режиме.
+
+    Загружает страницы банка через сессию офлайн-режима и извлекает
+    критерии шаблонами apps/ai/extractors.py: нагрузка похожа на
+    настоящий парсер (загрузка, очистка HTML, разбор), но без сети.
+    """
+
+    def __init__(self, timeout: int = None, max_retries: int = None, session=None, archive=None):
+        from apps.ai.text_parser import PageTextParser
+
+        super().__init__(timeout, max_retries, session=session or create_session(), archive=archive)
+        self._text_parser = PageTextParser(competitor='', product='', criterion='', urls=[])
+
+    def parse(self, bank: str = 'sber', product: str = 'deposits', **kwargs) -> Dict[str, any]:
+        from apps.ai.extractors import EXTRACTORS, extract
+
+        criteria = {}
+        for url in recorded_urls(self.session, bank, product):
+            html = self.fetch_page(url)
+            if html is None:
+                continue
+            text = self._text_parser.clean_html(html)
+            for criterion in EXTRACTORS:
+                if criterion in criteria:
+                    continue
+                found = extract(criterion, text)
+                if found:
+                    criteria[criterion] = {
+                        'value': True,
+                        'confidence': found['confidence'],
+                        'source_url': url,
+                        'text': found['value'],
+                    }
+
+        return {
+            'bank': bank,
+            'criteria': criteria,
+        }
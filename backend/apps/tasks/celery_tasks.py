@@ -4,21 +4,162 @@ Celery задачи для парсинга и обработки данных
 
 import logging
 from celery import shared_task
+from celery.exceptions import Retry
 from datetime import datetime
+from django.conf import settings
+from django.db import transaction
 from apps.benchmark.models import Snapshot, Product, FeatureValue, Bank, Criterion, Source, ParseLog
-from apps.parsers.base import MockParser
+from apps.benchmark.publishing import publish_snapshot
+from apps.parsers import replay
+from apps.tasks import resources
+from apps.tasks.scheduler import compute_content_hash, plan_due_crawls, record_crawl_result
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True)
-def parse_product_data(self, product_id: str, parser_type: str = 'mock'):
+def _start_snapshot(product: Product, parser_type: str, idempotency_key: str = None):
+    """
+    Снимок для запуска парсинга.
+
+    Если снимок с таким ключом уже есть (повторная доставка задачи или retry),
+    возвращается он, а не создаётся новый.
+
+    Returns:
+        (snapshot, resumed)
+    """
+    if not idempotency_key:
+        snapshot = Snapshot.objects.create(
+            product=product,
+            parsing_status='in_progress',
+            note=f'Parsing with {parser_type}'
+        )
+        return snapshot, False
+
+    with transaction.atomic():
+        snapshot, created = Snapshot.objects.select_for_update().get_or_create(
+            idempotency_key=idempotency_key,
+            defaults={
+                'product': product,
+                'parsing_status': 'in_progress',
+                'note': f'Parsing with {parser_type}',
+            }
+        )
+        if not created and snapshot.parsing_status != 'completed':
+            snapshot.parsing_status = 'in_progress'
+            snapshot.save(update_fields=['parsing_status'])
+    return snapshot, not created
+
+
+def _save_bank_result(snapshot_id: int, bank: Bank, result: dict) -> bool:
+    """
+    Сохранить значения банка и отметить банк в чекпоинте снимка.
+
+    Всё в одной транзакции под блокировкой снимка: если банк уже сохранён
+    (параллельная доставка той же задачи), повторной записи не будет.
+
+    Returns:
+        False, если банк уже был сохранён ранее
+    """
+    with transaction.atomic():
+        snapshot = Snapshot.objects.select_for_update().get(id=snapshot_id)
+        if bank.id in snapshot.completed_banks:
+            return False
+
+        source = None
+        for criterion_id, crit_data in result.get('criteria', {}).items():
+            # Get or create criterion
+            criterion, _ = Criterion.objects.get_or_create(
+                id=criterion_id,
+                defaults={'name': criterion_id.replace('_', ' ').title()}
+            )
+
+            # Get or create source (if provided)
+            source = None
+            if 'source_name' in crit_data:
+                source, _ = Source.objects.get_or_create(
+                    name=crit_data['source_name'],
+                    defaults={
+                        'url': crit_data.get('source_url', 'https://example.com')
+                    }
+                )
+
+            # Create/update feature value
+            FeatureValue.objects.update_or_create(
+                snapshot=snapshot,
+                bank=bank,
+                criterion=criterion,
+                defaults={
+                    'value': crit_data.get('value', False),
+                    'confidence': crit_data.get('confidence'),
+                    'source': source,
+                    'source_url': crit_data.get('source_url'),
+                    'raw_data': crit_data,
+                }
+            )
+
+            logger.debug(f'Saved {bank.id}/{criterion_id}: {crit_data["value"]}')
+
+        # Log success
+        ParseLog.objects.create(
+            source=source or Source.objects.first(),
+            snapshot=snapshot,
+            status='success',
+            message=f'Successfully parsed {bank.name}'
+        )
+
+        snapshot.completed_banks = [*snapshot.completed_banks, bank.id]
+        snapshot.save(update_fields=['completed_banks'])
+    return True
+
+
+def _finalize_snapshot(snapshot_id: int, schedule_id: int = None) -> Snapshot:
+    """
+    Атомарно завершить и опубликовать снимок: хеш содержимого, статус,
+    переключение текущего снимка продукта и результат расписания.
+
+    Хеш считается по сохранённым значениям, поэтому он одинаковый
+    и для запуска за один проход, и для продолженного после сбоя.
+    """
+    with transaction.atomic():
+        snapshot = Snapshot.objects.select_for_update().get(id=snapshot_id)
+        if snapshot.parsing_status == 'completed':
+            return snapshot
+
+        parsed_values = {}
+        for bank_id, criterion_id, value in snapshot.features.values_list('bank_id', 'criterion_id', 'value'):
+            parsed_values.setdefault(bank_id, {})[criterion_id] = value
+
+        snapshot.parsing_status = 'completed'
+        snapshot.content_hash = compute_content_hash(parsed_values)
+        snapshot.save(update_fields=['parsing_status', 'content_hash'])
+        snapshot = publish_snapshot(snapshot.id)
+
+        if schedule_id:
+            record_crawl_result(schedule_id, snapshot.content_hash)
+    return snapshot
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=settings.PARSER_RUN_MAX_RETRIES)
+def parse_product_data(
+    self,
+    product_id: str,
+    parser_type: str = 'mock',
+    schedule_id: int = None,
+    idempotency_key: str = None,
+):
     """
     Основная задача для парсинга данных продукта.
     
+    Запуск идемпотентен и продолжаем: снимок ищется по idempotency_key
+    (по умолчанию - id задачи, он не меняется при повторной доставке и retry).
+    Данные каждого банка сохраняются вместе с чекпоинтом, поэтому повторный
+    запуск парсит только недостающие банки, а завершённый снимок не трогает.
+    
     Args:
         product_id: ID продукта (e.g., 'deposits', 'credits')
         parser_type: тип парсера ('mock', 'banki_ru', 'sravni_ru', 'official', etc.)
+        schedule_id: ID CrawlSchedule, если запуск плановый
+        idempotency_key: ключ запуска (опционально)
     
     Returns:
         dict: результат парсинга
@@ -26,114 +167,105 @@ def parse_product_data(self, product_id: str, parser_type: str = 'mock'):
     try:
         logger.info(f'Starting parse_product_data for product={product_id}, parser={parser_type}')
         
+        if not idempotency_key and not self.request.called_directly:
+            idempotency_key = f'parse:{self.request.id}'
+        
         # Get or create product
         product, created = Product.objects.get_or_create(
             id=product_id,
             defaults={'name': product_id.replace('_', ' ').title()}
         )
         
-        # Create snapshot
-        snapshot = Snapshot.objects.create(
-            product=product,
-            parsing_status='in_progress',
-            note=f'Parsing with {parser_type}'
-        )
+        # Create snapshot (or resume the one started by a previous delivery)
+        snapshot, resumed = _start_snapshot(product, parser_type, idempotency_key)
+        if snapshot.parsing_status == 'completed':
+            logger.info(f'Snapshot {snapshot.id} for key {idempotency_key} is already completed, skipping')
+            return {'status': 'success', 'snapshot_id': snapshot.id, 'deduplicated': True}
         
         try:
-            # Initialize parser
-            if parser_type == 'mock':
-                parser = MockParser()
-            else:
-                # TODO: Add other parser types
-                raise NotImplementedError(f'Parser type {parser_type} not implemented')
-            
-            # Get list of banks
-            banks = list(Bank.objects.all())
-            if not banks:
-                logger.warning('No banks found in database. Add some banks to proceed.')
-                snapshot.parsing_status = 'warning'
-                snapshot.save()
-                return {'status': 'warning', 'message': 'No banks in database'}
+            # Parser (and its HTTP session) is reused across tasks in this worker process
+            with resources.parser(parser_type) as parser:
+                # Get list of banks
+                banks = list(Bank.objects.all())
+                if not banks:
+                    logger.warning('No banks found in database. Add some banks to proceed.')
+                    snapshot.parsing_status = 'warning'
+                    snapshot.save()
+                    return {'status': 'warning', 'message': 'No banks in database'}
+                
+                pending = set(snapshot.missing_banks([bank.id for bank in banks]))
+                if resumed:
+                    logger.info(
+                        f'Resuming snapshot {snapshot.id}: '
+                        f'{len(banks) - len(pending)}/{len(banks)} banks already done'
+                    )
             
-            # Parse data for each bank
-            for bank in banks:
-                try:
-                    result = parser.parse(bank=bank.id, product=product_id)
+                # Parse data for each bank
+                failed_banks = []
+                for bank in banks:
+                    if bank.id not in pending:
+                        continue
+                    try:
+                        # Страницы запуска архивируются под id задачи (replay_archive --run)
+                        with parser.archive_run(self.request.id or '', competitor=bank.id, product=product_id):
+                            result = parser.parse(bank=bank.id, product=product_id)
+                        _save_bank_result(snapshot.id, bank, result)
                     
-                    # Save criteria values
-                    for criterion_id, crit_data in result.get('criteria', {}).items():
-                        # Get or create criterion
-                        criterion, _ = Criterion.objects.get_or_create(
-                            id=criterion_id,
-                            defaults={'name': criterion_id.replace('_', ' ').title()}
-                        )
-                        
-                        # Get or create source (if provided)
-                        source = None
-                        if 'source_name' in crit_data:
-                            source, _ = Source.objects.get_or_create(
-                                name=crit_data['source_name'],
-                                defaults={
-                                    'url': crit_data.get('source_url', 'https://example.com')
-                                }
-                            )
-                        
-                        # Create/update feature value
-                        FeatureValue.objects.update_or_create(
+                    except Exception as e:
+                        failed_banks.append(bank.id)
+                        logger.error(f'Error parsing {bank.id}: {str(e)}', exc_info=True)
+                        ParseLog.objects.create(
+                            source=Source.objects.first(),
                             snapshot=snapshot,
-                            bank=bank,
-                            criterion=criterion,
-                            defaults={
-                                'value': crit_data.get('value', False),
-                                'confidence': crit_data.get('confidence'),
-                                'source': source,
-                                'source_url': crit_data.get('source_url'),
-                                'raw_data': crit_data,
-                            }
+                            status='error',
+                            message=f'Error parsing {bank.name}',
+                            error_trace=str(e)
                         )
-                        
-                        logger.debug(f'Saved {bank.id}/{criterion_id}: {crit_data["value"]}')
-                    
-                    # Log success
-                    ParseLog.objects.create(
-                        source=source or Source.objects.first(),
-                        snapshot=snapshot,
-                        status='success',
-                        message=f'Successfully parsed {bank.name}'
+                
+                # Retry only the failed banks; the checkpoint keeps the rest
+                if failed_banks and not self.request.called_directly and self.request.retries < self.max_retries:
+                    logger.warning(
+                        f'{len(failed_banks)} banks failed for snapshot {snapshot.id}, '
+                        f'retrying in {settings.PARSER_RUN_RETRY_DELAY}s'
                     )
-                    
-                except Exception as e:
-                    logger.error(f'Error parsing {bank.id}: {str(e)}', exc_info=True)
-                    ParseLog.objects.create(
-                        source=Source.objects.first(),
-                        snapshot=snapshot,
-                        status='error',
-                        message=f'Error parsing {bank.name}',
-                        error_trace=str(e)
+                    raise self.retry(
+                        kwargs={**self.request.kwargs, 'idempotency_key': idempotency_key},
+                        countdown=settings.PARSER_RUN_RETRY_DELAY,
                     )
             
-            # Mark snapshot as completed
-            snapshot.parsing_status = 'completed'
-            snapshot.save()
-            
-            logger.info(f'Completed parse_product_data for {product_id}')
-            return {'status': 'success', 'snapshot_id': snapshot.id}
+                # Mark snapshot as completed
+                snapshot = _finalize_snapshot(snapshot.id, schedule_id)
             
+                logger.info(f'Completed parse_product_data for {product_id}')
+                return {'status': 'success', 'snapshot_id': snapshot.id}
+        
+        except Retry:
+            raise
+        
         except Exception as e:
             logger.error(f'Fatal error in parse_product_data: {str(e)}', exc_info=True)
             snapshot.parsing_status = 'failed'
-            snapshot.save()
+            snapshot.save(update_fields=['parsing_status'])
             raise
-        
-        finally:
-            if 'parser' in locals():
-                parser.close()
+    
+    except Retry:
+        raise
     
     except Exception as e:
         logger.error(f'Unexpected error in parse_product_data: {str(e)}', exc_info=True)
         raise
 
 
+@shared_task
+def plan_crawls():
+    """
+    Запускается Celery beat: ставит в очередь парсинг по расписаниям,
+    у которых наступил срок (см. apps.tasks.scheduler).
+    """
+    planned = plan_due_crawls()
+    return {'planned': len(planned)}
+
+
 @shared_task
 def cleanup_old_snapshots(days: int = 30):
     """
@@ -161,7 +293,7 @@ def update_parser_metrics():
     Обновляет метрики парсинга для мониторинга.
     TODO: Отправить метрики в Prometheus/Grafana
     """
-    from django.db.models import Count
+    from django.db.models import Count, Q
     
     metrics = {
         'total_snapshots': Snapshot.objects.count(),
@@ -171,20 +303,62 @@ def update_parser_metrics():
         'error_logs': ParseLog.objects.filter(status='error').count(),
     }
     
+    # Доля фактов за сутки, извлечённых шаблонами без вызова LLM
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.ai.extractors import EXTRACTOR_MODEL_NAME
+    from apps.ai.llm_service import AIAnalysisResult
+    
+    facts = AIAnalysisResult.objects.filter(
+        analysis_type='facts',
+        analysis_at__gte=timezone.now() - timedelta(days=1)
+    ).aggregate(
+        total=Count('id'),
+        pre_extracted=Count('id', filter=Q(llm_model=EXTRACTOR_MODEL_NAME))
+    )
+    metrics['ai_facts_24h'] = facts['total']
+    metrics['ai_pre_extracted_24h'] = facts['pre_extracted']
+    metrics['ai_llm_avoided_share'] = (
+        round(facts['pre_extracted'] / facts['total'], 3) if facts['total'] else None
+    )
+    
     logger.info(f'Parser metrics: {metrics}')
     # TODO: Send to Prometheus
     return metrics
 
 
+def _product_criteria(product_id: str) -> list:
+    """Критерии продукта: из опубликованного снимка, иначе - весь справочник"""
+    snapshot_id = Product.objects.filter(id=product_id).values_list('current_snapshot_id', flat=True).first()
+    criteria = FeatureValue.objects.filter(snapshot_id=snapshot_id).values_list('criterion_id', flat=True)
+    return sorted(set(criteria)) or list(Criterion.objects.values_list('id', flat=True))
+
+
 @shared_task(bind=True)
-def analyze_with_llm(self, bank_id: str, product_id: str, urls: list = None):
+def analyze_with_llm(
+    self,
+    bank_id: str,
+    product_id: str,
+    urls: list = None,
+    from_corpus: bool = False,
+    query: str = None,
+    criteria: list = None
+):
     """
     Запускает анализ данных банка с использованием LLM.
     
+    Критерии продукта, для которых есть шаблоны (apps/ai/extractors.py),
+    извлекаются без LLM; если решены не все, страница один раз уходит
+    в LLM с критерием 'general'.
+    
     Args:
         bank_id: ID банка для анализа
         product_id: ID продукта
         urls: Список URL для парсинга (опционально)
+        from_corpus: Брать текст страниц из сохранённого корпуса, без сети
+        query: Полнотекстовый запрос для отбора страниц корпуса (с from_corpus)
+        criteria: ID критериев продукта (по умолчанию - из опубликованного
+            снимка продукта, без него - все критерии справочника)
     
     Returns:
         dict: Результаты анализа
@@ -192,43 +366,81 @@ def analyze_with_llm(self, bank_id: str, product_id: str, urls: list = None):
     try:
         from apps.ai.text_parser import PageTextParser
         from apps.ai.llm_service import LLMService
+        from apps.ai.corpus import iter_stored_pages, stored_pages
+        from apps.ai.archive import archived_pages
         
         logger.info(f'Starting LLM analysis for {bank_id}/{product_id}')
         
-        # Если нет URLs, используем mock данные
-        if not urls:
-            urls = [
-                f"https://example.com/{bank_id}/{product_id}/page1",
-                f"https://example.com/{bank_id}/{product_id}/page2",
-            ]
+        if not criteria:
+            criteria = _product_criteria(product_id)
         
-        # Шаг 1: Парсим текст со страниц
-        parser = PageTextParser(
-            competitor=bank_id,
-            product=product_id,
-            criterion="general",
-            urls=urls
-        )
-        
-        parsed_pages = parser.run()
-        logger.info(f'Parsed {len(parsed_pages)} pages')
+        # HTTP сессия и LLM провайдер живут в пуле процесса воркера
+        with (
+            resources.http_session() as session,
+            resources.llm_provider() as provider,
+            resources.page_archive() as archive,
+        ):
+            # Если нет URLs, берём записанные (офлайн-режим) или mock данные
+            if not urls:
+                urls = replay.recorded_urls(session, bank_id, product_id) or [
+                    f"https://example.com/{bank_id}/{product_id}/page1",
+                    f"https://example.com/{bank_id}/{product_id}/page2",
+                ]
+            
+            # Записанные страницы офлайн-режима повторно не архивируются
+            archive_html = settings.PAGE_ARCHIVE_ENABLED and not replay.replay_enabled()
+            
+            # Шаг 1: Парсим текст со страниц (или берём из корпуса)
+            if from_corpus:
+                parsed_pages = iter_stored_pages(bank_id, product_id, criterion="general", query=query)
+            else:
+                parser = PageTextParser(
+                    competitor=bank_id,
+                    product=product_id,
+                    criterion="general",
+                    urls=urls,
+                    session=session,
+                    keep_html=archive_html
+                )
+                
+                # Страницы отдаются потоково: в памяти только окно загрузки
+                parsed_pages = parser.iter_pages(window=settings.PARSER_FETCH_WINDOW)
+                if archive_html:
+                    # Исходный HTML - в архив, запуск можно переиграть по id задачи
+                    parsed_pages = archived_pages(parsed_pages, archive, run_id=self.request.id or '')
+                if settings.AI_PAGE_STORE_ENABLED:
+                    parsed_pages = stored_pages(parsed_pages)
+            
+            # Шаг 2: Анализируем с LLM по мере поступления страниц
+            llm_service = LLMService(llm_model="Qwen-14B", prompt_version="v1", provider=provider)
+            analyzed_pages = 0
+            result_urls = []
+            for result in llm_service.analyze_stream(
+                pages=parsed_pages,
+                bank_id=bank_id,
+                product_id=product_id,
+                criteria=criteria
+            ):
+                analyzed_pages += 1
+                if 'error' not in result:
+                    result_urls.append(result.get('source_url', ''))
         
-        # Шаг 2: Анализируем с LLM
-        llm_service = LLMService(llm_model="Qwen-14B", prompt_version="v1")
-        analysis_results = llm_service.analyze_and_store(
-            pages=parsed_pages,
-            bank_id=bank_id,
-            product_id=product_id
+        logger.info(
+            f'Completed LLM analysis: {analyzed_pages} results, '
+            f'{llm_service.stats["unchanged"]} unchanged, '
+            f'{llm_service.stats["pre_extracted"]} facts pre-extracted without LLM, '
+            f'{llm_service.stats["llm_pages"]} pages sent to LLM'
         )
         
-        logger.info(f'Completed LLM analysis: {len(analysis_results)} results')
-        
         return {
             'status': 'success',
             'bank_id': bank_id,
             'product_id': product_id,
-            'analyzed_pages': len(analysis_results),
-            'results': [r.get('source_url', '') for r in analysis_results if 'error' not in r]
+            'analyzed_pages': analyzed_pages,
+            'unchanged': llm_service.stats['unchanged'],
+            'pre_extracted': llm_service.stats['pre_extracted'],
+            'llm_pages': llm_service.stats['llm_pages'],
+            'results': result_urls
         }
         
     except Exception as e:
@@ -241,6 +453,27 @@ def analyze_with_llm(self, bank_id: str, product_id: str, urls: list = None):
         }
 
 
+@shared_task
+def refresh_recommendations(limit: int = None):
+    """
+    Генерирует рекомендации для новых и изменившихся фактов
+    (см. LLMService.refresh_recommendations).
+    
+    Args:
+        limit: Максимум фактов за запуск (по умолчанию AI_RECOMMENDATIONS_MAX_PER_RUN)
+    
+    Returns:
+        dict: Счётчики created / failed
+    """
+    from apps.ai.llm_service import LLMService
+    
+    with resources.llm_provider() as provider:
+        llm_service = LLMService(llm_model="Qwen-14B", prompt_version="v1", provider=provider)
+        return llm_service.refresh_recommendations(
+            limit=limit or settings.AI_RECOMMENDATIONS_MAX_PER_RUN
+        )
+
+
 @shared_task
 def get_ai_recommendations(bank_id: str = None, product_id: str = None):
     """
@@ -0,0 +1,241 @@
+"""
+Ресурсы Celery воркера, переиспользуемые между задачами.
+
+Каждый процесс воркера держит свой пул: сессии парсеров, HTTP сессию
+для загрузки страниц, LLM провайдер и архив HTML (один сегмент на
+процесс, пересоздаётся только при остановке). Ресурсы создаются на
+worker_process_init (см. config/celery.py) и живут, пока:
+- не исчерпан лимит использований (WORKER_RESOURCE_MAX_USES)
+- не истёк срок жизни (WORKER_RESOURCE_MAX_AGE, секунды)
+- проверка healthy() проходит
+- при работе с ресурсом не было ошибки соединения (RECYCLE_ERRORS);
+  остальные исключения задачи, включая Retry, ресурс не пересоздают
+
+После этого ресурс закрывается и при следующем запросе создаётся заново.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from apps.parsers import replay
+from apps.parsers.base import BaseParser, MockParser
+
+logger = logging.getLogger(__name__)
+
+
+# Ошибки соединения: после них сессия или клиент может быть в негодном состоянии
+RECYCLE_ERRORS = (httpx.TransportError, requests.ConnectionError)
+
+PARSER_CLASSES = {
+    'mock': MockParser,
+    'replay': replay.ReplayParser,
+    # TODO: Add other parser types
+}
+
+
+class PooledResource:
+    """Один переиспользуемый ресурс с политикой пересоздания"""
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable,
+        close: Callable = None,
+        healthy: Callable = None,
+        max_uses: int = None,
+        max_age: float = None,
+        recycle_on_error: bool = True,
+    ):
+        self.name = name
+        self.factory = factory
+        self.close = close
+        self.healthy = healthy
+        self.recycle_on_error = recycle_on_error
+        self.max_uses = max_uses if max_uses is not None else settings.WORKER_RESOURCE_MAX_USES
+        self.max_age = max_age if max_age is not None else settings.WORKER_RESOURCE_MAX_AGE
+
+        self._resource = None
+        self._created_at = 0.0
+        self._uses = 0
+        self._lock = threading.Lock()
+
+    def _needs_recycle(self) -> Optional[str]:
+        if self.max_uses and self._uses >= self.max_uses:
+            return f'used {self._uses} times'
+        if self.max_age and time.monotonic() - self._created_at >= self.max_age:
+            return 'max age reached'
+        if self.healthy:
+            try:
+                if not self.healthy(self._resource):
+                    return 'health check failed'
+            except Exception as e:
+                return f'health check error: {e}'
+        return None
+
+    def get(self):
+        """Текущий экземпляр ресурса (при необходимости пересоздаётся)"""
+        with self._lock:
+            if self._resource is not None:
+                reason = self._needs_recycle()
+                if reason:
+                    logger.info(f'Recycling worker resource {self.name}: {reason}')
+                    self._discard()
+
+            if self._resource is None:
+                logger.debug(f'Creating worker resource {self.name}')
+                self._resource = self.factory()
+                self._created_at = time.monotonic()
+                self._uses = 0
+
+            self._uses += 1
+            return self._resource
+
+    def _discard(self):
+        resource, self._resource = self._resource, None
+        if resource is not None and self.close:
+            try:
+                self.close(resource)
+            except Exception as e:
+                logger.warning(f'Error closing worker resource {self.name}: {e}')
+
+    def discard(self):
+        """Закрыть ресурс; следующий get() создаст новый"""
+        with self._lock:
+            self._discard()
+
+    @contextmanager
+    def use(self):
+        """Выдаёт ресурс задаче; после ошибки соединения ресурс пересоздаётся"""
+        resource = self.get()
+        try:
+            yield resource
+        except RECYCLE_ERRORS:
+            if self.recycle_on_error:
+                self.discard()
+            raise
+
+
+_pools: Dict[str, PooledResource] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name: str, factory: Callable, **kwargs) -> PooledResource:
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = PooledResource(name, factory, **kwargs)
+            _pools[name] = pool
+    return pool
+
+
+def _create_parser(parser_type: str) -> BaseParser:
+    if parser_type not in PARSER_CLASSES:
+        raise NotImplementedError(f'Parser type {parser_type} not implemented')
+    # Исходный HTML пишется в архив процесса; записанные страницы офлайн-режима - нет
+    archive = None
+    if settings.PAGE_ARCHIVE_ENABLED and not replay.replay_enabled():
+        archive = _page_archive_pool().get()
+    return PARSER_CLASSES[parser_type](
+        timeout=settings.PARSER_TIMEOUT,
+        max_retries=settings.PARSER_MAX_RETRIES,
+        archive=archive,
+    )
+
+
+def _create_http_session() -> requests.Session:
+    # Офлайн-режим: страницы из записи вместо сети
+    if replay.replay_enabled():
+        return replay.create_session()
+
+    session = requests.Session()
+    # Пул соединений не меньше окна параллельной загрузки страниц
+    adapter = HTTPAdapter(
+        pool_connections=settings.PARSER_FETCH_WINDOW,
+        pool_maxsize=settings.PARSER_FETCH_WINDOW,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def parser(parser_type: str):
+    """Пулированный парсер: with parser('mock') as p: ..."""
+    return _get_pool(
+        f'parser:{parser_type}',
+        lambda: _create_parser(parser_type),
+        close=lambda p: p.close(),
+        healthy=lambda p: p.healthy(),
+    ).use()
+
+
+def http_session():
+    """Пулированная requests.Session для PageTextParser"""
+    return _get_pool(
+        'http_session',
+        _create_http_session,
+        close=lambda s: s.close(),
+    ).use()
+
+
+def llm_provider():
+    """
+    Пулированный LLM провайдер (по настройке LLM_PROVIDER).
+
+    Это тот же экземпляр, что отдаёт get_provider(): у процесса один клиент,
+    одно ограничение частоты и один пул соединений. При пересоздании
+    экземпляр убирается и из реестра провайдеров.
+    """
+    from apps.ai.providers import discard_provider, get_provider
+
+    return _get_pool(
+        'llm_provider',
+        get_provider,
+        close=discard_provider,
+        healthy=lambda p: p.healthy(),
+    ).use()
+
+
+def _page_archive_pool() -> PooledResource:
+    from apps.ai.archive import PageArchive
+
+    # Без лимитов: каждый новый экземпляр начинает новый файл-сегмент
+    return _get_pool(
+        'page_archive',
+        PageArchive,
+        close=lambda a: a.close(),
+        max_uses=0,
+        max_age=0,
+        recycle_on_error=False,
+    )
+
+
+def page_archive():
+    """Архив HTML процесса воркера (apps.ai.archive.PageArchive)"""
+    return _page_archive_pool().use()
+
+
+def init_worker_resources():
+    """Создать ресурсы заранее, при старте процесса воркера"""
+    for context in (parser('mock'), http_session(), llm_provider()):
+        try:
+            with context:
+                pass
+        except Exception as e:
+            logger.warning(f'Failed to initialize worker resource: {e}')
+    logger.info(f'Worker resources initialized: {", ".join(sorted(_pools))}')
+
+
+def shutdown_worker_resources():
+    """Закрыть все ресурсы процесса воркера"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.discard()
+        _pools.clear()
@@ -0,0 +1,147 @@
+"""
+Планировщик периодического парсинга.
+
+Celery beat раз в CRAWL_PLAN_INTERVAL секунд запускает plan_crawls, который:
+- выбирает расписания, у которых наступил next_run_at
+- пропускает продукты, чей предыдущий снимок ещё в статусе in_progress
+- ставит parse_product_data с задержкой, разнесённой по окну
+  CRAWL_STAGGER_WINDOW, чтобы запуски не шли одной пачкой
+
+После парсинга record_crawl_result сравнивает хеш содержимого с прошлым
+запуском и адаптирует интервал: изменилось - чаще, не изменилось - реже.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import zlib
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.benchmark.models import CrawlSchedule, Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def compute_content_hash(values: Dict) -> str:
+    """Стабильный хеш распарсенных значений"""
+    payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def stagger_offset(schedule: CrawlSchedule) -> int:
+    """
+    Смещение запуска внутри окна CRAWL_STAGGER_WINDOW.
+
+    Смещение детерминировано для расписания, поэтому расписания
+    равномерно и стабильно распределены по окну.
+    """
+    window = settings.CRAWL_STAGGER_WINDOW
+    if window <= 0:
+        return 0
+    key = f'{schedule.product_id}:{schedule.source_id}:{schedule.parser_type}'
+    return zlib.crc32(key.encode('utf-8')) % window
+
+
+def jittered(interval: int) -> timedelta:
+    """Интервал со случайным разбросом ±CRAWL_JITTER, чтобы запуски не синхронизировались"""
+    jitter = settings.CRAWL_JITTER
+    return timedelta(seconds=interval * random.uniform(1 - jitter, 1 + jitter))
+
+
+def has_run_in_progress(product_id: str) -> bool:
+    """Есть ли незавершённый (и не зависший) снимок продукта"""
+    stale_after = timezone.now() - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+    return Snapshot.objects.filter(
+        product_id=product_id,
+        parsing_status='in_progress',
+        created_at__gte=stale_after,
+    ).exists()
+
+
+def plan_due_crawls(now=None) -> List[Dict]:
+    """
+    Поставить в очередь парсинг для всех расписаний, у которых наступил срок.
+
+    Returns:
+        Список запланированных запусков
+    """
+    from apps.tasks.celery_tasks import parse_product_data
+
+    now = now or timezone.now()
+    planned = []
+
+    with transaction.atomic():
+        due = (
+            CrawlSchedule.objects
+            .select_for_update()
+            .select_related('product')
+            .filter(is_enabled=True, next_run_at__lte=now)
+        )
+
+        for schedule in due:
+            if has_run_in_progress(schedule.product_id):
+                logger.info(f'Skipping crawl for {schedule}: previous run still in progress')
+                schedule.next_run_at = now + timedelta(seconds=settings.CRAWL_PLAN_INTERVAL)
+                schedule.save(update_fields=['next_run_at', 'updated_at'])
+                continue
+
+            countdown = stagger_offset(schedule)
+            # Предварительный срок; уточняется в record_crawl_result после запуска
+            schedule.next_run_at = now + timedelta(seconds=countdown) + jittered(schedule.interval)
+            schedule.save(update_fields=['next_run_at', 'updated_at'])
+
+            # Один ключ на плановый запуск: повторная доставка продолжит тот же снимок
+            idempotency_key = f'crawl:{schedule.id}:{int(now.timestamp())}'
+            transaction.on_commit(
+                lambda s=schedule, c=countdown, k=idempotency_key: parse_product_data.apply_async(
+                    args=[s.product_id, s.parser_type],
+                    kwargs={'schedule_id': s.id, 'idempotency_key': k},
+                    countdown=c,
+                )
+            )
+            planned.append({
+                'schedule_id': schedule.id,
+                'product_id': schedule.product_id,
+                'countdown': countdown,
+            })
+
+    logger.info(f'Planned {len(planned)} crawls')
+    return planned
+
+
+def record_crawl_result(schedule_id: int, content_hash: str, finished_at=None) -> Optional[CrawlSchedule]:
+    """
+    Учесть результат запуска и адаптировать интервал расписания.
+    """
+    finished_at = finished_at or timezone.now()
+
+    with transaction.atomic():
+        try:
+            schedule = CrawlSchedule.objects.select_for_update().get(id=schedule_id)
+        except CrawlSchedule.DoesNotExist:
+            logger.warning(f'Crawl schedule {schedule_id} not found')
+            return None
+
+        if schedule.last_content_hash:
+            if content_hash != schedule.last_content_hash:
+                schedule.change_count += 1
+                schedule.interval = max(schedule.min_interval, schedule.interval // 2)
+            else:
+                schedule.interval = min(schedule.max_interval, int(schedule.interval * 1.5))
+
+        schedule.run_count += 1
+        schedule.last_content_hash = content_hash
+        schedule.last_run_at = finished_at
+        schedule.next_run_at = finished_at + jittered(schedule.interval)
+        schedule.save()
+
+    logger.info(
+        f'Crawl {schedule}: change rate {schedule.change_rate:.2f}, next interval {schedule.interval}s'
+    )
+    return schedule
@@ -1,9 +1,26 @@
 """
 Celery config for sberbench project.
+
+Задачи разведены по очередям по типу нагрузки, чтобы медленный LLM анализ
+не блокировал парсинг и служебные задачи:
+- scrape      - сетевой парсинг (io-bound)
+- llm         - анализ через LLM (ограничен пропускной способностью модели);
+                очистка HTML идёт в той же задаче, потоково по мере загрузки
+                страниц, отдельной очереди для неё нет
+- maintenance - служебные задачи (метрики, очистка старых данных)
+
+Каждую очередь обслуживает свой воркер, например:
+    celery -A config worker -Q scrape -n scrape@%h
+    celery -A config worker -Q llm -n llm@%h
+Concurrency и prefetch для воркера берутся из QUEUE_WORKER_PROFILES
+(переопределяются переменными CELERY_<QUEUE>_CONCURRENCY и
+CELERY_<QUEUE>_PREFETCH или флагами --concurrency/--prefetch-multiplier).
 """
 
 import os
 from celery import Celery
+from celery.signals import celeryd_init, worker_init, worker_process_init, worker_process_shutdown
+from kombu import Queue
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
@@ -12,8 +29,105 @@ app = Celery('sberbench')
 # Load configuration from Django settings, all celery configuration should have a `CELERY_` prefix.
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
+
+# Профили воркеров по очередям
+QUEUE_WORKER_PROFILES = {
+    'scrape': {'concurrency': 16, 'prefetch_multiplier': 4},
+    'llm': {'concurrency': 4, 'prefetch_multiplier': 1},
+    'maintenance': {'concurrency': 2, 'prefetch_multiplier': 1},
+}
+
+# Приоритеты задач. Брокер - Redis, у него 0 - самый высокий приоритет.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+app.conf.update(
+    task_queues=[Queue(name) for name in QUEUE_WORKER_PROFILES],
+    task_default_queue='maintenance',
+    task_default_priority=PRIORITY_NORMAL,
+    task_routes={
+        'apps.tasks.celery_tasks.parse_product_data': {'queue': 'scrape'},
+        'apps.tasks.celery_tasks.analyze_with_llm': {'queue': 'llm'},
+        'apps.tasks.celery_tasks.refresh_recommendations': {'queue': 'llm'},
+        'apps.tasks.celery_tasks.get_ai_recommendations': {'queue': 'maintenance', 'priority': PRIORITY_HIGH},
+        'apps.tasks.celery_tasks.update_parser_metrics': {'queue': 'maintenance', 'priority': PRIORITY_HIGH},
+        'apps.tasks.celery_tasks.plan_crawls': {'queue': 'maintenance', 'priority': PRIORITY_HIGH},
+        'apps.tasks.celery_tasks.cleanup_old_snapshots': {'queue': 'maintenance', 'priority': PRIORITY_LOW},
+    },
+    broker_transport_options={
+        # Приоритеты внутри очереди для Redis транспорта
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+    },
+)
+
 # Auto-discover tasks from all registered Django apps.
 app.autodiscover_tasks()
+app.autodiscover_tasks(['apps.tasks'], related_name='celery_tasks')
+
+
+_worker_cli_options = {}
+
+
+def get_queue_profile(queues) -> dict:
+    """
+    Настройки воркера для набора очередей.
+
+    Для нескольких очередей берётся максимальная concurrency и минимальный
+    prefetch. Пустой словарь - если среди очередей есть неизвестные.
+    """
+    queues = set(queues)
+    if not queues or not queues <= set(QUEUE_WORKER_PROFILES):
+        return {}
+
+    profiles = []
+    for name in queues:
+        profile = dict(QUEUE_WORKER_PROFILES[name])
+        env_name = name.upper()
+        profile['concurrency'] = int(os.environ.get(f'CELERY_{env_name}_CONCURRENCY', profile['concurrency']))
+        profile['prefetch_multiplier'] = int(
+            os.environ.get(f'CELERY_{env_name}_PREFETCH', profile['prefetch_multiplier'])
+        )
+        profiles.append(profile)
+
+    return {
+        'concurrency': max(p['concurrency'] for p in profiles),
+        'prefetch_multiplier': min(p['prefetch_multiplier'] for p in profiles),
+    }
+
+
+@celeryd_init.connect
+def remember_worker_options(options=None, **kwargs):
+    """Запоминаем, что было задано флагами командной строки"""
+    _worker_cli_options.update(options or {})
+
+
+@worker_init.connect
+def apply_queue_profile(sender=None, **kwargs):
+    """Применяем профиль очереди, если значения не заданы флагами"""
+    profile = get_queue_profile(sender.app.amqp.queues.consume_from)
+    if not profile:
+        return
+
+    if not _worker_cli_options.get('concurrency'):
+        sender.concurrency = profile['concurrency']
+    if _worker_cli_options.get('prefetch_multiplier') in (None, sender.app.conf.worker_prefetch_multiplier):
+        sender.prefetch_multiplier = profile['prefetch_multiplier']
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Создаём переиспользуемые ресурсы в каждом процессе воркера"""
+    from apps.tasks.resources import init_worker_resources
+    init_worker_resources()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    from apps.tasks.resources import shutdown_worker_resources
+    shutdown_worker_resources()
 
 
 @app.task(bind=True)
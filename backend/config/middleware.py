@@ -0,0 +1,93 @@
+"""
+Сжатие ответов API (brotli / gzip).
+
+Сжимаются только ответы на пути из API_COMPRESSION_PATHS и только если
+тело не меньше API_COMPRESSION_MIN_SIZE байт: маленькие ответы сжатие
+не окупают. brotli используется, если клиент его принимает и пакет
+установлен, иначе gzip.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, остаётся gzip
+    brotli = None
+
+_encoding_re = _lazy_re_compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(','):
+        match = _encoding_re.match(part)
+        if not match:
+            continue
+        encoding, quality = match.groups()
+        try:
+            if quality is not None and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(encoding.lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """Сжатие ответов API с порогом по размеру"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = tuple(settings.API_COMPRESSION_PATHS)
+        self.min_size = settings.API_COMPRESSION_MIN_SIZE
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path.startswith(self.paths):
+            return response
+        return self.compress(request, response)
+
+    def _choose_encoding(self, request):
+        accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def compress(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+
+        # От размера зависит, будет ли сжатие, поэтому Vary ставим всегда
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if len(response.content) < self.min_size:
+            return response
+
+        encoding = self._choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(response.content, compresslevel=settings.API_COMPRESSION_GZIP_LEVEL)
+
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+
+        # Тело изменилось, сильный ETag больше не подходит
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        return response
@@ -5,6 +5,7 @@ Django settings for sberbench benchmarking system
 import os
 from pathlib import Path
 import environ
+from celery.schedules import crontab
 
 env = environ.Env()
 environ.Env.read_env(os.path.join(Path(__file__).resolve().parent.parent, '.env'))
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,6 +80,15 @@ DATABASES = {
     }
 }
 
+# Cache
+# Общий кэш нужен, чтобы публикация снимка в воркере сразу была видна API
+# (например, CACHE_URL=rediscache://localhost:6379/1); locmem - только для разработки
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+# Сколько живёт закэшированный id текущего снимка продукта, сек
+CURRENT_SNAPSHOT_CACHE_TTL = env.int('CURRENT_SNAPSHOT_CACHE_TTL', default=300)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,7 +125,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'apps.benchmark.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -128,6 +139,19 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': '%Y-%m-%dT%H:%M:%SZ',
 }
 
+# Максимум запросов в одном POST /api/compare/bulk/
+BULK_COMPARE_MAX_REQUESTS = env.int('BULK_COMPARE_MAX_REQUESTS', default=20)
+
+# Сжатие ответов API (config/middleware.py)
+API_COMPRESSION_PATHS = env.list('API_COMPRESSION_PATHS', default=[
+    '/api/compare/',
+    '/api/snapshots/',
+    '/api/ai/',
+])
+API_COMPRESSION_MIN_SIZE = env.int('API_COMPRESSION_MIN_SIZE', default=1024)  # байт
+API_COMPRESSION_BROTLI_QUALITY = env.int('API_COMPRESSION_BROTLI_QUALITY', default=4)
+API_COMPRESSION_GZIP_LEVEL = env.int('API_COMPRESSION_GZIP_LEVEL', default=6)
+
 # CORS configuration
 CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=[
     'http://localhost:5173',
@@ -147,10 +171,103 @@ CELERY_TIMEZONE = 'Europe/Moscow'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 
+# Crawl scheduling (см. apps/tasks/scheduler.py)
+CRAWL_PLAN_INTERVAL = env.int('CRAWL_PLAN_INTERVAL', default=60)  # как часто beat проверяет расписания, сек
+CRAWL_STAGGER_WINDOW = env.int('CRAWL_STAGGER_WINDOW', default=600)  # окно разнесения запусков, сек
+CRAWL_JITTER = env.float('CRAWL_JITTER', default=0.1)  # разброс интервала, доля
+CRAWL_DEFAULT_INTERVAL = env.int('CRAWL_DEFAULT_INTERVAL', default=6 * 60 * 60)
+CRAWL_MIN_INTERVAL = env.int('CRAWL_MIN_INTERVAL', default=60 * 60)
+CRAWL_MAX_INTERVAL = env.int('CRAWL_MAX_INTERVAL', default=7 * 24 * 60 * 60)
+
+# Рекомендации для новых и изменившихся фактов (LLMService.refresh_recommendations)
+AI_RECOMMENDATIONS_INTERVAL = env.int('AI_RECOMMENDATIONS_INTERVAL', default=15 * 60)  # сек
+AI_RECOMMENDATIONS_MAX_PER_RUN = env.int('AI_RECOMMENDATIONS_MAX_PER_RUN', default=1000)
+# Правила рекомендаций без LLM (apps/ai/rules.py)
+AI_RECOMMENDATION_RULES = env.bool('AI_RECOMMENDATION_RULES', default=True)
+AI_RULES_FEE_THRESHOLD = env.float('AI_RULES_FEE_THRESHOLD', default=500)  # ₽ в год
+AI_RULES_RATE_THRESHOLD = env.float('AI_RULES_RATE_THRESHOLD', default=15)  # %
+
+CELERY_BEAT_SCHEDULE = {
+    'plan-crawls': {
+        'task': 'apps.tasks.celery_tasks.plan_crawls',
+        'schedule': CRAWL_PLAN_INTERVAL,
+    },
+    'update-parser-metrics': {
+        'task': 'apps.tasks.celery_tasks.update_parser_metrics',
+        'schedule': 5 * 60,
+    },
+    'refresh-recommendations': {
+        'task': 'apps.tasks.celery_tasks.refresh_recommendations',
+        'schedule': AI_RECOMMENDATIONS_INTERVAL,
+    },
+    'cleanup-old-snapshots': {
+        'task': 'apps.tasks.celery_tasks.cleanup_old_snapshots',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
 # Parser Configuration
 PARSER_TIMEOUT = env.int('PARSER_TIMEOUT', default=30)
 PARSER_MAX_RETRIES = env.int('PARSER_MAX_RETRIES', default=3)
 PARSER_BATCH_SIZE = env.int('PARSER_BATCH_SIZE', default=10)
+# Сколько страниц PageTextParser.iter_pages() скачивает параллельно
+PARSER_FETCH_WINDOW = env.int('PARSER_FETCH_WINDOW', default=4)
+# Повторы parse_product_data для банков, которые не удалось распарсить
+# (уже сохранённые банки не парсятся повторно, см. Snapshot.completed_banks)
+PARSER_RUN_MAX_RETRIES = env.int('PARSER_RUN_MAX_RETRIES', default=3)
+PARSER_RUN_RETRY_DELAY = env.int('PARSER_RUN_RETRY_DELAY', default=60)
+
+# Ресурсы Celery воркера (сессии парсеров, LLM клиенты) переиспользуются
+# между задачами и пересоздаются после N использований или по возрасту
+WORKER_RESOURCE_MAX_USES = env.int('WORKER_RESOURCE_MAX_USES', default=1000)
+WORKER_RESOURCE_MAX_AGE = env.int('WORKER_RESOURCE_MAX_AGE', default=3600)
+
+# LLM Configuration
+# Провайдер: auto | openai | transformers | mock (см. apps/ai/providers.py)
+LLM_PROVIDER = env('LLM_PROVIDER', default='auto')
+LLM_LOCAL_MODEL = env('LLM_LOCAL_MODEL', default='Qwen/Qwen-14B-Chat')
+LLM_LOCAL_BATCH_SIZE = env.int('LLM_LOCAL_BATCH_SIZE', default=4)
+LLM_MOCK_LATENCY = env.float('LLM_MOCK_LATENCY', default=0)
+# Дополнительная задержка mock на каждый запрос батча, секунды
+LLM_MOCK_LATENCY_PER_REQUEST = env.float('LLM_MOCK_LATENCY_PER_REQUEST', default=0)
+# OpenAI-совместимый API (OpenAI, vLLM, llama.cpp server)
+OPENAI_API_KEY = env('OPENAI_API_KEY', default='')
+LLM_API_KEY = env('LLM_API_KEY', default=OPENAI_API_KEY)
+LLM_API_BASE = env('LLM_API_BASE', default='https://api.openai.com/v1')
+LLM_MODEL_NAME = env('LLM_MODEL_NAME', default='gpt-3.5-turbo')
+LLM_MAX_IN_FLIGHT = env.int('LLM_MAX_IN_FLIGHT', default=8)
+LLM_RATE_LIMIT = env.float('LLM_RATE_LIMIT', default=0)  # запросов в секунду, 0 - без ограничения
+LLM_RATE_BURST = env.int('LLM_RATE_BURST', default=8)
+LLM_MAX_RETRIES = env.int('LLM_MAX_RETRIES', default=5)
+LLM_TIMEOUT = env.float('LLM_TIMEOUT', default=60)
+# Результаты анализа пишутся в БД пачками (bulk_create) по N записей
+AI_RESULTS_BATCH_SIZE = env.int('AI_RESULTS_BATCH_SIZE', default=100)
+# Извлечение простых критериев шаблонами до LLM (apps/ai/extractors.py)
+AI_PREEXTRACT_ENABLED = env.bool('AI_PREEXTRACT_ENABLED', default=True)
+AI_PREEXTRACT_MIN_CONFIDENCE = env.float('AI_PREEXTRACT_MIN_CONFIDENCE', default=0.85)
+# Почти одинаковые страницы не анализируются повторно (apps/ai/dedup.py);
+# расстояние Хэмминга SimHash из 64 бит (у разных страниц ~32)
+AI_DEDUP_ENABLED = env.bool('AI_DEDUP_ENABLED', default=True)
+AI_DEDUP_MAX_DISTANCE = env.int('AI_DEDUP_MAX_DISTANCE', default=6)
+# Очищенный текст страниц сохраняется в корпус с полнотекстовым поиском (apps/ai/corpus.py)
+AI_PAGE_STORE_ENABLED = env.bool('AI_PAGE_STORE_ENABLED', default=True)
+# Архив исходного HTML (apps/ai/archive.py): блобы zstd по sha256 в сегментах
+PAGE_ARCHIVE_ENABLED = env.bool('PAGE_ARCHIVE_ENABLED', default=True)
+PAGE_ARCHIVE_DIR = env('PAGE_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive'))
+PAGE_ARCHIVE_SEGMENT_SIZE = env.int('PAGE_ARCHIVE_SEGMENT_SIZE', default=256 * 1024 * 1024)
+PAGE_ARCHIVE_ZSTD_LEVEL = env.int('PAGE_ARCHIVE_ZSTD_LEVEL', default=10)
+# Офлайн-режим (apps/parsers/replay.py): страницы из каталога корпуса или 'archive',
+# без обращения к сайтам; пусто - обычная загрузка
+PARSER_REPLAY_SOURCE = env('PARSER_REPLAY_SOURCE', default='')
+PARSER_REPLAY_RUN = env('PARSER_REPLAY_RUN', default='')
+PARSER_REPLAY_LATENCY = env.float('PARSER_REPLAY_LATENCY', default=0)
+# fixed | uniform | exponential | lognormal
+PARSER_REPLAY_LATENCY_DISTRIBUTION = env('PARSER_REPLAY_LATENCY_DISTRIBUTION', default='fixed')
+PARSER_REPLAY_ERROR_RATE = env.float('PARSER_REPLAY_ERROR_RATE', default=0)
+PARSER_REPLAY_ERRORS = env('PARSER_REPLAY_ERRORS', default='timeout:0.4,503:0.4,429:0.2')
+PARSER_REPLAY_SEED = env.int('PARSER_REPLAY_SEED', default=0)
+# URL, которого нет в записи: 404 | any (записанная страница по хешу URL)
+PARSER_REPLAY_MISSING = env('PARSER_REPLAY_MISSING', default='404')
 
 # Logging
 LOGGING = {
@@ -194,6 +311,11 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'httpx': {
+            'handlers': ['console', 'file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 